@@ -0,0 +1,133 @@
+"""Fixtures for the Wellbeing benchmarks."""
+
+import json
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+from homeassistant.helpers.entity import Entity
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.fake_hub import fake_access_token
+from benchmarks.report import BenchmarkReport
+from custom_components.wellbeing.const import DOMAIN
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+REPORT_KEY = pytest.StashKey[BenchmarkReport]()
+REGRESSIONS_KEY = pytest.StashKey[list[str]]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("wellbeing benchmarks")
+    group.addoption(
+        "--bench-report",
+        default="benchmark-report.json",
+        help="Where to write the JSON report of the benchmarks",
+    )
+    group.addoption(
+        "--bench-baseline",
+        help="Report of an earlier run to compare the results against",
+    )
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=0.25,
+        help="Tolerated change against the baseline (0.25 = 25%%)",
+    )
+    group.addoption(
+        "--map-fixtures",
+        help="Directory of recorded mapData to add to the map benchmarks",
+    )
+    group.addoption(
+        "--stream-recording",
+        help="Live stream recording to replay (default: a synthetic one)",
+    )
+    group.addoption(
+        "--replay-speed",
+        type=float,
+        default=0.0,
+        help="Replay speed of the stream recording (0 = as fast as possible)",
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    report = config.stash.get(REPORT_KEY, None)
+    if report is None or not report.results:
+        return
+    report.write(config.getoption("--bench-report"))
+    if baseline := config.getoption("--bench-baseline"):
+        with open(baseline, encoding="utf-8") as file:
+            regressions = report.regressions(
+                json.load(file), config.getoption("--bench-threshold")
+            )
+        config.stash[REGRESSIONS_KEY] = regressions
+        if regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    regressions = config.stash.get(REGRESSIONS_KEY, None)
+    if regressions is None:
+        return
+    terminalreporter.section("benchmark regressions")
+    for regression in regressions:
+        terminalreporter.line(regression, red=True)
+    if not regressions:
+        terminalreporter.line("none against the baseline", green=True)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable custom integrations in Home Assistant."""
+    yield
+
+
+@pytest.fixture(scope="session")
+def bench_report(request):
+    """The report the benchmarks add their metrics to, written at the end."""
+    return request.config.stash.setdefault(REPORT_KEY, BenchmarkReport())
+
+
+@pytest.fixture
+async def setup_fake_hub(hass):
+    """Set up a config entry against a FakeHub, unloaded after the test."""
+    entries = []
+
+    async def setup(hub, **options):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                "api_key": "test_api_key",
+                "access_token": fake_access_token(),
+                "refresh_token": "test_refresh_token",
+            },
+            options={"stream": False, **options},
+        )
+        entry.add_to_hass(hass)
+        with patch("custom_components.wellbeing.ElectroluxHubAPI", return_value=hub):
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+        entries.append(entry)
+        return hass.data[DOMAIN][entry.entry_id]
+
+    yield setup
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.fixture
+def entity_writes():
+    """Counts the entity state writes per platform."""
+    counter: Counter[str] = Counter()
+    write = Entity.async_write_ha_state
+
+    def counting_write(self):
+        counter[self.entity_id.split(".", 1)[0]] += 1
+        write(self)
+
+    with patch.object(Entity, "async_write_ha_state", counting_write):
+        yield counter
@@ -0,0 +1,416 @@
+"""An in-process stand-in for ElectroluxHubAPI.
+
+The fake hub serves the appliance list, info, state, command and livestream
+configuration requests of the Electrolux API from memory, through an Auth
+with the same request() interface as the real one. The appliances are real
+pyelectroluxgroup Appliance objects bound to that Auth, so the whole request
+path of the integration (including the request accounting wrapping
+Auth.request) is exercised. Latency and error rate are configurable per
+call, and the live stream is synthetic (or replaced, see stream_source).
+"""
+
+import asyncio
+import copy
+import math
+import random
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+
+import jwt
+from aiohttp import ClientConnectionError
+from pyelectroluxgroup.appliance import Appliance as ApiAppliance
+
+from custom_components.wellbeing.api import Model
+
+PURIFIER_STATE = {
+    "Workmode": "Auto",
+    "Fanspeed": 3,
+    "PM1": 2,
+    "PM2_5": 3,
+    "PM10": 4,
+    "Temp": 21,
+    "Humidity": 40,
+    "TVOC": 50,
+    "ECO2": 400,
+    "FilterLife_1": 80,
+    "FilterLife_2": 70,
+    "Ionizer": False,
+    "UILight": True,
+    "SafetyLock": False,
+    "SignalStrength": "GOOD",
+    "DoorOpen": False,
+    "FrmVer_NIU": "1.0.0",
+}
+MULTI_PURIFIER_STATE = {
+    **PURIFIER_STATE,
+    "AQILight": True,
+    "Humidification": False,
+    "HumidityTarget": 50,
+    "LouverSwing": "off",
+    "WaterTrayLevelLow": False,
+}
+PUREI9_STATE = {
+    "batteryStatus": 6,
+    "robotStatus": 9,
+    "powerMode": 3,
+    "ecoMode": "off",
+    "dustbinStatus": "installed",
+    "FrmVer_NIU": "42.1",
+}
+ROBOT700_STATE = {
+    "batteryStatus": 80,
+    "state": "idle",
+    "cleaningMode": "power",
+    "vacuumMode": "standard",
+    "waterPumpRate": "low",
+    "chargingStatus": "charging",
+    "mopInstalled": False,
+    "firmwareVersion": "1.2.3",
+}
+DEHUMIDIFIER_STATE = {
+    "pm25": 3,
+    "ambientTemperatureC": 21,
+    "sensorHumidity": 55,
+    "targetHumidity": 50,
+    "fanSpeedSetting": "low",
+    "fanSpeedState": "low",
+    "applianceState": "running",
+    "uiLockMode": False,
+    "waterTankFull": False,
+}
+AC_STATE = {
+    "mode": "cool",
+    "targetTemperatureC": 22.0,
+    "ambientTemperatureC": 24.0,
+    "sleepMode": False,
+    "compressorState": True,
+    "applianceState": True,
+    "fanSpeedSetting": "low",
+    "verticalSwing": False,
+    "FrmVer_NIU": "3.0",
+}
+
+PURIFIER_CAPABILITIES = {
+    "Workmode": {"access": "readwrite"},
+    "Fanspeed": {"access": "readwrite", "min": 1, "max": 9},
+    "Ionizer": {"access": "readwrite"},
+    "UILight": {"access": "readwrite"},
+    "SafetyLock": {"access": "readwrite"},
+    "PM2_5": {"access": "read"},
+}
+
+
+@dataclass(frozen=True)
+class ApplianceProfile:
+    """What an appliance of a model reports."""
+
+    device_type: str
+    state: dict
+    # Properties that change over time, and are sent over the live stream
+    volatile: tuple[str, ...]
+    capabilities: dict = field(default_factory=dict)
+    map_crumbs: int = 0
+
+
+PROFILES: dict[Model, ApplianceProfile] = {
+    **{
+        model: ApplianceProfile(
+            "AIR_PURIFIER",
+            PURIFIER_STATE,
+            ("PM1", "PM2_5", "PM10", "TVOC", "ECO2"),
+            PURIFIER_CAPABILITIES,
+        )
+        for model in (
+            Model.Muju,
+            Model.WELLA5,
+            Model.WELLA7,
+            Model.PUREA9,
+            Model.AX5,
+            Model.AX7,
+            Model.AX9,
+        )
+    },
+    Model.PM700: ApplianceProfile(
+        "MULTI_AIR_PURIFIER",
+        MULTI_PURIFIER_STATE,
+        ("PM1", "PM2_5", "PM10"),
+        PURIFIER_CAPABILITIES,
+    ),
+    Model.PUREi9: ApplianceProfile(
+        "ROBOTIC_VACUUM_CLEANER", PUREI9_STATE, ("batteryStatus",), map_crumbs=500
+    ),
+    Model.Robot700series: ApplianceProfile(
+        "ROBOTIC_VACUUM_CLEANER", ROBOT700_STATE, ("batteryStatus",)
+    ),
+    Model.VacuumHygienic700: ApplianceProfile(
+        "ROBOTIC_VACUUM_CLEANER", ROBOT700_STATE, ("batteryStatus",)
+    ),
+    Model.Cybele: ApplianceProfile(
+        "ROBOTIC_VACUUM_CLEANER", ROBOT700_STATE, ("batteryStatus",)
+    ),
+    Model.UltimateHome700: ApplianceProfile(
+        "DEHUMIDIFIER", DEHUMIDIFIER_STATE, ("pm25", "sensorHumidity")
+    ),
+    Model.COMFORT600: ApplianceProfile(
+        "PORTABLE_AIR_CONDITIONER", AC_STATE, ("ambientTemperatureC",)
+    ),
+    Model.AZUL: ApplianceProfile(
+        "PORTABLE_AIR_CONDITIONER", AC_STATE, ("ambientTemperatureC",)
+    ),
+}
+
+
+def synthetic_map_data(
+    crumbs: int,
+    *,
+    chunks: int = 1,
+    first_crumb: int = 0,
+    room: tuple[float, float] | None = None,
+    delta: bool = False,
+    session_id: str = "session_1",
+    timestamp: int = 1,
+    seed: int = 0,
+) -> dict:
+    """mapData of a cleaning session: a boustrophedon trail in a few frames.
+
+    The trail is split into chunks of consecutive crumbs, each in its own
+    local frame with a small transform, as reported by a robot that
+    re-localised during the session. With a room (width, depth in metres)
+    the robot goes over the room again, slightly shifted, once it is
+    covered; otherwise the lanes go on forever. first_crumb skips the start
+    of the trail, e.g. to build a delta upload (crumbCollectionDelta) with
+    only the crumbs since the previous one.
+    """
+    rng = random.Random(seed)
+    total = first_crumb + crumbs
+    per_chunk = max(1, math.ceil(total / chunks))
+    transforms = [
+        {
+            "t": t,
+            "xya": [
+                rng.uniform(-0.5, 0.5),
+                rng.uniform(-0.5, 0.5),
+                rng.uniform(-0.05, 0.05),
+            ],
+        }
+        for t in range(chunks)
+    ]
+    lane_length = round(room[0] / 0.1) if room else 60  # crumbs 0.1 m apart
+    lanes = max(1, round(room[1] / 0.3)) if room else None
+    trail = []
+    for index in range(first_crumb, total):
+        lane, step = divmod(index, lane_length)
+        shift = 0.0
+        if lanes:
+            repeat, lane = divmod(lane, lanes)
+            shift = repeat % 3 * 0.1
+        x = step * 0.1 if lane % 2 == 0 else (lane_length - step) * 0.1
+        trail.append(
+            {
+                "xy": [
+                    round(x, 3),
+                    round(lane * 0.3 + shift + rng.uniform(-0.02, 0.02), 3),
+                ],
+                "t": index // per_chunk,
+            }
+        )
+    last = trail[-1]["xy"] if trail else [0.0, 0.0]
+    return {
+        "sessionId": session_id,
+        "timestamp": timestamp,
+        "crumbCollectionDelta": delta,
+        "crumbs": trail,
+        "transforms": transforms,
+        "robotPose": {"xya": [*last, 0.0]},
+        "chargerPoses": [{"xya": [0.0, 0.0, 0.0]}],
+    }
+
+
+@dataclass
+class FakeApplianceState:
+    """The server side state of one fake appliance."""
+
+    appliance_id: str
+    name: str
+    model: Model
+    profile: ApplianceProfile
+    reported: dict
+
+
+class FakeResponse:
+    """The parts of aiohttp.ClientResponse used by pyelectroluxgroup."""
+
+    def __init__(self, data, status: int = 200) -> None:
+        self._data = data
+        self.status = status
+
+    async def json(self):
+        return self._data
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+def fake_access_token(expires_in: float = 3600) -> str:
+    """An access token the token manager can check the expiry of."""
+    return jwt.encode(
+        {"exp": int(time.time() + expires_in)}, "fake_hub", algorithm="HS256"
+    )
+
+
+class FakeAuth:
+    """Serves the API requests of the fake hub."""
+
+    def __init__(self, hub: "FakeHub") -> None:
+        self._hub = hub
+        self.calls: Counter[str] = Counter()
+
+    async def async_get_access_token(self) -> str:
+        return fake_access_token()
+
+    async def request(self, method: str, path: str, **kwargs) -> FakeResponse:
+        hub = self._hub
+        self.calls[path.rsplit("/", 1)[-1]] += 1
+        if hub.latency:
+            await asyncio.sleep(hub.latency)
+        if hub.error_rate and hub.rng.random() < hub.error_rate:
+            raise ClientConnectionError(f"Simulated failure of {method} {path}")
+        return FakeResponse(hub.handle(method, path, kwargs.get("json")))
+
+
+class FakeHub:
+    """Simulates an account with appliances_per_model appliances of each Model.
+
+    appliance_models gives the appliances explicitly instead, e.g. those of
+    a stream recording.
+    """
+
+    def __init__(
+        self,
+        *,
+        appliances_per_model: int = 1,
+        models: tuple[Model, ...] = tuple(PROFILES),
+        appliance_models: dict[str, Model] | None = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        change_rate: float = 0.5,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency  # seconds per request
+        self.error_rate = error_rate  # share of requests that fail
+        self.change_rate = change_rate  # share of state polls with a change
+        self.rng = random.Random(seed)
+        self.auth = FakeAuth(self)
+        if appliance_models is None:
+            # appliances_per_model appliances of each of the models
+            appliance_models = {
+                f"{model.name.lower()}_{index}": model
+                for model in models
+                for index in range(appliances_per_model)
+            }
+        self.appliances: dict[str, FakeApplianceState] = {}
+        for index, (appliance_id, model) in enumerate(appliance_models.items()):
+            profile = PROFILES[model]
+            reported = copy.deepcopy(profile.state)
+            if profile.map_crumbs:
+                reported["mapData"] = synthetic_map_data(profile.map_crumbs, seed=index)
+            self.appliances[appliance_id] = FakeApplianceState(
+                appliance_id, f"{model.name} {index}", model, profile, reported
+            )
+        # Replaceable source of the live stream events, e.g. by a replay
+        self.stream_source: Callable[[], AsyncIterator[dict]] = self.synthetic_stream
+        self.stream_events = 1000
+        self.stream_interval = 0.0  # seconds between synthetic events
+        self.stream_done = asyncio.Event()
+
+    async def async_get_appliances(self) -> list[ApiAppliance]:
+        resp = await self.auth.request("get", "appliances")
+        return [ApiAppliance(data, self.auth) for data in await resp.json()]
+
+    async def async_get_livestream_configurations(self) -> dict:
+        resp = await self.auth.request("get", "configurations/livestream")
+        return await resp.json()
+
+    async def watch_appliances(self) -> AsyncIterator[dict]:
+        async for event in self.stream_source():
+            yield event
+        self.stream_done.set()
+        # The real stream does not end; keep the supervisor from reconnecting
+        await asyncio.Event().wait()
+
+    async def synthetic_stream(self) -> AsyncIterator[dict]:
+        """stream_events property changes, round robin over the appliances."""
+        appliances = list(self.appliances.values())
+        for index in range(self.stream_events):
+            appliance = appliances[index % len(appliances)]
+            prop = appliance.profile.volatile[
+                index // len(appliances) % len(appliance.profile.volatile)
+            ]
+            value = self._changed_value(appliance.reported.get(prop))
+            appliance.reported[prop] = value
+            yield {
+                "applianceId": appliance.appliance_id,
+                "property": prop,
+                "value": value,
+            }
+            # Yield to the event loop even without a delay, as a socket would
+            await asyncio.sleep(self.stream_interval)
+
+    def handle(self, method: str, path: str, body):
+        """The JSON response of an API request."""
+        parts = path.strip("/").split("/")
+        if parts == ["appliances"]:
+            return [
+                {
+                    "applianceId": appliance.appliance_id,
+                    "applianceName": appliance.name,
+                    "applianceType": appliance.model.value,
+                }
+                for appliance in self.appliances.values()
+            ]
+        if parts == ["configurations", "livestream"]:
+            return {
+                "appliances": [
+                    {
+                        "applianceId": appliance.appliance_id,
+                        "properties": list(appliance.profile.volatile),
+                    }
+                    for appliance in self.appliances.values()
+                ]
+            }
+        appliance = self.appliances[parts[1]]
+        match parts[2]:
+            case "info":
+                return {
+                    "applianceInfo": {
+                        "brand": "Electrolux",
+                        "serialNumber": f"sn_{appliance.appliance_id}",
+                        "deviceType": appliance.profile.device_type,
+                        "model": appliance.model.value,
+                        "pnc": appliance.appliance_id,
+                    },
+                    "capabilities": appliance.profile.capabilities,
+                }
+            case "state":
+                if self.rng.random() < self.change_rate:
+                    prop = self.rng.choice(appliance.profile.volatile)
+                    appliance.reported[prop] = self._changed_value(
+                        appliance.reported.get(prop)
+                    )
+                return {
+                    "status": "enabled",
+                    "connectionState": "Connected",
+                    "properties": {"reported": copy.deepcopy(appliance.reported)},
+                }
+            case "command":
+                return {}
+            case "interactiveMap" | "memoryMap":
+                return []
+        raise ValueError(f"Unknown request {method} {path}")
+
+    def _changed_value(self, value):
+        if isinstance(value, int | float) and not isinstance(value, bool):
+            return max(0, value + self.rng.choice((-1, 1)))
+        return self.rng.randint(0, 100)
@@ -0,0 +1,167 @@
+"""mapData corpus of the map rendering benchmark.
+
+Generated cases cover the shapes of cleaning sessions that matter for the
+renderer: a short spot clean, a full-house session of 50k crumbs, a trail
+split over many transform chunks, and a sequence of delta uploads (as sent
+while a live map view is open in the Electrolux app). Recorded mapData can
+be added from a directory of JSON files, see recorded_cases; recordings are
+not shipped, as they contain the floor plan of someone's home.
+"""
+
+import dataclasses
+import gzip
+import json
+import resource
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from benchmarks.fake_hub import synthetic_map_data
+from custom_components.wellbeing.map_data import CrumbTrail, MapData
+from custom_components.wellbeing.map_renderer import (
+    ROBOT_MARKER_CHARGER,
+    ROBOT_MARKER_POSE,
+    composite_map,
+    render_layers,
+    render_map,
+)
+from custom_components.wellbeing.session_archive import encode_session
+
+
+@dataclass(frozen=True)
+class MapCase:
+    """A named sequence of mapData uploads of one cleaning session."""
+
+    name: str
+    # Keyword arguments of synthetic_map_data, one per upload
+    generated: tuple[dict, ...] = ()
+    recorded: Path | None = None
+    repeats: int = field(default=5, compare=False)
+
+    def uploads(self) -> list[dict]:
+        if self.recorded is not None:
+            return _load_recording(self.recorded)
+        return [synthetic_map_data(**kwargs) for kwargs in self.generated]
+
+
+DELTA_UPLOADS = 20
+DELTA_CRUMBS = 250
+
+GENERATED_CASES = (
+    MapCase("spot_clean", ({"crumbs": 150, "room": (1.5, 1.5)},), repeats=20),
+    MapCase(
+        "full_house",
+        ({"crumbs": 50_000, "chunks": 8, "room": (10.0, 8.0)},),
+        repeats=2,
+    ),
+    MapCase("many_chunks", ({"crumbs": 10_000, "chunks": 400, "room": (8.0, 6.0)},)),
+    MapCase(
+        "delta_uploads",
+        tuple(
+            {
+                "crumbs": DELTA_CRUMBS,
+                "first_crumb": upload * DELTA_CRUMBS,
+                "chunks": DELTA_UPLOADS // 10,
+                "room": (8.0, 6.0),
+                "timestamp": upload + 1,
+                "delta": True,
+            }
+            for upload in range(DELTA_UPLOADS)
+        ),
+        repeats=1,
+    ),
+)
+
+
+def recorded_cases(directory: str | Path) -> list[MapCase]:
+    """Cases from the *.json and *.json.gz files of a directory.
+
+    A file holds the mapData of one upload, the reported state of an
+    appliance (with mapData), or a list of those for a sequence of uploads.
+    """
+    return [
+        MapCase(f"recorded_{path.name.split('.', 1)[0]}", recorded=path)
+        for path in sorted(Path(directory).iterdir())
+        if path.name.endswith((".json", ".json.gz"))
+    ]
+
+
+def _load_recording(path: Path) -> list[dict]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        data = json.load(file)
+    uploads = data if isinstance(data, list) else [data]
+    return [upload.get("mapData", upload) for upload in uploads]
+
+
+def measure_renders(case: MapCase, rotation: float, robot_marker: str) -> dict:
+    """Render the uploads of a case as the camera does and measure it.
+
+    Meant to run in a fresh process, so that the peak RSS is that of this
+    case alone. The uploads are decoded as WellbeingApiClient does when they
+    arrive, and delta uploads are accumulated into the session trail before
+    rendering, like WellbeingCamera does.
+    """
+    uploads = case.uploads()
+    reported_bytes = sum(_deep_size(upload.get("crumbs") or []) for upload in uploads)
+    start = time.perf_counter()
+    decoded = [MapData.from_reported(upload) for upload in uploads]
+    decode_ms = (time.perf_counter() - start) * 1000
+    del uploads
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    samples = []
+    crumbs = CrumbTrail()
+    image = None
+    for _ in range(case.repeats):
+        crumbs = CrumbTrail()
+        for map_data in decoded:
+            crumbs = crumbs + map_data.crumbs if map_data.delta else map_data.crumbs
+            start = time.perf_counter()
+            image = render_map(
+                {"mapData": dataclasses.replace(map_data, crumbs=crumbs)},
+                rotation,
+                robot_marker,
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # A marker-only change (e.g. the robot docking) as the camera handles
+    # it, onto the layers of the last render
+    layers = render_layers(dataclasses.replace(decoded[-1], crumbs=crumbs), rotation)
+    other_marker = (
+        ROBOT_MARKER_POSE
+        if robot_marker == ROBOT_MARKER_CHARGER
+        else ROBOT_MARKER_CHARGER
+    )
+    start = time.perf_counter()
+    composite_map(layers, other_marker)
+    marker_change_ms = (time.perf_counter() - start) * 1000
+    archived = encode_session(dataclasses.replace(decoded[-1], crumbs=crumbs))
+    return {
+        "crumbs": len(crumbs),
+        "decode_ms": round(decode_ms, 3),
+        # Memory of the crumbs of all uploads, as reported and as decoded
+        "reported_crumb_bytes": reported_bytes,
+        "decoded_crumb_bytes": sum(map_data.crumbs.nbytes for map_data in decoded),
+        # The session trail as written by the SessionArchive
+        "archived_bytes": len(archived),
+        "uploads": len(decoded),
+        "samples": samples,
+        "marker_change_ms": round(marker_change_ms, 3),
+        "width": image.width if image else 0,
+        "height": image.height if image else 0,
+        "png_bytes": len(image.image) if image else 0,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_kib": peak_rss,
+        "render_rss_kib": max(0, peak_rss - baseline_rss),
+    }
+
+
+def _deep_size(value) -> int:
+    """Memory taken by a JSON value, containers and contents."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(item) for item in value.values())
+    elif isinstance(value, list):
+        size += sum(_deep_size(item) for item in value)
+    return size
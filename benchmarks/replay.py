@@ -0,0 +1,61 @@
+"""Replay of recorded live stream traffic against the fake hub.
+
+Recordings are written by the integration with the "record_stream" option
+(see custom_components/wellbeing/recorder.py). A replay serves the recorded
+appliances from a FakeHub and feeds the recorded events to the coordinator
+through hub.stream_source, at the recorded pace scaled by speed, or as fast
+as the event loop takes them with speed 0.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+
+from benchmarks.fake_hub import FakeHub
+from custom_components.wellbeing.api import Model
+from custom_components.wellbeing.recorder import read_recording
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StreamReplay:
+    """A stream source that replays recorded events."""
+
+    def __init__(self, events: list[tuple[float, dict]], speed: float = 0.0) -> None:
+        self.events = events
+        self.speed = speed
+        # perf_counter() time each event was due, to measure delivery lag
+        self.scheduled: list[float] = []
+
+    async def __call__(self) -> AsyncIterator[dict]:
+        if not self.events:
+            return
+        start = time.perf_counter()
+        first = self.events[0][0]
+        for timestamp, event in self.events:
+            due = start + (timestamp - first) / self.speed if self.speed else 0.0
+            delay = due - time.perf_counter()
+            # Yield to the event loop even without a delay, as a socket would
+            await asyncio.sleep(max(0.0, delay))
+            self.scheduled.append(due or time.perf_counter())
+            yield event
+
+
+def replay_hub(path: str, speed: float = 0.0, **kwargs) -> tuple[FakeHub, StreamReplay]:
+    """A FakeHub with the appliances of a recording, streaming its events.
+
+    Appliances of unknown models are left out; their events are still
+    replayed, and ignored by the coordinator.
+    """
+    appliances, events = read_recording(path)
+    models = {}
+    for appliance_id, model in appliances.items():
+        try:
+            models[appliance_id] = Model(model)
+        except ValueError:
+            _LOGGER.warning("No fake appliance for %s (%s)", appliance_id, model)
+    hub = FakeHub(appliance_models=models, **kwargs)
+    replay = StreamReplay(events, speed)
+    hub.stream_source = replay
+    return hub, replay
@@ -0,0 +1,81 @@
+"""JSON report of the benchmark results."""
+
+import json
+import math
+import platform
+from pathlib import Path
+
+from homeassistant.const import __version__ as HA_VERSION
+
+# Metrics compared against a baseline, by name suffix. Latency metrics are
+# percentile dicts of which the p95 is compared.
+LOWER_IS_BETTER = ("_ms", "_kib", "_bytes", "_per_refresh", "_per_event")
+HIGHER_IS_BETTER = ("_per_second",)
+MIN_LATENCY_CHANGE_MS = 1.0  # below this, a change is timer noise
+
+
+def percentiles(samples: list[float], *points: int) -> dict[str, float]:
+    """Nearest-rank percentiles of the samples, e.g. {"p50": ..., "p95": ...}."""
+    points = points or (50, 95, 99)
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        rank = max(1, math.ceil(point / 100 * len(ordered)))
+        result[f"p{point}"] = round(ordered[rank - 1], 3)
+    result["max"] = round(ordered[-1], 3)
+    return result
+
+
+class BenchmarkReport:
+    """Collects the metrics of every benchmark of a session."""
+
+    def __init__(self) -> None:
+        self.results: dict[str, dict] = {}
+
+    def add(self, name: str, **metrics) -> None:
+        """Record the metrics of one benchmark."""
+        self.results[name] = metrics
+
+    def as_dict(self) -> dict:
+        return {
+            "environment": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "home_assistant": HA_VERSION,
+            },
+            "benchmarks": dict(sorted(self.results.items())),
+        }
+
+    def write(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.as_dict(), indent=2) + "\n")
+
+    def regressions(self, baseline: dict, threshold: float) -> list[str]:
+        """The metrics that got worse than in a baseline report.
+
+        threshold is the tolerated change as a fraction (0.2 = 20%).
+        Benchmarks and metrics missing from the baseline are not compared.
+        """
+        found = []
+        baseline_results = baseline.get("benchmarks", {})
+        for name, metrics in sorted(self.results.items()):
+            for metric, value in metrics.items():
+                base = baseline_results.get(name, {}).get(metric)
+                label = metric
+                if isinstance(value, dict) and isinstance(base, dict):
+                    value, base = value.get("p95"), base.get("p95")
+                    label = f"{metric}.p95"
+                    if value is None or base is None:
+                        continue
+                    if abs(value - base) < MIN_LATENCY_CHANGE_MS:
+                        continue
+                if not isinstance(value, int | float) or not base:
+                    continue
+                if metric.endswith(LOWER_IS_BETTER):
+                    worse = value > base * (1 + threshold)
+                elif metric.endswith(HIGHER_IS_BETTER):
+                    worse = value < base / (1 + threshold)
+                else:
+                    continue
+                if worse:
+                    found.append(f"{name}: {label} {base} -> {value}")
+        return found
@@ -0,0 +1,159 @@
+"""Benchmarks of the coordinator refresh and the live stream path."""
+
+import asyncio
+import time
+import tracemalloc
+
+import pytest
+
+from benchmarks.fake_hub import PROFILES, FakeHub
+from benchmarks.report import percentiles
+from custom_components.wellbeing.hubs import MAX_CONCURRENT_REQUESTS
+
+REFRESHES = 20
+STREAM_EVENTS = 500
+
+
+@pytest.mark.parametrize(
+    ("appliances_per_model", "latency", "error_rate"),
+    [(1, 0.0, 0.0), (10, 0.0, 0.0), (1, 0.005, 0.0), (1, 0.0, 0.05)],
+)
+async def test_refresh(
+    hass,
+    setup_fake_hub,
+    entity_writes,
+    bench_report,
+    appliances_per_model,
+    latency,
+    error_rate,
+):
+    """End-to-end refresh: polling, model building and entity state writes."""
+    hub = FakeHub(appliances_per_model=appliances_per_model, latency=latency)
+    coordinator = await setup_fake_hub(hub)
+    hub.error_rate = error_rate
+    entity_writes.clear()
+    requests = coordinator.accounting.requests_today()
+
+    samples = []
+    failures = 0
+    for _ in range(REFRESHES):
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        samples.append((time.perf_counter() - start) * 1000)
+        failures += not coordinator.last_update_success
+
+    requests = coordinator.accounting.requests_today() - requests
+    writes = entity_writes.total()
+
+    tracemalloc.start()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    bench_report.add(
+        f"refresh[{appliances_per_model}x{len(PROFILES)} appliances,"
+        f" latency={latency}, error_rate={error_rate}]",
+        appliances=len(hub.appliances),
+        entities=len(hass.states.async_all()),
+        refresh_ms=percentiles(samples),
+        failed_refreshes=failures,
+        requests_per_refresh=requests / REFRESHES,
+        entity_writes_per_refresh=writes / REFRESHES,
+        peak_memory_kib=peak // 1024,
+    )
+    if not error_rate:
+        assert failures == 0
+
+
+@pytest.mark.parametrize("accounts", [1, 4])
+async def test_concurrent_accounts(hass, setup_fake_hub, bench_report, accounts):
+    """Refreshes of several accounts at once, within the shared request limit."""
+    in_flight = peak = 0
+
+    def track(auth):
+        request = auth.request
+
+        async def tracked_request(method, path, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await request(method, path, **kwargs)
+            finally:
+                in_flight -= 1
+
+        auth.request = tracked_request
+
+    coordinators = []
+    for seed in range(accounts):
+        hub = FakeHub(appliances_per_model=2, latency=0.005, seed=seed)
+        track(hub.auth)
+        coordinators.append(await setup_fake_hub(hub))
+    peak = 0
+
+    samples = []
+    for _ in range(REFRESHES // 4):
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(coordinator.async_refresh() for coordinator in coordinators)
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+
+    bench_report.add(
+        f"concurrent_refresh[{accounts} accounts]",
+        accounts=accounts,
+        refresh_ms=percentiles(samples),
+        peak_requests_in_flight=peak,
+        refresh_phases_s=sorted(
+            round(coordinator.update_interval.total_seconds())
+            for coordinator in coordinators
+        ),
+    )
+    assert peak <= MAX_CONCURRENT_REQUESTS
+
+
+@pytest.mark.parametrize("appliances_per_model", [1, 10])
+async def test_stream_throughput(
+    hass, setup_fake_hub, entity_writes, bench_report, appliances_per_model
+):
+    """Live stream events through _listen_for_changes to the entity states."""
+    hub = FakeHub(appliances_per_model=appliances_per_model)
+    hub.stream_events = STREAM_EVENTS
+    started = asyncio.Event()
+
+    async def gated_stream():
+        await started.wait()
+        async for event in hub.synthetic_stream():
+            yield event
+
+    hub.stream_source = gated_stream
+    coordinator = await setup_fake_hub(hub, stream=True)
+
+    samples = []
+    handle_stream_event = coordinator._handle_stream_event
+
+    def timed_handle_stream_event(event):
+        start = time.perf_counter()
+        handle_stream_event(event)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    coordinator._handle_stream_event = timed_handle_stream_event
+    entity_writes.clear()
+
+    start = time.perf_counter()
+    started.set()
+    await asyncio.wait_for(hub.stream_done.wait(), 300)
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+
+    assert len(samples) == STREAM_EVENTS
+    bench_report.add(
+        f"stream[{appliances_per_model}x{len(PROFILES)} appliances]",
+        appliances=len(hub.appliances),
+        events=STREAM_EVENTS,
+        events_per_second=round(STREAM_EVENTS / elapsed),
+        event_ms=percentiles(samples),
+        entity_writes_per_event=entity_writes.total() / STREAM_EVENTS,
+    )
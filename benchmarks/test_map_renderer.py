@@ -0,0 +1,54 @@
+"""Benchmarks of the vacuum map rendering."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from benchmarks.map_corpus import GENERATED_CASES, measure_renders, recorded_cases
+from benchmarks.report import percentiles
+from custom_components.wellbeing.map_renderer import (
+    ROBOT_MARKER_CHARGER,
+    ROBOT_MARKER_NONE,
+    ROBOT_MARKER_POSE,
+)
+
+ROTATIONS = (0, 90, 45)
+ROBOT_MARKERS = (ROBOT_MARKER_NONE, ROBOT_MARKER_POSE, ROBOT_MARKER_CHARGER)
+
+
+def pytest_generate_tests(metafunc):
+    if "map_case" in metafunc.fixturenames:
+        cases = list(GENERATED_CASES)
+        if directory := metafunc.config.getoption("--map-fixtures"):
+            cases += recorded_cases(directory)
+        metafunc.parametrize("map_case", cases, ids=[case.name for case in cases])
+
+
+@pytest.mark.parametrize("robot_marker", ROBOT_MARKERS)
+@pytest.mark.parametrize("rotation", ROTATIONS)
+def test_render_map(bench_report, map_case, rotation, robot_marker):
+    """render_map on a corpus case, in a fresh process for its peak RSS."""
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        result = executor.submit(
+            measure_renders, map_case, float(rotation), robot_marker
+        ).result()
+
+    assert result["png_bytes"]
+    bench_report.add(
+        f"render_map[{map_case.name}, rotation={rotation}, robot={robot_marker}]",
+        crumbs=result["crumbs"],
+        uploads=result["uploads"],
+        decode_ms=result["decode_ms"],
+        reported_crumb_bytes=result["reported_crumb_bytes"],
+        decoded_crumb_bytes=result["decoded_crumb_bytes"],
+        archived_bytes=result["archived_bytes"],
+        size=f"{result['width']}x{result['height']}",
+        render_ms=percentiles(result["samples"]),
+        marker_change_ms=result["marker_change_ms"],
+        png_bytes=result["png_bytes"],
+        peak_rss_kib=result["peak_rss_kib"],
+        render_rss_kib=result["render_rss_kib"],
+    )
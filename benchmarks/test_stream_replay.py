@@ -0,0 +1,85 @@
+"""Benchmark of the live stream path on recorded traffic."""
+
+import time
+from pathlib import Path
+
+from benchmarks.fake_hub import FakeHub
+from benchmarks.replay import replay_hub
+from benchmarks.report import percentiles
+from custom_components.wellbeing.recorder import StreamRecorder
+
+SYNTHETIC_EVENTS = 500
+
+
+async def record_synthetic_stream(hass, path) -> None:
+    """Record a synthetic stream with the integration's recorder."""
+    hub = FakeHub()
+    hub.stream_events = SYNTHETIC_EVENTS
+    hub.stream_interval = 0.001
+    recorder = StreamRecorder(
+        hass,
+        str(path),
+        {
+            appliance_id: appliance.model
+            for appliance_id, appliance in hub.appliances.items()
+        },
+    )
+    async for event in hub.synthetic_stream():
+        recorder.record(event)
+    await recorder.async_stop()
+
+
+async def test_stream_replay(
+    hass, setup_fake_hub, entity_writes, bench_report, request, tmp_path
+):
+    """Replayed stream events through _listen_for_changes to the entity states."""
+    path = request.config.getoption("--stream-recording")
+    speed = request.config.getoption("--replay-speed")
+    if path is None:
+        path = tmp_path / "stream.jsonl.gz"
+        await record_synthetic_stream(hass, path)
+
+    hub, replay = replay_hub(str(path), speed)
+    started = hass.loop.create_future()
+
+    async def gated_replay():
+        await started
+        async for event in replay():
+            yield event
+
+    hub.stream_source = gated_replay
+    coordinator = await setup_fake_hub(hub, stream=True)
+
+    handled = []
+    handle_stream_event = coordinator._handle_stream_event
+
+    def timed_handle_stream_event(event):
+        start = time.perf_counter()
+        handle_stream_event(event)
+        handled.append((start, time.perf_counter()))
+
+    coordinator._handle_stream_event = timed_handle_stream_event
+    entity_writes.clear()
+
+    start = time.perf_counter()
+    started.set_result(None)
+    await hub.stream_done.wait()
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+
+    events = len(replay.events)
+    assert len(handled) == events
+    bench_report.add(
+        f"stream_replay[{Path(path).name}, speed={speed}]",
+        appliances=len(hub.appliances),
+        events=events,
+        events_per_second=round(events / elapsed),
+        event_ms=percentiles([(end - begin) * 1000 for begin, end in handled]),
+        lag_ms=percentiles(
+            [
+                (begin - due) * 1000
+                for (begin, _), due in zip(handled, replay.scheduled, strict=True)
+            ]
+        ),
+        entity_writes_per_event=entity_writes.total() / events,
+    )
@@ -5,31 +5,76 @@ For more details about this integration, please refer to
 https://github.com/JohNan/homeassistant-wellbeing
 """
 
+import asyncio
 import logging
-from datetime import timedelta
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
-from aiohttp import ClientResponseError
+import jwt
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_ACCESS_TOKEN, CONF_API_KEY, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_ACCESS_TOKEN,
+    CONF_API_KEY,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 from pyelectroluxgroup.api import ElectroluxHubAPI
 from pyelectroluxgroup.token_manager import TokenManager
 
-from .api import WellbeingApiClient
+from .api import (
+    Appliance,
+    Appliances,
+    WellbeingApiClient,
+    WorkMode,
+    _is_authentication_error,
+)
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_RECORD_STREAM,
     CONF_REFRESH_TOKEN,
+    CONF_REQUEST_BUDGET,
     CONF_SCAN_INTERVAL,
+    CONF_SESSION_ARCHIVE,
     CONF_STREAM,
+    DATA_HUBS,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_RECORD_STREAM,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SESSION_ARCHIVE,
     DEFAULT_STREAM,
     DOMAIN,
+    SWITCH_CAPABILITIES,
 )
+from .hubs import HubRegistry
+from .quota import RequestAccounting
+from .recorder import StreamRecorder
+from .scheduler import MIN_UPDATE_INTERVAL, AdaptiveScheduler
+from .services import async_setup_services
+from .session_archive import SessionArchive
+from .timing import Stage
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
-AUTH_ERROR_STATUSES = {401, 403}
+STREAM_BACKOFF_INITIAL = 5  # seconds
+STREAM_BACKOFF_MAX = 300  # seconds
+# Without a new connection attempt for this long, the stream is connected
+STREAM_CONNECT_GRACE = 30  # seconds, watch_appliances() retries after 10
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # seconds
+REQUESTS_SAVE_DELAY = 60  # seconds
+TOKEN_SAVE_DELAY = 30  # seconds
 PLATFORMS = [
     Platform.CAMERA,
     Platform.SENSOR,
@@ -39,6 +84,14 @@ PLATFORMS = [
     Platform.VACUUM,
     Platform.CLIMATE,
 ]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services and websocket commands of the integration."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
@@ -54,7 +107,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     # With the live stream enabled, polling is the slow path for full-state
     # refreshes - but the stream does not carry every property (e.g. the
     # vacuum map data only arrives via polling), so while a vacuum is active
-    # the coordinator polls at the base interval to follow the cleaning session.
+    # or the stream is down the coordinator polls at the base interval.
     use_stream = entry.options.get(CONF_STREAM, DEFAULT_STREAM)
     if use_stream:
         update_interval = timedelta(seconds=base_interval * 5)
@@ -62,6 +115,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         update_interval = timedelta(seconds=base_interval)
     active_update_interval = timedelta(seconds=base_interval)
 
+    scheduler = None
+    if entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING):
+        scheduler = AdaptiveScheduler(
+            base_interval=update_interval.total_seconds(),
+            active_interval=active_update_interval.total_seconds(),
+            request_budget=entry.options.get(CONF_REQUEST_BUDGET) or None,
+        )
+
     token_manager = WellBeingTokenManager(hass, entry)
     try:
         hub = ElectroluxHubAPI(
@@ -69,8 +130,24 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
     except Exception as exception:
         raise ConfigEntryAuthFailed("Failed to setup API") from exception
+    token_manager.attach(hub.auth)
+    # Tokens refreshed shortly before a restart must not be lost
+    entry.async_on_unload(token_manager.async_save)
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, token_manager.async_save)
+    )
 
+    accounting = RequestAccounting(
+        daily_budget=entry.options.get(CONF_DAILY_REQUEST_BUDGET) or None
+    )
+    requests_store = Store(hass, STORAGE_VERSION, _requests_storage_key(entry))
+    if requests := await requests_store.async_load():
+        accounting.restore(requests)
+    accounting.attach(hub.auth)
+    hubs: HubRegistry = hass.data[DOMAIN].setdefault(DATA_HUBS, HubRegistry())
+    entry.async_on_unload(hubs.register(entry.entry_id, hub))
     client = WellbeingApiClient(hub, use_stream=use_stream)
+    store = Store(hass, STORAGE_VERSION, _storage_key(entry))
 
     coordinator = WellbeingDataUpdateCoordinator(
         hass,
@@ -78,11 +155,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         update_interval=update_interval,
         config_entry=entry,
         active_update_interval=active_update_interval,
+        scheduler=scheduler,
+        accounting=accounting,
+        store=store,
+        hubs=hubs,
+        requests_store=requests_store,
     )
+    # The requests made since the last delayed save count after a reload too
+    entry.async_on_unload(coordinator.async_save_requests)
+
+    # Create the entities from the last known state right away and reconcile
+    # with the cloud in the background, rather than waiting for every
+    # appliance to be polled before Home Assistant can finish starting.
+    restored = False
+    if snapshot := await store.async_load():
+        try:
+            appliances = client.restore(snapshot)
+        except (KeyError, TypeError) as exception:
+            _LOGGER.warning("Ignoring invalid appliance snapshot: %s", exception)
+        else:
+            coordinator.async_set_updated_data(
+                {"appliances": appliances, "restored": True}
+            )
+            restored = True
 
-    await coordinator.async_config_entry_first_refresh()
+    if not restored:
+        await coordinator.async_config_entry_first_refresh()
 
     if use_stream:
+        if entry.options.get(CONF_RECORD_STREAM, DEFAULT_RECORD_STREAM):
+            appliances = coordinator.data["appliances"].appliances
+            coordinator.stream_recorder = StreamRecorder(
+                hass,
+                hass.config.path(f"{DOMAIN}_stream_{entry.entry_id}.jsonl.gz"),
+                {pnc_id: appliance.model for pnc_id, appliance in appliances.items()},
+            )
+            entry.async_on_unload(coordinator.stream_recorder.async_stop)
         entry.async_create_background_task(
             hass, coordinator._listen_for_changes(), "wellbeing_stream"
         )
@@ -91,21 +199,103 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         raise ConfigEntryNotReady from coordinator.last_exception
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    if not restored:
+        coordinator.setup_appliances = set(coordinator.data["appliances"].appliances)
+
+    # Only the platforms the appliances need are loaded: each platform module
+    # pulls in its Home Assistant component, and the camera Pillow as well
+    coordinator.platforms = _required_platforms(coordinator)
+    if Platform.CAMERA in coordinator.platforms:
+        coordinator.session_archive = SessionArchive(
+            hass,
+            entry.entry_id,
+            entry.options.get(CONF_SESSION_ARCHIVE, DEFAULT_SESSION_ARCHIVE),
+        )
+        await coordinator.session_archive.async_load()
+        entry.async_on_unload(coordinator.session_archive.async_close)
+    await hass.config_entries.async_forward_entry_setups(entry, coordinator.platforms)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if restored:
+        entry.async_create_background_task(
+            hass, _async_reconcile(hass, entry, coordinator), "wellbeing_reconcile"
+        )
 
     return True
 
 
+async def _async_reconcile(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: "WellbeingDataUpdateCoordinator",
+) -> None:
+    """Refresh a restored setup, reloading it if the appliances changed."""
+    restored_ids = set(coordinator.data["appliances"].appliances)
+    await coordinator.async_refresh()
+    if not coordinator.last_update_success:
+        return
+    if (
+        set(coordinator.data["appliances"].appliances) != restored_ids
+        or _required_platforms(coordinator) != coordinator.platforms
+    ):
+        _LOGGER.info("Appliances changed since the last start, reloading")
+        # Save right away, the reload must not restore the outdated snapshot
+        await coordinator.async_save_snapshot()
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+    else:
+        coordinator.setup_appliances = restored_ids
+
+
+def _required_platforms(
+    coordinator: "WellbeingDataUpdateCoordinator",
+) -> list[Platform]:
+    """The platforms that have entities for the appliances of the account."""
+    # The request accounting sensors of the account are always there
+    required = {Platform.SENSOR}
+    if coordinator.api.use_stream or coordinator.accounting.daily_budget:
+        required.add(Platform.BINARY_SENSOR)
+    for appliance in coordinator.data["appliances"].appliances.values():
+        required.update(entity.entity_type for entity in appliance.entities)
+        if any(appliance.has_capability(c) for c in SWITCH_CAPABILITIES):
+            required.add(Platform.SWITCH)
+    return [platform for platform in PLATFORMS if platform in required]
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        entry, coordinator.platforms
+    )
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored appliance snapshot and sessions with the config entry."""
+    await Store(hass, STORAGE_VERSION, _storage_key(entry)).async_remove()
+    await Store(hass, STORAGE_VERSION, _requests_storage_key(entry)).async_remove()
+    await SessionArchive(hass, entry.entry_id).async_remove()
+
+
+def _storage_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}"
+
+
+def _requests_storage_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.requests.{entry.entry_id}"
+
+
+@dataclass
+class StreamHealth:
+    """Health of the live stream connection."""
+
+    connected: bool = False
+    last_event: datetime | None = None
+    reconnects: int = 0
+
+
 class WellbeingDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
@@ -116,11 +306,31 @@ class WellbeingDataUpdateCoordinator(DataUpdateCoordinator):
         update_interval: timedelta,
         config_entry: ConfigEntry,
         active_update_interval: timedelta | None = None,
+        scheduler: AdaptiveScheduler | None = None,
+        accounting: RequestAccounting | None = None,
+        store: Store | None = None,
+        hubs: HubRegistry | None = None,
+        requests_store: Store | None = None,
     ) -> None:
         """Initialize."""
         self.api = client
+        self._scheduler = scheduler
+        self.accounting = accounting or RequestAccounting()
+        self.polling_throttled = False
+        self._store = store
+        self._requests_store = requests_store
+        self._hubs = hubs
+        self.platforms: list[Platform] = []
+        # The appliances the entities were set up for, None until set up
+        self.setup_appliances: set[str] | None = None
         self._idle_update_interval = update_interval
         self._active_update_interval = active_update_interval or update_interval
+        self.stream_health = StreamHealth()
+        self._stream_attempts = 0  # connection attempts of watch_appliances()
+        self._stream_resync = False  # whether events may have been missed
+        self._unsub_stream_connected: CALLBACK_TYPE | None = None
+        self.stream_recorder: StreamRecorder | None = None
+        self.session_archive: SessionArchive | None = None
         super().__init__(
             hass,
             _LOGGER,
@@ -131,22 +341,161 @@ class WellbeingDataUpdateCoordinator(DataUpdateCoordinator):
 
     async def _async_update_data(self):
         """Update data via library."""
-        try:
-            appliances = await self.api.async_get_appliances()
-            self.update_interval = (
-                self._active_update_interval
-                if self._has_active_vacuum(appliances)
-                else self._idle_update_interval
+        with self.api.timings.measure(Stage.REFRESH):
+            try:
+                polls = self.accounting.polls
+                if self._scheduler is not None:
+                    appliances = await self._async_update_adaptive(self._scheduler)
+                else:
+                    appliances = await self.api.async_get_appliances()
+                    self.update_interval = (
+                        self._active_update_interval
+                        if self._has_active_vacuum(appliances)
+                        or not self.stream_health.connected
+                        else self._idle_update_interval
+                    )
+                if self._hubs is not None:
+                    self.update_interval = self._hubs.staggered(
+                        self.config_entry.entry_id, self.update_interval
+                    )
+                if (
+                    self.data is None
+                    and not appliances.appliances
+                    and self.api.poll_failures
+                ):
+                    # Nothing to set the entry up with, retry it later
+                    raise UpdateFailed("No appliance could be polled")
+                self._retry_failed_polls_sooner()
+                self._throttle_polling(self.accounting.polls - polls)
+                if self._store is not None:
+                    self._store.async_delay_save(self.api.snapshot, SNAPSHOT_SAVE_DELAY)
+                await self._async_reload_if_appliances_added(appliances)
+                return {"appliances": appliances}
+            except UpdateFailed:
+                raise
+            except Exception as exception:
+                if _is_authentication_error(exception):
+                    raise ConfigEntryAuthFailed from exception
+                raise UpdateFailed(exception) from exception
+            finally:
+                if self._requests_store is not None:
+                    self._requests_store.async_delay_save(
+                        self.accounting.as_dict, REQUESTS_SAVE_DELAY
+                    )
+
+    async def _async_reload_if_appliances_added(self, appliances: Appliances) -> None:
+        """Reload the entry once appliances missing at setup can be built."""
+        # Entities and platforms are created at setup only, so an appliance
+        # whose first poll failed needs a reload to get its entities
+        if self.setup_appliances is None or set(appliances.appliances).issubset(
+            self.setup_appliances
+        ):
+            return
+        _LOGGER.info("Appliances could be polled for the first time, reloading")
+        self.setup_appliances = None
+        # Save right away, the reload must not restore the outdated snapshot
+        await self.async_save_snapshot()
+        self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+
+    async def _async_update_adaptive(self, scheduler: AdaptiveScheduler) -> Appliances:
+        """Poll only the appliances the adaptive scheduler considers due."""
+        idle_interval = (
+            self._idle_update_interval
+            if self.stream_health.connected
+            else self._active_update_interval
+        )
+        scheduler.base_interval = idle_interval.total_seconds()
+        now = time.monotonic()
+        polled: set[str] = set()
+
+        def should_update(appliance_id: str) -> bool:
+            if scheduler.is_due(appliance_id, now):
+                polled.add(appliance_id)
+                return True
+            return False
+
+        appliances = await self.api.async_get_appliances(should_update)
+
+        now = time.monotonic()
+        for appliance_id in self.api.poll_failures:
+            # Retried on their own backoff, not when the schedule says so
+            polled.discard(appliance_id)
+            scheduler.defer(appliance_id, now)
+        for appliance_id in polled:
+            # Unsupported appliances are learnt as never changing
+            appliance = appliances.get_appliance(appliance_id)
+            scheduler.observe(
+                appliance_id,
+                appliance.reported_state if appliance else {},
+                now,
+                streamed=(
+                    self.api.livestream_properties(appliance_id)
+                    if self.stream_health.connected
+                    else ()
+                ),
+                active=appliance is not None and self._is_active_vacuum(appliance),
+                off=getattr(appliance, "mode", None) == WorkMode.OFF,
+            )
+        self.update_interval = timedelta(seconds=scheduler.next_update_in(now))
+        return appliances
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, timing the fan-out."""
+        with self.api.timings.measure(Stage.FAN_OUT):
+            super().async_update_listeners()
+
+    def _retry_failed_polls_sooner(self) -> None:
+        """Refresh early when a failed appliance is due for a retry."""
+        retry_in = self.api.poll_retry_in(time.monotonic())
+        if retry_in is None:
+            return
+        retry_interval = timedelta(seconds=max(MIN_UPDATE_INTERVAL, retry_in))
+        if self.update_interval is None or retry_interval < self.update_interval:
+            self.update_interval = retry_interval
+
+    async def async_save_snapshot(self) -> None:
+        """Store the appliance snapshot now instead of after the save delay."""
+        if self._store is not None:
+            await self._store.async_save(self.api.snapshot())
+
+    async def async_save_requests(self) -> None:
+        """Store the request counts of the day now."""
+        if self._requests_store is not None:
+            await self._requests_store.async_save(self.accounting.as_dict())
+
+    def _throttle_polling(self, polls: int) -> None:
+        """Stretch the update interval to keep polling within the daily budget."""
+        min_interval = self.accounting.min_poll_interval(polls)
+        self.polling_throttled = (
+            min_interval is not None and min_interval > self.update_interval
+        )
+        if self.polling_throttled:
+            _LOGGER.debug(
+                "Daily request budget nearly spent, next refresh in %s", min_interval
             )
-            return {"appliances": appliances}
-        except Exception as exception:
-            if _is_authentication_error(exception):
-                raise ConfigEntryAuthFailed from exception
-            raise UpdateFailed(exception) from exception
+            self.update_interval = min_interval
 
-    @staticmethod
-    def _has_active_vacuum(appliances) -> bool:
+    @classmethod
+    def _has_active_vacuum(cls, appliances: Appliances) -> bool:
         """Whether any robot vacuum is currently on a cleaning session."""
+        return any(
+            cls._is_active_vacuum(appliance)
+            for appliance in appliances.appliances.values()
+        )
+
+    @staticmethod
+    def _is_active_vacuum(appliance: Appliance) -> bool:
+        """Whether the appliance is a robot vacuum on a cleaning session."""
+        vacuums = [
+            entity
+            for entity in appliance.entities
+            if entity.entity_type == Platform.VACUUM
+        ]
+        if not vacuums:
+            # Spares loading the vacuum platform on accounts without robots
+            return False
+
         from homeassistant.components.vacuum import VacuumActivity
 
         from .vacuum import (
@@ -158,41 +507,151 @@ class WellbeingDataUpdateCoordinator(DataUpdateCoordinator):
             VacuumActivity.RETURNING,
             VacuumActivity.PAUSED,
         }
-        return any(
-            VACUUM_ACTIVITIES.get(entity.state) in active
-            for appliance in appliances.appliances.values()
-            for entity in appliance.entities
-            if entity.entity_type == Platform.VACUUM
-        )
+        return any(VACUUM_ACTIVITIES.get(entity.state) in active for entity in vacuums)
 
     async def _listen_for_changes(self):
-        """Listen to live stream for changes."""
-        async for event in self.api._hub.watch_appliances():
-            appliance_id = event.get("applianceId")
-            property_name = event.get("property")
-            value = event.get("value")
-
-            if not appliance_id or not property_name:
-                continue
-
-            if self.api.update_appliance_state(
-                self.data["appliances"], appliance_id, property_name, value
-            ):
-                # Notify entities without async_set_updated_data: that would
-                # reset the polling schedule, and a steady trickle of stream
-                # events (e.g. battery updates) would then postpone polling
-                # indefinitely, freezing all properties that only arrive via
-                # polling (such as the vacuum map data).
-                self.async_update_listeners()
+        """Listen to the live stream for changes, reconnecting when it fails.
+
+        watch_appliances() does not tell when it has connected, and retries
+        failed connections internally, without ending. Every attempt of it
+        starts with getting the stream configuration, so those calls are
+        watched: the stream counts as connected once an attempt got the
+        configuration and no other attempt followed within
+        STREAM_CONNECT_GRACE, or once an event arrived, and a further
+        attempt means the connection was lost. When the generator ends or
+        raises, it is restarted here, with exponential backoff (with jitter,
+        so several entries do not reconnect in lockstep). Once connected
+        after a loss a full refresh follows, as events sent meanwhile are
+        lost.
+        """
+        hub = self.api._hub
+        stream_task = asyncio.current_task()
+        get_configurations = hub.async_get_livestream_configurations
+
+        async def watched_get_configurations():
+            if asyncio.current_task() is not stream_task:
+                return await get_configurations()
+            self._async_stream_connecting()
+            configurations = await get_configurations()
+            self._unsub_stream_connected = async_call_later(
+                self.hass, STREAM_CONNECT_GRACE, self._async_stream_grace_passed
+            )
+            return configurations
+
+        hub.async_get_livestream_configurations = watched_get_configurations
+        failures = 0
+        try:
+            while True:
+                self._stream_attempts = 0
+                try:
+                    async for event in hub.watch_appliances():
+                        if not self.stream_health.connected:
+                            self._async_stream_connected()
+                        if self.stream_recorder is not None:
+                            self.stream_recorder.record(event)
+                        self._handle_stream_event(event)
+                    _LOGGER.warning("Live stream ended, reconnecting")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exception:  # pylint: disable=broad-except
+                    _LOGGER.warning("Live stream failed, reconnecting: %s", exception)
+
+                if self.stream_health.connected:
+                    failures = 0
+                self._async_stream_disconnected()
+                delay = min(STREAM_BACKOFF_MAX, STREAM_BACKOFF_INITIAL * 2**failures)
+                failures += 1
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                self.stream_health.reconnects += 1
+        finally:
+            hub.async_get_livestream_configurations = get_configurations
+            self._cancel_stream_connected()
+
+    def _handle_stream_event(self, event: dict) -> None:
+        """Apply one live stream event to the appliance state."""
+        self.stream_health.last_event = dt_util.utcnow()
+        appliance_id = event.get("applianceId")
+        property_name = event.get("property")
+        value = event.get("value")
+
+        if not appliance_id or not property_name:
+            return
+
+        if self.api.update_appliance_state(
+            self.data["appliances"], appliance_id, property_name, value
+        ):
+            # Notify entities without async_set_updated_data: that would
+            # reset the polling schedule, and a steady trickle of stream
+            # events (e.g. battery updates) would then postpone polling
+            # indefinitely, freezing all properties that only arrive via
+            # polling (such as the vacuum map data).
+            self.async_update_listeners()
+
+    @callback
+    def _async_stream_connecting(self) -> None:
+        """watch_appliances() is making a connection attempt."""
+        self._stream_attempts += 1
+        if self._stream_attempts > 1:
+            # It lost the connection, or failed to connect
+            self.stream_health.reconnects += 1
+            self._async_stream_disconnected()
+        self._cancel_stream_connected()
+
+    @callback
+    def _async_stream_grace_passed(self, _now: datetime) -> None:
+        self._unsub_stream_connected = None
+        self._async_stream_connected()
+
+    @callback
+    def _cancel_stream_connected(self) -> None:
+        if self._unsub_stream_connected is not None:
+            self._unsub_stream_connected()
+            self._unsub_stream_connected = None
+
+    @callback
+    def _async_stream_connected(self) -> None:
+        self._cancel_stream_connected()
+        if self.stream_health.connected:
+            return
+        self.stream_health.connected = True
+        self.async_update_listeners()
+        if self._stream_resync:
+            self._stream_resync = False
+            # The next refresh also restores the slow polling interval
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_stream_disconnected(self) -> None:
+        self._stream_resync = True
+        self._cancel_stream_connected()
+        if not self.stream_health.connected:
+            return
+        self.stream_health.connected = False
+        self.async_update_listeners()
+        # Refreshing now also reschedules polling at the fallback interval
+        self.hass.async_create_task(self.async_request_refresh())
 
 
 class WellBeingTokenManager(TokenManager):
+    """Keeps the tokens in the config entry.
+
+    Refreshed tokens are written to the entry with a delay, coalescing
+    refreshes in quick succession into one write of the config entries, and
+    concurrent requests that find the access token expired share a single
+    refresh (see attach).
+    """
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         self._hass = hass
         self._entry = entry
+        self._unsub_save: CALLBACK_TYPE | None = None
+        self._refresh: asyncio.Task[str] | None = None
         api_key = entry.data.get(CONF_API_KEY)
         refresh_token = entry.data.get(CONF_REFRESH_TOKEN)
         access_token = entry.data.get(CONF_ACCESS_TOKEN)
+        # The tokens as last written to the entry, to tell whether they were
+        # replaced meanwhile (by a reauthentication)
+        self._saved = (access_token, refresh_token, api_key)
         super().__init__(access_token, refresh_token, api_key)
 
     def update(self, access_token: str, refresh_token: str, api_key: str | None = None):
@@ -202,14 +661,63 @@ class WellBeingTokenManager(TokenManager):
         _LOGGER.debug(f"Access token: {self._mask_access_token(access_token)}")
         _LOGGER.debug(f"Refresh token: {self._mask_access_token(refresh_token)}")
 
-        data = {
-            **self._entry.data,
-            CONF_API_KEY: self.api_key,
-            CONF_REFRESH_TOKEN: refresh_token,
-            CONF_ACCESS_TOKEN: access_token,
-        }
-        if data != self._entry.data:
-            self._hass.config_entries.async_update_entry(self._entry, data=data)
+        if self._unsub_save is None and self._tokens() != self._saved:
+            self._unsub_save = async_call_later(
+                self._hass, TOKEN_SAVE_DELAY, self.async_save
+            )
+
+    def attach(self, auth) -> None:
+        """Share one token refresh between the concurrent requests of the hub."""
+        get_access_token = auth.async_get_access_token
+
+        async def shared_get_access_token() -> str:
+            try:
+                if self.is_token_valid():
+                    return self.access_token
+            except jwt.PyJWTError as exception:
+                # Refreshed, as the hub does with a token it cannot decode
+                _LOGGER.debug("Access token is not a valid JWT: %s", exception)
+            # A lookup that refreshes the token is awaited by the requests
+            # made meanwhile, rather than each refreshing it again
+            if self._refresh is None or self._refresh.done():
+                self._refresh = self._hass.async_create_task(
+                    get_access_token(), "wellbeing_token_refresh"
+                )
+            # A cancelled request must not cancel the refresh of the others
+            return await asyncio.shield(self._refresh)
+
+        auth.async_get_access_token = shared_get_access_token
+
+    @callback
+    def async_save(self, *_) -> None:
+        """Write the current tokens to the config entry, if they changed."""
+        if self._unsub_save is not None:
+            self._unsub_save()
+            self._unsub_save = None
+        tokens = self._tokens()
+        if tokens == self._saved:
+            return
+        entry_tokens = (
+            self._entry.data.get(CONF_ACCESS_TOKEN),
+            self._entry.data.get(CONF_REFRESH_TOKEN),
+            self._entry.data.get(CONF_API_KEY),
+        )
+        if entry_tokens != self._saved:
+            _LOGGER.debug("Tokens of the entry were replaced, not saving")
+            return
+        access_token, refresh_token, api_key = self._saved = tokens
+        self._hass.config_entries.async_update_entry(
+            self._entry,
+            data={
+                **self._entry.data,
+                CONF_API_KEY: api_key,
+                CONF_REFRESH_TOKEN: refresh_token,
+                CONF_ACCESS_TOKEN: access_token,
+            },
+        )
+
+    def _tokens(self) -> tuple[str, str, str | None]:
+        return (self.access_token, self.refresh_token, self.api_key)
 
     @staticmethod
     def _mask_access_token(token: str):
@@ -221,20 +729,3 @@ class WellBeingTokenManager(TokenManager):
             return token[:2] + "*****" + token[-2:]
         else:
             return token[:5] + "*****" + token[-5:]
-
-
-def _is_authentication_error(exception: BaseException) -> bool:
-    """Return whether an exception chain contains an HTTP auth failure."""
-    seen: set[int] = set()
-    current: BaseException | None = exception
-
-    while current is not None and id(current) not in seen:
-        seen.add(id(current))
-        if (
-            isinstance(current, ClientResponseError)
-            and current.status in AUTH_ERROR_STATUSES
-        ):
-            return True
-        current = current.__cause__ or current.__context__
-
-    return False
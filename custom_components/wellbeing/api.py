@@ -3,9 +3,13 @@
 import asyncio
 import copy
 import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
 from enum import StrEnum
 
 import voluptuous as vol
+from aiohttp import ClientResponseError
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from homeassistant.components.vacuum import Segment
@@ -25,6 +29,9 @@ from homeassistant.helpers.typing import UNDEFINED
 from pyelectroluxgroup.api import ElectroluxHubAPI
 from pyelectroluxgroup.appliance import Appliance as ApiAppliance
 
+from .map_data import MapData
+from .timing import CacheStats, Stage, StageTimings
+
 FILTER_TYPE = {
     48: "BREEZE Complete air filter",
     49: "CLEAN Ultrafine particle filter",
@@ -89,6 +96,9 @@ FAN_SPEEDS_700SERIES = {
 
 WATER_PUMP_RATES_700SERIES = ["off", "low", "medium", "high"]
 
+AUTH_ERROR_STATUSES = {401, 403}
+POLL_RETRY_INITIAL = 30  # seconds, after the first failed poll of an appliance
+POLL_RETRY_MAX = 1800  # seconds
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -222,11 +232,14 @@ class ApplianceClimate(ApplianceEntity):
 class ApplianceCamera(ApplianceEntity):
     entity_type: int = Platform.CAMERA
 
-    def __init__(self, name, attr) -> None:
+    def __init__(self, name, attr, source_attr=None) -> None:
         super().__init__(name, attr)
+        if source_attr is not None:
+            self.source_attr = source_attr
 
     def setup(self, data):
-        self._state = data.get(self.source_attr, {})
+        # The MapData decoded by WellbeingApiClient
+        self._state = data.get(self.source_attr)
         return self
 
 
@@ -283,6 +296,7 @@ class ApplianceCleaningSessionSensor(ApplianceSensor):
 
 
 class Appliance:
+    stale: bool = False  # the last poll failed, the state is from before
     serialNumber: str
     brand: str
     device: str
@@ -290,6 +304,7 @@ class Appliance:
     mode: WorkMode
     entities: list
     capabilities: dict
+    readwrite_capabilities: list[str]
     model: Model
     reported_state: dict
 
@@ -459,6 +474,12 @@ class Appliance:
                 name="Map",
                 attr="mapData",
             ),
+            # How often each area was covered by the last cleaning sessions
+            ApplianceCamera(
+                name="Coverage",
+                attr="coverage",
+                source_attr="mapData",
+            ),
             # Only created for robots whose state reports cleaningSession
             ApplianceCleaningSessionSensor(
                 name="Cleaned Area",
@@ -680,11 +701,7 @@ class Appliance:
         )
 
     def has_capability(self, capability) -> bool:
-        capability_data = self.capabilities.get(capability)
-        return (
-            isinstance(capability_data, dict)
-            and capability_data.get("access") == "readwrite"
-        )
+        return capability in self.readwrite_capabilities
 
     def clear_mode(self):
         self.mode = WorkMode.UNDEFINED
@@ -693,6 +710,10 @@ class Appliance:
         self.mode = mode
 
     def setup(self, data, capabilities):
+        if isinstance(map_data := data.get("mapData"), dict):
+            # Decoded once per upload: data is the reported state kept by
+            # WellbeingApiClient, so the decoded form replaces it there
+            data["mapData"] = MapData.from_reported(map_data)
         self.reported_state = data
         self.firmware = ""
         if "FrmVer_NIU" in data:
@@ -716,7 +737,16 @@ class Appliance:
         if "vacuumMode" in data:
             self.vacuum_mode = data.get("vacuumMode")
 
-        self.capabilities = capabilities
+        # The capabilities are static per appliance (the same dict is passed
+        # on every poll and stream event), so the readwrite list exposed by
+        # every entity is only rebuilt when they actually change.
+        if capabilities is not getattr(self, "capabilities", None):
+            self.capabilities = capabilities
+            self.readwrite_capabilities = [
+                key
+                for key, value in capabilities.items()
+                if isinstance(value, dict) and value.get("access") == "readwrite"
+            ]
         self.entities = [
             entity.setup(data)
             for entity in Appliance._create_entities(data)
@@ -859,6 +889,15 @@ class Appliance:
                     self.eco_mode = FAN_SPEEDS_PUREI9.get(speed, self.eco_mode)
 
 
+@dataclass
+class PollFailure:
+    """Consecutive failed polls of an appliance."""
+
+    count: int
+    retry_at: float  # time.monotonic() of the next poll
+    error: str  # without the request URL, which contains the appliance id
+
+
 class Appliances:
     def __init__(self, appliances) -> None:
         self.appliances = appliances
@@ -875,92 +914,234 @@ class WellbeingApiClient:
         self._load_lock = asyncio.Lock()
         self._use_stream = use_stream
         self._livestream_properties: dict[str, list[str]] = {}
+        # Appliances that received a command since their last poll
+        self._pending_updates: set[str] = set()
+        # Appliances whose last poll failed; they keep their last good state
+        # and are retried with a backoff of their own
+        self.poll_failures: dict[str, PollFailure] = {}
+        # Appliances restored from a snapshot, until the list is fetched again
+        self._restored = False
+        self.timings = StageTimings()
+        # Hit rates of the caches: entity state writes skipped because the
+        # state did not change, map renders skipped for unchanged data, map
+        # geometry reused across view rotations, and map tiles served as
+        # drawn before
+        self.cache_stats = {
+            "entity_state": CacheStats(),
+            "map_render": CacheStats(),
+            "map_layers": CacheStats(),
+            "map_geometry": CacheStats(),
+            "map_tiles": CacheStats(),
+        }
+
+    @property
+    def use_stream(self) -> bool:
+        return self._use_stream
+
+    def livestream_properties(self, appliance_id: str) -> list[str]:
+        """The reported properties the live stream sends for an appliance."""
+        return self._livestream_properties.get(appliance_id, [])
 
     async def _ensure_loaded(self) -> None:
-        if self._api_appliances:
+        if self._api_appliances and not self._restored:
             return
         async with self._load_lock:
-            if self._api_appliances:
+            if self._api_appliances and not self._restored:
                 return
-            appliances: list[ApiAppliance] = await self._hub.async_get_appliances()
-            self._api_appliances = {appliance.id: appliance for appliance in appliances}
-
-            if self._use_stream:
-                try:
-                    livestream_configs = (
-                        await self._hub.async_get_livestream_configurations()
-                    )
-                    for appliance_config in livestream_configs.get("appliances", []):
-                        appliance_id = appliance_config.get("applianceId")
-                        properties = appliance_config.get("properties", [])
-                        if appliance_id and properties:
-                            self._livestream_properties[appliance_id] = properties
-                            _LOGGER.debug(
-                                f"Appliance {appliance_id} supports livestreaming for properties: {properties}"
-                            )
-                except Exception as e:
-                    _LOGGER.warning(f"Failed to fetch livestream configurations: {e}")
+            with self.timings.measure(Stage.LOAD):
+                await self._async_load()
+
+    async def _async_load(self) -> None:
+        appliances: list[ApiAppliance] = await self._hub.async_get_appliances()
+        # Restored appliances keep their info and last state, so that
+        # appliances that are not polled right away stay usable
+        restored = self._api_appliances
+        self._api_appliances = {}
+        for appliance in appliances:
+            if (known := restored.get(appliance.id)) is not None:
+                known.initial_data = appliance.initial_data
+                appliance = known
+            self._api_appliances[appliance.id] = appliance
+        self._restored = False
+
+        if self._use_stream:
+            try:
+                livestream_configs = (
+                    await self._hub.async_get_livestream_configurations()
+                )
+                for appliance_config in livestream_configs.get("appliances", []):
+                    appliance_id = appliance_config.get("applianceId")
+                    properties = appliance_config.get("properties", [])
+                    if appliance_id and properties:
+                        self._livestream_properties[appliance_id] = properties
+                        _LOGGER.debug(
+                            f"Appliance {appliance_id} supports livestreaming for properties: {properties}"
+                        )
+            except Exception as e:
+                _LOGGER.warning(f"Failed to fetch livestream configurations: {e}")
+
+    def snapshot(self) -> dict:
+        """The appliance list, capabilities and last state, to be stored."""
+        return {
+            "appliances": [
+                {
+                    "initial_data": appliance.initial_data,
+                    "info_data": appliance.info_data,
+                    "capabilities_data": appliance.capabilities_data,
+                    "state_data": _snapshot_form(appliance.state_data),
+                }
+                for appliance in self._api_appliances.values()
+                if appliance.info_data and appliance.state_data
+            ]
+        }
+
+    def restore(self, snapshot: dict) -> Appliances:
+        """Restore the appliances from a snapshot, without calling the API.
+
+        The appliance list is fetched again on the next update.
+        """
+        for data in snapshot.get("appliances", []):
+            appliance = ApiAppliance(data["initial_data"], self._hub.auth)
+            appliance.info_data = data["info_data"]
+            appliance.capabilities_data = data["capabilities_data"]
+            appliance.state_data = data["state_data"]
+            self._api_appliances[appliance.id] = appliance
+        self._restored = True
+        return self._build_appliances()
 
     def update_appliance_state(self, ha_appliances, appliance_id, property_name, value):
         appliance = self._api_appliances.get(appliance_id)
         if appliance is None:
             return False
 
-        if property_name in ["status", "connectionState"]:
-            appliance.state_data[property_name] = value
-        else:
-            if "properties" not in appliance.state_data:
-                appliance.state_data["properties"] = {}
-            if "reported" not in appliance.state_data["properties"]:
-                appliance.state_data["properties"]["reported"] = {}
-            appliance.state_data["properties"]["reported"][property_name] = value
-
-        _LOGGER.debug(
-            f"Live stream update for {appliance_id}: {property_name} = {value}"
-        )
+        with self.timings.measure(Stage.STREAM_UPDATE, appliance_id):
+            if property_name in ["status", "connectionState"]:
+                appliance.state_data[property_name] = value
+            else:
+                if "properties" not in appliance.state_data:
+                    appliance.state_data["properties"] = {}
+                if "reported" not in appliance.state_data["properties"]:
+                    appliance.state_data["properties"]["reported"] = {}
+                appliance.state_data["properties"]["reported"][property_name] = value
 
-        ha_appliance = ha_appliances.get_appliance(appliance_id)
-        if ha_appliance is not None:
-            data = appliance.state
-            data["status"] = appliance.state_data.get("status", "unknown")
-            data["connectionState"] = appliance.state_data.get(
-                "connectionState", "unknown"
+            _LOGGER.debug(
+                f"Live stream update for {appliance_id}: {property_name} = {value}"
             )
-            ha_appliance.setup(data, appliance.capabilities_data)
+
+            ha_appliance = ha_appliances.get_appliance(appliance_id)
+            if ha_appliance is not None:
+                data = appliance.state
+                data["status"] = appliance.state_data.get("status", "unknown")
+                data["connectionState"] = appliance.state_data.get(
+                    "connectionState", "unknown"
+                )
+                with self.timings.measure(Stage.SETUP, appliance_id):
+                    ha_appliance.setup(data, appliance.capabilities_data)
 
         return True
 
-    async def async_get_appliances(self) -> Appliances:
-        """Get data from the API."""
+    async def _async_update_appliance(self, appliance: ApiAppliance) -> None:
+        """Poll the state of one appliance."""
+        self._pending_updates.discard(appliance.id)
+        livestream_props = self._livestream_properties.get(appliance.id, [])
+        # Only restore livestream properties if the appliance is actually connected to the livestream
+        # The connection state is updated by the live stream itself
+        is_streaming = appliance.state_data.get("connectionState") == "Connected"
 
-        await self._ensure_loaded()
-        found_appliances = {}
-        for appliance in (appliance for appliance in self._api_appliances.values()):
-            livestream_props = self._livestream_properties.get(appliance.id, [])
-            # Only restore livestream properties if the appliance is actually connected to the livestream
-            # The connection state is updated by the live stream itself
-            is_streaming = appliance.state_data.get("connectionState") == "Connected"
-
-            if not livestream_props or not is_streaming:
-                await appliance.async_update()
-            else:
-                original_state = copy.deepcopy(appliance.state_data)
-                await appliance.async_update()
+        if not livestream_props or not is_streaming:
+            await appliance.async_update()
+            return
+
+        original_state = copy.deepcopy(appliance.state_data)
+        await appliance.async_update()
 
+        if (
+            "properties" in appliance.state_data
+            and "reported" in appliance.state_data["properties"]
+        ):
+            for prop in livestream_props:
                 if (
-                    "properties" in appliance.state_data
-                    and "reported" in appliance.state_data["properties"]
+                    "properties" in original_state
+                    and "reported" in original_state["properties"]
+                    and prop in original_state["properties"]["reported"]
                 ):
-                    for prop in livestream_props:
-                        if (
-                            "properties" in original_state
-                            and "reported" in original_state["properties"]
-                            and prop in original_state["properties"]["reported"]
-                        ):
-                            appliance.state_data["properties"]["reported"][prop] = (
-                                original_state["properties"]["reported"][prop]
-                            )
+                    appliance.state_data["properties"]["reported"][prop] = (
+                        original_state["properties"]["reported"][prop]
+                    )
+
+    async def async_get_appliances(
+        self, should_update: Callable[[str], bool] | None = None
+    ) -> Appliances:
+        """Get data from the API.
+
+        should_update selects the appliances to poll; the others are rebuilt
+        from their last known state. Appliances that were sent a command
+        since their last poll are always polled. A failed poll only affects
+        its appliance: it keeps its last known state, is marked stale and is
+        retried once its backoff expired. Authentication errors are raised.
+        """
+
+        await self._ensure_loaded()
+        now = time.monotonic()
+        for appliance in self._api_appliances.values():
+            if (failure := self.poll_failures.get(appliance.id)) is not None:
+                if now < failure.retry_at:
+                    continue
+            elif not (
+                should_update is None
+                or should_update(appliance.id)
+                or appliance.id in self._pending_updates
+                or not appliance.state_data
+            ):
+                continue
+            try:
+                with self.timings.measure(Stage.POLL, appliance.id):
+                    await self._async_update_appliance(appliance)
+            except Exception as exception:  # pylint: disable=broad-except
+                if _is_authentication_error(exception):
+                    raise
+                self._poll_failed(appliance.id, exception)
+            else:
+                if self.poll_failures.pop(appliance.id, None) is not None:
+                    _LOGGER.info("Polling appliance %s works again", appliance.id)
+
+        return self._build_appliances()
+
+    def _poll_failed(self, appliance_id: str, exception: Exception) -> None:
+        previous = self.poll_failures.get(appliance_id)
+        count = previous.count + 1 if previous else 1
+        delay = min(POLL_RETRY_MAX, POLL_RETRY_INITIAL * 2 ** (count - 1))
+        error = (
+            f"HTTP {exception.status}"
+            if isinstance(exception, ClientResponseError)
+            else type(exception).__name__
+        )
+        self.poll_failures[appliance_id] = PollFailure(
+            count, time.monotonic() + delay, error
+        )
+        if previous is None:
+            _LOGGER.warning(
+                "Polling appliance %s failed, keeping its last known state: %s",
+                appliance_id,
+                exception,
+            )
+        _LOGGER.debug(
+            "Poll %s of appliance %s failed, retrying in %s s",
+            count,
+            appliance_id,
+            delay,
+        )
 
+    def poll_retry_in(self, now: float) -> float | None:
+        """Seconds until the next retry of a failed appliance, if any."""
+        if not self.poll_failures:
+            return None
+        return min(failure.retry_at for failure in self.poll_failures.values()) - now
+
+    def _build_appliances(self) -> Appliances:
+        """Build the Home Assistant side model from the API appliances."""
+        found_appliances = {}
+        for appliance in self._api_appliances.values():
             model_name = appliance.type
             appliance_id = appliance.id
             appliance_name = appliance.name
@@ -977,6 +1158,10 @@ class WellbeingApiClient:
             ):
                 continue
 
+            if not appliance.state_data:
+                # Never polled successfully, there is no state to show yet
+                continue
+
             try:
                 app = Appliance(appliance_name, appliance_id, model_name)
             except ValueError:
@@ -990,6 +1175,7 @@ class WellbeingApiClient:
             app.brand = appliance.brand
             app.serialNumber = appliance.serial_number
             app.device = appliance.device_type
+            app.stale = appliance_id in self.poll_failures
 
             data = appliance.state
             data["status"] = appliance.state_data.get("status", "unknown")
@@ -997,12 +1183,19 @@ class WellbeingApiClient:
                 "connectionState", "unknown"
             )
 
-            app.setup(data, appliance.capabilities_data)
+            with self.timings.measure(Stage.SETUP, appliance_id):
+                app.setup(data, appliance.capabilities_data)
 
             found_appliances[app.pnc_id] = app
 
         return Appliances(found_appliances)
 
+    async def _send_command(self, appliance: ApiAppliance, data: dict):
+        """Send a command; the appliance is polled on the next update."""
+        self._pending_updates.add(appliance.id)
+        with self.timings.measure(Stage.COMMAND, appliance.id):
+            return await appliance.send_command(data)
+
     async def vacuum_start(self, pnc_id: str):
         """Start a vacuum cleaner."""
         appliance = self._api_appliances.get(pnc_id, None)
@@ -1021,7 +1214,7 @@ class WellbeingApiClient:
                 data = {"cleaningCommand": "startGlobalClean"}
             case Model.PUREi9.value:
                 data = {"CleaningCommand": "play"}
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Vacuum start command: {result}")
 
     async def vacuum_stop(self, pnc_id: str):
@@ -1042,7 +1235,7 @@ class WellbeingApiClient:
                 data = {"cleaningCommand": "stopClean"}
             case Model.PUREi9.value:
                 data = {"CleaningCommand": "stop"}
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Vacuum stop command: {result}")
 
     async def vacuum_pause(self, pnc_id: str):
@@ -1063,7 +1256,7 @@ class WellbeingApiClient:
                 data = {"cleaningCommand": "pauseClean"}
             case Model.PUREi9.value:
                 data = {"CleaningCommand": "pause"}
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Vacuum pause command: {result}")
 
     async def vacuum_return_to_base(self, pnc_id: str):
@@ -1084,7 +1277,7 @@ class WellbeingApiClient:
                 data = {"cleaningCommand": "startGoToCharger"}
             case Model.PUREi9.value:
                 data = {"CleaningCommand": "home"}
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Vacuum return to base command: {result}")
 
     async def vacuum_set_fan_speed(self, pnc_id: str, appliance, speed: str):
@@ -1106,7 +1299,7 @@ class WellbeingApiClient:
                     data = {"powerMode": FAN_SPEEDS_PUREI92.get(speed)}
                 if hasattr(appliance, "eco_mode"):
                     data = {"ecoMode": FAN_SPEEDS_PUREI9.get(speed)}
-        result = await api_appliance.send_command(data)
+        result = await self._send_command(api_appliance, data)
         _LOGGER.debug(f"Set Fan Speed command: {result}")
         appliance.vacuum_set_fan_speed(speed)
 
@@ -1185,7 +1378,7 @@ class WellbeingApiClient:
                         for segment_id in segment_ids
                     ],
                 }
-            result = await appliance.send_command(command_payload)
+            result = await self._send_command(appliance, command_payload)
             _LOGGER.debug(
                 f"Sent clean segments command with data: {command_payload}, result: {result}"
             )
@@ -1211,7 +1404,7 @@ class WellbeingApiClient:
             command_payload = {
                 "CustomPlay": {"persistentMapId": api_map.id, "zones": zones_payload}
             }
-            result = await appliance.send_command(command_payload)
+            result = await self._send_command(appliance, command_payload)
             _LOGGER.debug(
                 f"Sent clean segments command with data: {command_payload}, result: {result}"
             )
@@ -1298,7 +1491,7 @@ class WellbeingApiClient:
             room_playload["roomInfo"] = room_info
 
             # send command
-            result = await appliance.send_command(room_playload)
+            result = await self._send_command(appliance, room_playload)
             _LOGGER.debug(
                 f"Sent command '{command}' with data: {room_playload}, result: {result}"
             )
@@ -1341,7 +1534,7 @@ class WellbeingApiClient:
                 "CustomPlay": {"persistentMapId": api_map.id, "zones": zones_payload}
             }
             # Send the command to the appliance.
-            result = await appliance.send_command(command_payload)
+            result = await self._send_command(appliance, command_payload)
             _LOGGER.debug(
                 f"Sent command '{command}' with data: {command_payload}, result: {result}"
             )
@@ -1358,7 +1551,7 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to set fan speed for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set Fan Speed: {result}")
 
     async def set_work_mode(self, pnc_id: str, mode: WorkMode):
@@ -1368,7 +1561,7 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to set work mode for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set work mode: {result}")
 
     async def set_feature_state(self, pnc_id: str, feature: str, state: bool):
@@ -1382,7 +1575,7 @@ class WellbeingApiClient:
             )
             return
 
-        await appliance.send_command(data)
+        await self._send_command(appliance, data)
         _LOGGER.debug(f"Set {feature} State to {state}")
 
     async def ac_set_temperature(self, pnc_id: str, temp: float):
@@ -1394,7 +1587,7 @@ class WellbeingApiClient:
             )
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set AC temperature: {result}")
 
     async def ac_set_mode(self, pnc_id: str, mode: str):
@@ -1404,7 +1597,7 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to set AC mode for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set AC mode: {result}")
 
     async def ac_set_fan_mode(self, pnc_id: str, fan_mode: str):
@@ -1414,7 +1607,7 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to set AC fan mode for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set AC fan mode: {result}")
 
     async def ac_set_vertical_swing(self, pnc_id: str, state: str):
@@ -1426,7 +1619,7 @@ class WellbeingApiClient:
             )
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set AC vertical swing: {result}")
 
     async def ac_set_sleep_mode(self, pnc_id: str, state: str):
@@ -1436,7 +1629,7 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to set AC sleep mode for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Set AC sleep mode: {result}")
 
     async def ac_turn_on(self, pnc_id: str):
@@ -1446,7 +1639,7 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to turn on AC for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Turn on AC: {result}")
 
     async def ac_turn_off(self, pnc_id: str):
@@ -1456,5 +1649,55 @@ class WellbeingApiClient:
             _LOGGER.error(f"Failed to turn off AC for appliance with id {pnc_id}")
             return
 
-        result = await appliance.send_command(data)
+        result = await self._send_command(appliance, data)
         _LOGGER.debug(f"Turn off AC: {result}")
+
+
+def reported_form(state_data: dict) -> dict:
+    """The state of an appliance with its map data as reported, for JSON."""
+    reported = state_data.get("properties", {}).get("reported", {})
+    if not isinstance(map_data := reported.get("mapData"), MapData):
+        return state_data
+    return {
+        **state_data,
+        "properties": {
+            **state_data["properties"],
+            "reported": {**reported, "mapData": map_data.as_dict()},
+        },
+    }
+
+
+def _snapshot_form(state_data: dict) -> dict:
+    """The state of an appliance to be stored, without the map of the robot.
+
+    The map is by far the largest part of the state of a cleaning robot and
+    outdated by the next refresh; only its presence is kept, for the camera
+    to be set up.
+    """
+    reported = state_data.get("properties", {}).get("reported", {})
+    if "mapData" not in reported:
+        return state_data
+    return {
+        **state_data,
+        "properties": {
+            **state_data["properties"],
+            "reported": {**reported, "mapData": {}},
+        },
+    }
+
+
+def _is_authentication_error(exception: BaseException) -> bool:
+    """Return whether an exception chain contains an HTTP auth failure."""
+    seen: set[int] = set()
+    current: BaseException | None = exception
+
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if (
+            isinstance(current, ClientResponseError)
+            and current.status in AUTH_ERROR_STATUSES
+        ):
+            return True
+        current = current.__cause__ or current.__context__
+
+    return False
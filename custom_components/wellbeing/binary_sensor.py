@@ -1,10 +1,45 @@
 """Binary sensor platform for Wellbeing."""
 
-from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.const import Platform
+from collections.abc import Callable
+from dataclasses import dataclass
 
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.const import EntityCategory, Platform
+
+from . import WellbeingDataUpdateCoordinator
 from .const import DOMAIN
-from .entity import WellbeingEntity
+from .entity import WellbeingAccountEntity, WellbeingEntity
+
+
+@dataclass(frozen=True, kw_only=True)
+class WellbeingAccountBinarySensorDescription(BinarySensorEntityDescription):
+    """Describes a diagnostic binary sensor of the account."""
+
+    is_on_fn: Callable[[WellbeingDataUpdateCoordinator], bool]
+
+
+STREAM_BINARY_SENSORS = (
+    WellbeingAccountBinarySensorDescription(
+        key="stream_connected",
+        name="Live stream",
+        device_class=BinarySensorDeviceClass.CONNECTIVITY,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        is_on_fn=lambda coordinator: coordinator.stream_health.connected,
+    ),
+)
+
+QUOTA_BINARY_SENSORS = (
+    WellbeingAccountBinarySensorDescription(
+        key="polling_throttled",
+        name="Polling throttled",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        is_on_fn=lambda coordinator: coordinator.polling_throttled,
+    ),
+)
 
 
 async def async_setup_entry(hass, entry, async_add_devices):
@@ -24,6 +59,22 @@ async def async_setup_entry(hass, entry, async_add_devices):
                 ]
             )
 
+    if coordinator.accounting.daily_budget:
+        async_add_devices(
+            [
+                WellbeingAccountBinarySensor(coordinator, entry, description)
+                for description in QUOTA_BINARY_SENSORS
+            ]
+        )
+
+    if coordinator.api.use_stream:
+        async_add_devices(
+            [
+                WellbeingAccountBinarySensor(coordinator, entry, description)
+                for description in STREAM_BINARY_SENSORS
+            ]
+        )
+
 
 class WellbeingBinarySensor(WellbeingEntity, BinarySensorEntity):
     """wellbeing binary_sensor class."""
@@ -32,3 +83,14 @@ class WellbeingBinarySensor(WellbeingEntity, BinarySensorEntity):
     def is_on(self):
         """Return true if the binary_sensor is on."""
         return self.get_entity.state
+
+
+class WellbeingAccountBinarySensor(WellbeingAccountEntity, BinarySensorEntity):
+    """Diagnostic binary sensor of the account."""
+
+    entity_description: WellbeingAccountBinarySensorDescription
+
+    @property
+    def is_on(self) -> bool:
+        """Return true if the binary_sensor is on."""
+        return self.entity_description.is_on_fn(self.coordinator)
@@ -5,24 +5,48 @@ robot vacuums includes raw dynamic map data (see map_renderer). This platform
 renders that data into a camera entity, so the map can be shown in lovelace
 (e.g. with picture-entity or xiaomi-vacuum-map-card, which can also read the
 ``calibration_points`` attribute via ``calibration_source: camera: true``).
+A second camera shows the coverage of the last cleaning sessions (see
+coverage). Cards can also follow the map live over the websocket API (see
+websocket_api), or fetch the image only when it changed (see views).
 """
 
+import asyncio
+import dataclasses
 import logging
+from collections.abc import Callable, Hashable
 
+from aiohttp import web
 from homeassistant.components.camera import Camera
 from homeassistant.components.vacuum import VacuumActivity
 from homeassistant.const import Platform
+from homeassistant.core import CALLBACK_TYPE, callback
 
-from .const import CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION, DOMAIN
+from .const import (
+    CONF_MAP_ROTATION,
+    CONF_MAP_STREAM_FPS,
+    DEFAULT_MAP_ROTATION,
+    DEFAULT_MAP_STREAM_FPS,
+    DOMAIN,
+)
+from .coverage import SESSIONS
 from .entity import WellbeingEntity
+from .map_data import CrumbTrail, MapData
 from .map_renderer import (
     ROBOT_MARKER_CHARGER,
     ROBOT_MARKER_NONE,
     ROBOT_MARKER_POSE,
+    GeometryCache,
     MapImage,
-    render_map,
+    MapLayers,
+    composite_map,
+    map_pixel_budget,
+    render_layers,
 )
+from .map_tiles import CoverageTiles, MapTiles
+from .timing import Stage
 from .vacuum import VACUUM_ACTIVITIES
+from .views import async_register_views, async_stream_map
+from .websocket_api import crumbs_message, pose_message, session_message
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -39,9 +63,10 @@ async def async_setup_entry(hass, entry, async_add_devices):
     appliances = coordinator.data.get("appliances", None)
 
     if appliances is not None:
+        async_register_views(hass)
         async_add_devices(
             [
-                WellbeingCamera(
+                CAMERAS.get(entity.attr, WellbeingCamera)(
                     coordinator, entry, pnc_id, entity.entity_type, entity.attr
                 )
                 for pnc_id, appliance in appliances.appliances.items()
@@ -54,20 +79,32 @@ async def async_setup_entry(hass, entry, async_add_devices):
 class WellbeingCamera(WellbeingEntity, Camera):
     """Camera showing the robot vacuum map."""
 
-    _attr_content_type = "image/png"
-
     def __init__(self, coordinator, config_entry, pnc_id, entity_type, entity_attr):
         super().__init__(coordinator, config_entry, pnc_id, entity_type, entity_attr)
         Camera.__init__(self)
+        self.content_type = "image/png"  # Camera defaults to JPEG
         self._map_image: MapImage | None = None
         self._render_key = None
-        self._crumbs: list = []
+        # Held while rendering, so the image and its key are always set together
+        self._render_lock = asyncio.Lock()
+        self._rendered = asyncio.Event()  # set, and replaced, on every new image
+        # The map without the robot, kept for marker-only changes
+        self._layers: MapLayers | None = None
+        self._layers_key = None
+        self._geometry = GeometryCache(stats=self.api.cache_stats["map_geometry"])
+        self._crumbs = CrumbTrail()
         self._crumb_session = None
         self._crumb_timestamp = None
+        self._session_map: MapData | None = None  # last map of the session
+        self._session_stats: dict | None = None  # its cleaningSession
+        # Live map subscribers, and what they were sent last
+        self._map_subscribers: list[Callable[[dict], None]] = []
+        self._pushed: _PushedMap | None = None
+        self._tiles = MapTiles(self.api.cache_stats["map_tiles"], self._geometry)
 
     @property
-    def map_data(self) -> dict:
-        return self.get_entity.state or {}
+    def map_data(self) -> MapData:
+        return self.get_entity.state or MapData()
 
     def _robot_marker(self) -> str:
         """Where to draw the robot: at its pose (moving), on the charger (docked), or not at all.
@@ -100,67 +137,206 @@ class WellbeingCamera(WellbeingEntity, Camera):
             return ROBOT_MARKER_CHARGER
         return ROBOT_MARKER_NONE
 
-    def _map_session_is_current(self) -> bool:
-        """Whether the reported map data belongs to the running cleaning session."""
-        session = (
+    def _cleaning_session(self) -> dict:
+        return (
             getattr(self.get_appliance, "reported_state", {}).get("cleaningSession")
             or {}
         )
-        session_id = session.get("sessionId")
+
+    def _map_session_is_current(self) -> bool:
+        """Whether the reported map data belongs to the running cleaning session."""
+        session_id = self._cleaning_session().get("sessionId")
         if session_id is None:
             return True  # cannot tell; keep the previous behaviour
-        return self.map_data.get("sessionId") == session_id
+        return self.map_data.session_id == session_id
 
-    def _accumulated_crumbs(self, map_data: dict) -> list:
+    def _accumulated_crumbs(self, map_data: MapData) -> CrumbTrail:
         """Return the full crumb trail for the reported session.
 
         When a live map view is open in the Electrolux app, the robot
         switches to delta uploads (crumbCollectionDelta) where each state
         carries only the crumbs since the previous upload, so they have to
         be accumulated across updates. Non-delta uploads carry the full
-        trail and replace the accumulated state.
+        trail and replace the accumulated state. The trail of the previous
+        session is archived when the next one starts.
         """
-        session_id = map_data.get("sessionId")
+        session_id = map_data.session_id
         if session_id != self._crumb_session:
+            self._archive_session()
             self._crumb_session = session_id
             self._crumb_timestamp = None
-            self._crumbs = []
-        timestamp = map_data.get("timestamp")
+            self._crumbs = CrumbTrail()
+            self._session_stats = None
+        self._session_map = map_data
+        stats = self._cleaning_session()
+        if session_id is not None and stats.get("sessionId") == session_id:
+            self._session_stats = stats
+        timestamp = map_data.timestamp
         if timestamp != self._crumb_timestamp:
             self._crumb_timestamp = timestamp
-            crumbs = map_data.get("crumbs") or []
-            if map_data.get("crumbCollectionDelta"):
-                self._crumbs = self._crumbs + crumbs
+            if map_data.delta:
+                self._crumbs = self._crumbs + map_data.crumbs
             else:
-                self._crumbs = crumbs
+                self._crumbs = map_data.crumbs
         return self._crumbs
 
+    def _archive_session(self) -> None:
+        """Hand the trail of the finished session over to the archive."""
+        archive = self.coordinator.session_archive
+        if archive is None or self._crumb_session is None or not self._crumbs:
+            return
+        self.hass.async_create_task(
+            archive.async_add(
+                self.pnc_id,
+                dataclasses.replace(
+                    self._session_map, crumbs=self._crumbs, delta=False
+                ),
+                self._session_stats,
+            ),
+            "wellbeing_archive_session",
+        )
+
     async def _async_render_if_changed(self) -> None:
-        """(Re)render the map when the underlying map data has changed."""
+        """(Re)render the map when the underlying map data has changed.
+
+        When only the robot marker changed, it is drawn onto the base layer
+        of the last render rather than drawing the whole map again. Callers
+        arriving during a render wait for it rather than seeing the key of
+        the new image before the image itself.
+        """
+        async with self._render_lock:
+            await self._async_render()
+
+    async def _async_render(self) -> None:
         map_data = self.map_data
         crumbs = self._accumulated_crumbs(map_data)
         robot_marker = self._robot_marker()
         rotation = self.config_entry.options.get(
             CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
         )
-        render_key = (
-            map_data.get("timestamp"),
-            map_data.get("sessionId"),
+        max_pixels = map_pixel_budget(self.config_entry.options)
+        layers_key = (
+            map_data.timestamp,
+            map_data.session_id,
             len(crumbs),
-            robot_marker,
             rotation,
+            max_pixels,
         )
-        if render_key == self._render_key:
+        render_key = (layers_key, robot_marker)
+        unchanged = render_key == self._render_key
+        self.api.cache_stats["map_render"].record(unchanged)
+        if unchanged:
             return
-        map_image = await self.hass.async_add_executor_job(
-            render_map,
-            {"mapData": {**map_data, "crumbs": crumbs}},
-            float(rotation),
-            robot_marker,
-        )
-        self._render_key = render_key
-        if map_image:
+        render_seconds = 0.0
+        layers_unchanged = layers_key == self._layers_key
+        self.api.cache_stats["map_layers"].record(layers_unchanged)
+        if not layers_unchanged:
+            self._layers = await self.hass.async_add_executor_job(
+                render_layers,
+                dataclasses.replace(map_data, crumbs=crumbs),
+                float(rotation),
+                max_pixels,
+                self._geometry,
+            )
+            self._layers_key = layers_key
+            if self._layers:
+                render_seconds = self._layers.render_seconds
+        if self._layers:
+            map_image = await self.hass.async_add_executor_job(
+                composite_map, self._layers, robot_marker
+            )
             self._map_image = map_image
+            self._rendered.set()
+            self._rendered = asyncio.Event()
+            timings = self.api.timings
+            timings.add(
+                Stage.RENDER_MAP,
+                render_seconds + map_image.render_seconds,
+                self.pnc_id,
+            )
+            timings.add(Stage.ENCODE_MAP, map_image.encode_seconds, self.pnc_id)
+        self._render_key = render_key
+        await self._async_push_map(
+            dataclasses.replace(map_data, crumbs=crumbs), robot_marker
+        )
+
+    @callback
+    def async_subscribe_map(self, send: Callable[[dict], None]) -> CALLBACK_TYPE:
+        """Send the live map updates to send, starting with the whole session."""
+        task = self.hass.async_create_task(self._async_send_session(send))
+
+        @callback
+        def unsubscribe() -> None:
+            task.cancel()
+            if send in self._map_subscribers:
+                self._map_subscribers.remove(send)
+
+        return unsubscribe
+
+    async def _async_send_session(self, send: Callable[[dict], None]) -> None:
+        """Send the whole session to a new subscriber, then add it."""
+        # Under the render lock no push can happen between building the
+        # session message and adding the subscriber, which would leave the
+        # subscriber without the crumbs of that push
+        async with self._render_lock:
+            await self._async_render()
+            map_data = dataclasses.replace(self._session_map, crumbs=self._crumbs)
+            robot_marker = self._robot_marker()
+            calibration_points = (
+                self._map_image.calibration_points if self._map_image else []
+            )
+            message = await self.hass.async_add_executor_job(
+                session_message,
+                map_data,
+                robot_marker,
+                calibration_points,
+                self._geometry,
+            )
+            if not self._map_subscribers:
+                self._pushed = _PushedMap.of(
+                    map_data, pose_message(map_data, robot_marker), calibration_points
+                )
+            self._map_subscribers.append(send)
+            send(message)
+
+    async def _async_push_map(self, map_data: MapData, robot_marker: str) -> None:
+        """Send the live map subscribers what changed since the last push."""
+        if not self._map_subscribers:
+            self._pushed = None
+            return
+        pushed = self._pushed
+        pose = pose_message(map_data, robot_marker)
+        calibration_points = (
+            self._map_image.calibration_points if self._map_image else []
+        )
+        if pushed is None or not pushed.extended_by(map_data):
+            messages = [
+                await self.hass.async_add_executor_job(
+                    session_message,
+                    map_data,
+                    robot_marker,
+                    calibration_points,
+                    self._geometry,
+                )
+            ]
+        else:
+            messages = []
+            if len(map_data.crumbs) > pushed.crumbs:
+                messages.append(
+                    await self.hass.async_add_executor_job(
+                        crumbs_message, map_data, pushed.crumbs
+                    )
+                )
+            if pose != pushed.pose:
+                messages.append(pose)
+            if calibration_points != pushed.calibration_points:
+                messages.append(
+                    {"type": "calibration", "calibration_points": calibration_points}
+                )
+        self._pushed = _PushedMap.of(map_data, pose, calibration_points)
+        for send in list(self._map_subscribers):
+            for message in messages:
+                send(message)
 
     async def async_added_to_hass(self) -> None:
         """Render once on startup so the image and attributes are available."""
@@ -173,7 +349,7 @@ class WellbeingCamera(WellbeingEntity, Camera):
 
     async def _async_render_and_write_state(self) -> None:
         await self._async_render_if_changed()
-        self.async_write_ha_state()
+        self._async_write_ha_state_if_changed()
 
     async def async_camera_image(
         self, width: int | None = None, height: int | None = None
@@ -182,12 +358,173 @@ class WellbeingCamera(WellbeingEntity, Camera):
         await self._async_render_if_changed()
         return self._map_image.image if self._map_image else None
 
+    async def async_map_image(self) -> tuple[MapImage | None, Hashable]:
+        """The rendered image, with the key of what it was rendered from."""
+        await self._async_render_if_changed()
+        return self._map_image, self._render_key
+
+    async def async_map_tiles(self) -> MapTiles:
+        """The tile pyramid of the map, following the rendered map data."""
+        await self._async_render_if_changed()
+        map_data = self._session_map or MapData()
+        rotation = self.config_entry.options.get(
+            CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
+        )
+        await self.hass.async_add_executor_job(
+            self._tiles.update,
+            dataclasses.replace(map_data, crumbs=self._crumbs),
+            float(rotation),
+        )
+        return self._tiles
+
+    @property
+    def next_render(self) -> asyncio.Event:
+        """An event that is set when the next image has been rendered."""
+        return self._rendered
+
+    async def handle_async_mjpeg_stream(
+        self, request: web.Request
+    ) -> web.StreamResponse:
+        """Stream the map, with a new frame whenever it was rendered again."""
+        max_fps = self.config_entry.options.get(
+            CONF_MAP_STREAM_FPS, DEFAULT_MAP_STREAM_FPS
+        )
+        return await async_stream_map(request, self, max_fps)
+
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
         attributes = super().extra_state_attributes
         if self._map_image:
             attributes["calibration_points"] = self._map_image.calibration_points
-        if timestamp := self.map_data.get("timestamp"):
+        if timestamp := self.map_data.timestamp:
             attributes["map_timestamp"] = timestamp
         return attributes
+
+
+@dataclasses.dataclass
+class _PushedMap:
+    """The map as last sent to the live map subscribers of a camera."""
+
+    session_id: str | None
+    crumbs: int
+    last_crumb: tuple | None
+    pose: dict
+    calibration_points: list[dict]
+
+    @classmethod
+    def of(cls, map_data: MapData, pose: dict, calibration_points: list[dict]):
+        crumbs = map_data.crumbs
+        return cls(
+            map_data.session_id,
+            len(crumbs),
+            _crumb(crumbs, len(crumbs) - 1) if crumbs else None,
+            pose,
+            calibration_points,
+        )
+
+    def extended_by(self, map_data: MapData) -> bool:
+        """Whether the trail of the map data starts with the one sent."""
+        crumbs = map_data.crumbs
+        return (
+            map_data.session_id == self.session_id
+            and len(crumbs) >= self.crumbs
+            and (not self.crumbs or _crumb(crumbs, self.crumbs - 1) == self.last_crumb)
+        )
+
+
+def _crumb(crumbs: CrumbTrail, index: int) -> tuple:
+    return (crumbs.x[index], crumbs.y[index], crumbs.frame[index])
+
+
+class WellbeingCoverageCamera(WellbeingEntity, Camera):
+    """Camera showing how often each area was cleaned in the last sessions.
+
+    The heatmap is rendered from the CoverageGrid of the robot, which the
+    session archive updates when a cleaning session has finished.
+    """
+
+    def __init__(self, coordinator, config_entry, pnc_id, entity_type, entity_attr):
+        super().__init__(coordinator, config_entry, pnc_id, entity_type, entity_attr)
+        Camera.__init__(self)
+        self.content_type = "image/png"  # Camera defaults to JPEG
+        self._map_image: MapImage | None = None
+        self._render_key = None
+        self._sessions = 0
+        self._tiles = CoverageTiles(self.api.cache_stats["map_tiles"])
+
+    async def _async_render_if_changed(self) -> None:
+        """(Re)render the heatmap when a session was added to the grid."""
+        archive = self.coordinator.session_archive
+        if archive is None:
+            return
+        grid = await archive.async_coverage(self.pnc_id)
+        rotation = self.config_entry.options.get(
+            CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
+        )
+        max_pixels = map_pixel_budget(self.config_entry.options)
+        render_key = (grid.sessions, rotation, max_pixels)
+        unchanged = render_key == self._render_key
+        self.api.cache_stats["map_render"].record(unchanged)
+        if unchanged:
+            return
+        map_image = await self.hass.async_add_executor_job(
+            grid.render, float(rotation), max_pixels
+        )
+        self._render_key = render_key
+        self._sessions = min(grid.sessions, SESSIONS)
+        if map_image:
+            self._map_image = map_image
+            timings = self.api.timings
+            timings.add(Stage.RENDER_MAP, map_image.render_seconds, self.pnc_id)
+            timings.add(Stage.ENCODE_MAP, map_image.encode_seconds, self.pnc_id)
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        await self._async_render_if_changed()
+
+    def _handle_coordinator_update(self) -> None:
+        self.hass.async_create_task(self._async_render_and_write_state())
+
+    async def _async_render_and_write_state(self) -> None:
+        await self._async_render_if_changed()
+        self._async_write_ha_state_if_changed()
+
+    async def async_camera_image(
+        self, width: int | None = None, height: int | None = None
+    ) -> bytes | None:
+        """Return the rendered heatmap."""
+        await self._async_render_if_changed()
+        return self._map_image.image if self._map_image else None
+
+    async def async_map_image(self) -> tuple[MapImage | None, Hashable]:
+        """The rendered image, with the key of what it was rendered from."""
+        await self._async_render_if_changed()
+        return self._map_image, self._render_key
+
+    async def async_map_tiles(self) -> CoverageTiles | None:
+        """The tile pyramid of the heatmap, None without a session archive."""
+        archive = self.coordinator.session_archive
+        if archive is None:
+            return None
+        grid = await archive.async_coverage(self.pnc_id)
+        rotation = self.config_entry.options.get(
+            CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
+        )
+        await self.hass.async_add_executor_job(
+            self._tiles.update, grid, float(rotation)
+        )
+        return self._tiles
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        attributes = super().extra_state_attributes
+        if self._map_image:
+            attributes["calibration_points"] = self._map_image.calibration_points
+        attributes["sessions"] = self._sessions
+        return attributes
+
+
+# Camera entity class by appliance entity attr; the map by default
+CAMERAS = {"coverage": WellbeingCoverageCamera}
@@ -16,12 +16,26 @@ from pyelectroluxgroup.token_manager import TokenManager
 
 from . import CONF_REFRESH_TOKEN
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_DAILY_REQUEST_BUDGET,
+    CONF_MAP_PIXEL_BUDGET,
     CONF_MAP_ROTATION,
+    CONF_MAP_STREAM_FPS,
+    CONF_RECORD_STREAM,
+    CONF_REQUEST_BUDGET,
     CONF_SCAN_INTERVAL,
+    CONF_SESSION_ARCHIVE,
     CONF_STREAM,
     CONFIG_FLOW_TITLE,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_DAILY_REQUEST_BUDGET,
+    DEFAULT_MAP_PIXEL_BUDGET,
     DEFAULT_MAP_ROTATION,
+    DEFAULT_MAP_STREAM_FPS,
+    DEFAULT_RECORD_STREAM,
+    DEFAULT_REQUEST_BUDGET,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SESSION_ARCHIVE,
     DEFAULT_STREAM,
     DOMAIN,
 )
@@ -206,6 +220,48 @@ class WellbeingOptionsFlowHandler(config_entries.OptionsFlowWithReload):
                             CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
                         ),
                     ): vol.All(vol.Coerce(int), vol.Range(min=0, max=359)),
+                    vol.Optional(
+                        CONF_ADAPTIVE_POLLING,
+                        default=self.config_entry.options.get(
+                            CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_REQUEST_BUDGET,
+                        default=self.config_entry.options.get(
+                            CONF_REQUEST_BUDGET, DEFAULT_REQUEST_BUDGET
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_DAILY_REQUEST_BUDGET,
+                        default=self.config_entry.options.get(
+                            CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_RECORD_STREAM,
+                        default=self.config_entry.options.get(
+                            CONF_RECORD_STREAM, DEFAULT_RECORD_STREAM
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_SESSION_ARCHIVE,
+                        default=self.config_entry.options.get(
+                            CONF_SESSION_ARCHIVE, DEFAULT_SESSION_ARCHIVE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+                    vol.Optional(
+                        CONF_MAP_STREAM_FPS,
+                        default=self.config_entry.options.get(
+                            CONF_MAP_STREAM_FPS, DEFAULT_MAP_STREAM_FPS
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=10)),
+                    vol.Optional(
+                        CONF_MAP_PIXEL_BUDGET,
+                        default=self.config_entry.options.get(
+                            CONF_MAP_PIXEL_BUDGET, DEFAULT_MAP_PIXEL_BUDGET
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=16)),
                 }
             ),
         )
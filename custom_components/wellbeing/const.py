@@ -4,6 +4,8 @@
 CONFIG_FLOW_TITLE = "Electrolux Wellbeing"
 NAME = "Wellbeing"
 DOMAIN = "wellbeing"
+DATA_HUBS = "hubs"  # the HubRegistry, next to the coordinators of the entries
+DATA_VIEWS = "views"  # whether the HTTP views are registered
 # Icons
 ICON = "mdi:format-quote-close"
 
@@ -13,9 +15,26 @@ CONF_SCAN_INTERVAL = "scan_interval"
 CONF_REFRESH_TOKEN = "refresh_token"
 CONF_STREAM = "stream"
 CONF_MAP_ROTATION = "map_rotation"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_REQUEST_BUDGET = "request_budget"
+CONF_DAILY_REQUEST_BUDGET = "daily_request_budget"
+CONF_RECORD_STREAM = "record_stream"
+CONF_SESSION_ARCHIVE = "session_archive"
+CONF_MAP_STREAM_FPS = "map_stream_fps"
+CONF_MAP_PIXEL_BUDGET = "map_pixel_budget"
+
+# Features of air purifiers exposed as switches
+SWITCH_CAPABILITIES = ("Ionizer", "UILight", "SafetyLock")
 
 # Defaults
 DEFAULT_NAME = DOMAIN
 DEFAULT_SCAN_INTERVAL = 60
 DEFAULT_STREAM = False
 DEFAULT_MAP_ROTATION = 0
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_REQUEST_BUDGET = 0  # polls per hour, 0 = unlimited
+DEFAULT_DAILY_REQUEST_BUDGET = 0  # API requests per day, 0 = unlimited
+DEFAULT_RECORD_STREAM = False
+DEFAULT_SESSION_ARCHIVE = 20  # cleaning sessions per robot, 0 = none
+DEFAULT_MAP_STREAM_FPS = 1.0  # frames per second of the map stream, at most
+DEFAULT_MAP_PIXEL_BUDGET = 2.0  # megapixels per map image, at most
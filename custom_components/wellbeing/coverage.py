@@ -0,0 +1,239 @@
+"""Coverage heatmap of the cleaning sessions of a robot vacuum.
+
+A CoverageGrid counts, per 5 cm cell of the persistent map frame, in how
+many of the last SESSIONS cleaning sessions the swath of the robot covered
+the cell. It is a file of fixed size, memory-mapped: a 32-bit word per cell
+with one bit per session slot, and a byte per cell with the number of bits
+set. Adding a finished session clears the bits of the slot it reuses and
+sets those of its own swath; rendering only reads the counts. Neither reads
+the archived sessions, and the memory used does not grow with the history.
+
+The file is in the byte order of the machine; a grid that does not match
+the expected layout is started over.
+
+All methods are synchronous and touch the file; call them from an executor.
+"""
+
+import io
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .map_data import MapData
+from .map_renderer import (
+    BACKGROUND,
+    MAX_PIXELS,
+    PADDING_M,
+    ROBOT_WIDTH_M,
+    SWATH,
+    MapImage,
+    _rotate,
+    crumb_runs,
+    draw_swath,
+)
+
+CELL_M = 0.05
+GRID_CELLS = 800  # per side: 40 m, centred on the origin of the map frame
+SESSIONS = 32  # one bit per session in the word of a cell
+PX_PER_CELL = 4  # at most, see render
+HOT = (250, 204, 21)  # cells covered in every session
+
+_MAGIC = b"WBCG"
+_VERSION = 1
+# Magic, version, cells per side, sessions added, id of the last session
+_HEADER = struct.Struct("<4sBxHI64s")
+_HEADER_BYTES = 128  # keeps the planes aligned
+_CELLS = GRID_CELLS * GRID_CELLS
+_SIZE = _HEADER_BYTES + _CELLS * 4 + _CELLS
+
+
+class CoverageGrid:
+    """The coverage of the last SESSIONS cleaning sessions of a robot."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        exists = os.path.exists(path) and os.path.getsize(path) == _SIZE
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(_SIZE)  # sparse, zero cells
+        self._mmap = mmap.mmap(self._file.fileno(), _SIZE)
+        magic, version, cells, sessions, last_session = _HEADER.unpack_from(self._mmap)
+        valid = (magic, version, cells) == (_MAGIC, _VERSION, GRID_CELLS)
+        if not valid:
+            self._mmap[:] = bytes(_SIZE)
+            sessions, last_session = 0, b""
+        self.sessions = sessions
+        self._last_session = last_session.rstrip(b"\0")
+        if not valid:
+            self._write_header()
+        self._view = memoryview(self._mmap)
+        self._bits = self._view[_HEADER_BYTES : _HEADER_BYTES + _CELLS * 4].cast("I")
+        self._counts = self._view[_HEADER_BYTES + _CELLS * 4 :]
+
+    def close(self) -> None:
+        with self._lock:
+            for view in (self._bits, self._counts, self._view):
+                view.release()
+            self._mmap.close()
+            self._file.close()
+
+    def add(self, map_data: MapData) -> bool:
+        """Add the swath of a finished session; False if it was the last added."""
+        session_id = (map_data.session_id or "").encode()[:64]
+        covered = _covered_cells(map_data)
+        with self._lock:
+            if session_id and session_id == self._last_session:
+                return False
+            bits, counts = self._bits, self._counts
+            bit = 1 << self.sessions % SESSIONS
+            if self.sessions >= SESSIONS:
+                # The slot held the oldest session of the grid
+                for index, count in enumerate(counts):
+                    if count and bits[index] & bit:
+                        bits[index] ^= bit
+                        counts[index] = count - 1
+            for index in covered:
+                if not bits[index] & bit:
+                    bits[index] |= bit
+                    counts[index] += 1
+            self.sessions += 1
+            self._last_session = session_id
+            self._write_header()
+            self._mmap.flush()
+        return True
+
+    def render(
+        self, rotation_deg: float = 0.0, max_pixels: int = MAX_PIXELS
+    ) -> MapImage | None:
+        """Render the cells by their count, None before the first session.
+
+        Cells are drawn PX_PER_CELL wide, or narrower to fit max_pixels
+        (before the rotation).
+        """
+        from PIL import Image
+
+        start = time.perf_counter()
+        image = self.heatmap()
+        bbox = image.getbbox()
+        if bbox is None:
+            return None
+        padding = round(PADDING_M / CELL_M)
+        left, top = max(0, bbox[0] - padding), max(0, bbox[1] - padding)
+        right = min(GRID_CELLS, bbox[2] + padding)
+        bottom = min(GRID_CELLS, bbox[3] + padding)
+        image = image.crop((left, top, right, bottom))
+        px_per_cell = min(
+            PX_PER_CELL, math.sqrt(max_pixels / (image.width * image.height))
+        )
+        image = image.resize(
+            (
+                max(1, round(image.width * px_per_cell)),
+                max(1, round(image.height * px_per_cell)),
+            ),
+            Image.NEAREST,
+        )
+        if rotation_deg:
+            image = image.rotate(rotation_deg, expand=True, fillcolor=0)
+        encode_start = time.perf_counter()
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        encode_end = time.perf_counter()
+
+        # The centre of the crop stays the centre of the rotated image
+        scale = px_per_cell / CELL_M
+        view_rotation = math.radians(rotation_deg)
+        center = _rotate(
+            (
+                ((left + right) / 2 - GRID_CELLS / 2) * CELL_M,
+                (GRID_CELLS / 2 - (top + bottom) / 2) * CELL_M,
+            ),
+            view_rotation,
+        )
+
+        def calibration_point(px_x: int, px_y: int) -> dict:
+            rotated = (
+                center[0] + (px_x - image.width / 2) / scale,
+                center[1] - (px_y - image.height / 2) / scale,
+            )
+            world = _rotate(rotated, -view_rotation)
+            return {
+                "vacuum": {"x": round(world[0], 3), "y": round(world[1], 3)},
+                "map": {"x": px_x, "y": px_y},
+            }
+
+        return MapImage(
+            image=buffer.getvalue(),
+            width=image.width,
+            height=image.height,
+            calibration_points=[
+                calibration_point(0, 0),
+                calibration_point(image.width, 0),
+                calibration_point(0, image.height),
+            ],
+            render_seconds=encode_start - start,
+            encode_seconds=encode_end - encode_start,
+        )
+
+    def heatmap(self):
+        """The whole grid as a paletted PIL image, a pixel per cell.
+
+        Row 0 is the top (largest y), the origin of the map frame is at the
+        centre of the image.
+        """
+        from PIL import Image
+
+        with self._lock:
+            image = Image.frombytes("P", (GRID_CELLS, GRID_CELLS), bytes(self._counts))
+            sessions = min(self.sessions, SESSIONS)
+        image.putpalette(_palette(sessions))
+        return image
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._mmap,
+            0,
+            _MAGIC,
+            _VERSION,
+            GRID_CELLS,
+            self.sessions,
+            self._last_session,
+        )
+
+
+def _covered_cells(map_data: MapData) -> list[int]:
+    """The indexes of the cells the swath of a session covers."""
+    from PIL import Image, ImageDraw
+
+    mask = Image.new("L", (GRID_CELLS, GRID_CELLS), 0)
+    draw = ImageDraw.Draw(mask)
+    half = GRID_CELLS / 2
+    for run in crumb_runs(map_data):
+        pts = [(x / CELL_M + half, half - y / CELL_M) for x, y in run]
+        draw_swath(draw, pts, ROBOT_WIDTH_M / CELL_M, 255)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return []
+    left, top, right, _ = bbox
+    width = right - left
+    data = mask.crop(bbox).tobytes()
+    return [
+        (top + offset // width) * GRID_CELLS + left + offset % width
+        for offset, value in enumerate(data)
+        if value
+    ]
+
+
+def _palette(sessions: int) -> list[int]:
+    """Background for 0, then from the swath colour to HOT at sessions."""
+    palette = list(BACKGROUND[:3])
+    for count in range(1, 256):
+        ratio = min(1.0, (count - 1) / max(1, sessions - 1))
+        palette.extend(
+            round(low + (high - low) * ratio) for low, high in zip(SWATH[:3], HOT)
+        )
+    return palette
@@ -0,0 +1,111 @@
+"""Diagnostics support for Wellbeing."""
+
+from collections import Counter
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_API_KEY
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.json import json_bytes
+from pyelectroluxgroup.appliance import Appliance as ApiAppliance
+
+from . import WellbeingDataUpdateCoordinator
+from .api import PollFailure, reported_form
+from .const import CONF_REFRESH_TOKEN, DOMAIN
+from .map_data import MapData
+from .timing import Stage
+
+TO_REDACT = {CONF_API_KEY, CONF_ACCESS_TOKEN, CONF_REFRESH_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: WellbeingDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    # Appliance ids contain the serial number, so they are replaced by aliases
+    aliases = {
+        appliance_id: f"appliance_{index}"
+        for index, appliance_id in enumerate(api._api_appliances, 1)
+    }
+
+    entities: Counter[str] = Counter()
+    disabled: Counter[str] = Counter()
+    for entity in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id):
+        (disabled if entity.disabled_by else entities)[entity.domain] += 1
+
+    health = coordinator.stream_health
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "update_interval": coordinator.update_interval.total_seconds()
+            if coordinator.update_interval
+            else None,
+            "last_update_success": coordinator.last_update_success,
+            "last_refresh_ms": api.timings.latest(Stage.REFRESH),
+            "polling_throttled": coordinator.polling_throttled,
+            "platforms": list(coordinator.platforms),
+            "requests_today": coordinator.accounting.requests_today(),
+        },
+        "stream": {
+            "enabled": api.use_stream,
+            "connected": health.connected,
+            "last_event": health.last_event.isoformat() if health.last_event else None,
+            "reconnects": health.reconnects,
+        },
+        "entities": {"enabled": dict(entities), "disabled": dict(disabled)},
+        "appliances": {
+            aliases[appliance_id]: _appliance_diagnostics(
+                appliance,
+                api._livestream_properties.get(appliance_id, []),
+                api.poll_failures.get(appliance_id),
+            )
+            for appliance_id, appliance in api._api_appliances.items()
+        },
+        "cache": {name: stats.as_dict() for name, stats in api.cache_stats.items()},
+        "timings": {
+            stage: {
+                aliases.get(appliance_id, appliance_id): stats
+                for appliance_id, stats in per_appliance.items()
+            }
+            for stage, per_appliance in api.timings.as_dict().items()
+        },
+    }
+
+
+def _appliance_diagnostics(
+    appliance: ApiAppliance,
+    livestream_properties: list[str],
+    poll_failure: PollFailure | None,
+) -> dict[str, Any]:
+    """Sizes of the state of an appliance, without its content."""
+    reported = (
+        reported_form(appliance.state_data).get("properties", {}).get("reported", {})
+    )
+    map_data = reported.get("mapData") or {}
+    decoded = (
+        appliance.state_data.get("properties", {}).get("reported", {}).get("mapData")
+    )
+    return {
+        "model": appliance.type,
+        # No info when its first poll failed
+        "device_type": appliance.info_data.get("deviceType"),
+        "connection_state": appliance.state_data.get("connectionState"),
+        "reported_properties": len(reported),
+        "reported_state_bytes": len(json_bytes(reported)),
+        "map_data_bytes": len(json_bytes(map_data)) if map_data else 0,
+        "crumbs": len(map_data.get("crumbs", [])),
+        # Memory taken by the crumbs as decoded by the integration
+        "crumb_memory_bytes": decoded.crumbs.nbytes
+        if isinstance(decoded, MapData)
+        else 0,
+        "livestream_properties": sorted(livestream_properties),
+        "failed_polls": poll_failure.count if poll_failure else 0,
+        "last_poll_error": poll_failure.error if poll_failure else None,
+    }
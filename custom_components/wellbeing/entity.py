@@ -1,6 +1,9 @@
 """WellbeingEntity class"""
 
 from homeassistant.const import EntityCategory
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity import EntityDescription
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import slugify
 
@@ -9,7 +12,47 @@ from .api import Appliance, ApplianceEntity
 from .const import DEFAULT_NAME, DOMAIN
 
 
-class WellbeingEntity(CoordinatorEntity):
+class WellbeingCoordinatorEntity(CoordinatorEntity):
+    """Coordinator entity that only writes its state when it changed."""
+
+    _last_written_state: tuple | None = None
+
+    def _state_snapshot(self) -> tuple:
+        """Everything a state write would publish that can change at runtime."""
+        return (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state and remember what was written."""
+        self._last_written_state = self._state_snapshot()
+        super().async_write_ha_state()
+
+    @callback
+    def _async_write_ha_state_if_changed(self) -> None:
+        """Write the state, unless it equals what was last written.
+
+        Coordinator updates fan out to every entity of the account, while a
+        poll or stream event usually only changes a few of them.
+        """
+        snapshot = self._state_snapshot()
+        unchanged = snapshot == self._last_written_state
+        self.coordinator.api.cache_stats["entity_state"].record(unchanged)
+        if not unchanged:
+            self._last_written_state = snapshot
+            super().async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._async_write_ha_state_if_changed()
+
+
+class WellbeingEntity(WellbeingCoordinatorEntity):
     def __init__(
         self,
         coordinator: WellbeingDataUpdateCoordinator,
@@ -58,14 +101,17 @@ class WellbeingEntity(CoordinatorEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        return {
+        attributes = {
             "integration": DOMAIN,
-            "capabilities": [
-                key
-                for key, value in self.get_appliance.capabilities.items()
-                if isinstance(value, dict) and value.get("access") == "readwrite"
-            ],
+            "capabilities": self.get_appliance.readwrite_capabilities,
         }
+        if self.coordinator.data.get("restored"):
+            # Last known state from before the restart, not yet refreshed
+            attributes["restored"] = True
+        if self.get_appliance.stale:
+            # The last poll failed, this is the state from before
+            attributes["stale"] = True
+        return attributes
 
     @property
     def device_class(self) -> str | None:
@@ -76,3 +122,31 @@ class WellbeingEntity(CoordinatorEntity):
     def entity_category(self) -> EntityCategory | None:
         """Return the entity category."""
         return self.get_entity.entity_category
+
+
+class WellbeingAccountEntity(WellbeingCoordinatorEntity):
+    """Diagnostic entity of the account (config entry) rather than an appliance."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: WellbeingDataUpdateCoordinator,
+        config_entry,
+        description: EntityDescription,
+    ):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self.config_entry = config_entry
+        self._attr_unique_id = f"{config_entry.entry_id}-{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=config_entry.title,
+            manufacturer="Electrolux",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Account diagnostics stay available when a refresh fails."""
+        return True
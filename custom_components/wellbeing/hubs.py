@@ -0,0 +1,69 @@
+"""Resources shared by the accounts of the integration.
+
+Every account (config entry) has its own hub and coordinator. They already
+share Home Assistant's HTTP session, and with it its connection pool; the
+registry adds a limit on the requests in flight to the Electrolux API over
+all accounts, and spreads the periodic refreshes of the accounts evenly over
+the refresh interval, instead of letting accounts set up at the same time
+poll at the same time.
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from datetime import timedelta
+
+from pyelectroluxgroup.api import ElectroluxHubAPI
+
+MAX_CONCURRENT_REQUESTS = 4  # over all accounts
+
+
+class HubRegistry:
+    """The hubs of all accounts, kept in hass.data[DOMAIN]."""
+
+    def __init__(self, max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS) -> None:
+        self.hubs: dict[str, ElectroluxHubAPI] = {}
+        self._requests = asyncio.Semaphore(max_concurrent_requests)
+
+    def register(self, entry_id: str, hub: ElectroluxHubAPI) -> Callable[[], None]:
+        """Add the hub of an account; returns the function removing it."""
+        self.hubs[entry_id] = hub
+        self._limit(hub.auth)
+
+        def unregister() -> None:
+            self.hubs.pop(entry_id, None)
+
+        return unregister
+
+    def _limit(self, auth) -> None:
+        """Make the requests of the Auth of a hub wait for a free slot."""
+        request = auth.request
+
+        async def limited_request(method: str, path: str, **kwargs):
+            if kwargs.get("skip_auth_headers"):
+                # The token refresh does not take a slot: the requests that
+                # wait for it may be holding all of them
+                return await request(method, path, **kwargs)
+            # Get a valid token before taking a slot, so usually no request
+            # holds one while waiting for a refresh
+            await auth.async_get_access_token()
+            async with self._requests:
+                return await request(method, path, **kwargs)
+
+        auth.request = limited_request
+
+    def staggered(self, entry_id: str, interval: timedelta) -> timedelta:
+        """The delay of the next refresh of an account, on its own phase.
+
+        The accounts take turns at evenly spaced phases of the interval, in
+        the order they were set up. The delay is between a half and one and
+        a half intervals, so moving onto the phase is spread over refreshes.
+        """
+        if len(self.hubs) < 2 or entry_id not in self.hubs:
+            return interval
+        seconds = interval.total_seconds()
+        phase = list(self.hubs).index(entry_id) / len(self.hubs) * seconds
+        due_in = (phase - time.monotonic()) % seconds
+        if due_in < seconds / 2:
+            due_in += seconds
+        return timedelta(seconds=due_in)
@@ -0,0 +1,124 @@
+"""Decoded robot vacuum map data.
+
+The ``mapData`` of the reported state of a robot vacuum (see map_renderer
+for its contents) carries the crumb trail of the cleaning session as a list
+of small dicts, ``{"xy": [x, y], "t": frame}``; a long session has tens of
+thousands of them. WellbeingApiClient decodes it once, when the state
+arrives, into a MapData whose crumbs are kept as columns of typed arrays.
+The camera and the renderer use the decoded form; as_dict restores the
+reported form where the state is stored or encoded as JSON.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+
+NO_FRAME = -1  # crumbs reported without a transform frame
+
+
+class CrumbTrail:
+    """The crumbs of a cleaning session, as columns: x, y and frame."""
+
+    __slots__ = ("frame", "x", "y")
+
+    def __init__(
+        self,
+        x: array | None = None,
+        y: array | None = None,
+        frame: array | None = None,
+    ) -> None:
+        self.x = x if x is not None else array("d")
+        self.y = y if y is not None else array("d")
+        self.frame = frame if frame is not None else array("i")
+
+    @classmethod
+    def from_crumbs(cls, crumbs: list[dict]) -> "CrumbTrail":
+        """Decode reported crumbs; crumbs without a position are dropped."""
+        trail = cls()
+        for crumb in crumbs:
+            xy = crumb.get("xy")
+            if not xy or len(xy) < 2:
+                continue
+            trail.x.append(xy[0])
+            trail.y.append(xy[1])
+            frame = crumb.get("t")
+            trail.frame.append(NO_FRAME if frame is None else int(frame))
+        return trail
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __add__(self, other: "CrumbTrail") -> "CrumbTrail":
+        """The trail followed by the crumbs of another, e.g. a delta upload."""
+        return CrumbTrail(self.x + other.x, self.y + other.y, self.frame + other.frame)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CrumbTrail):
+            return NotImplemented
+        return (self.x, self.y, self.frame) == (other.x, other.y, other.frame)
+
+    __hash__ = None  # mutable
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by the columns."""
+        return sum(
+            len(column) * column.itemsize for column in (self.x, self.y, self.frame)
+        )
+
+    def as_list(self) -> list[dict]:
+        """The crumbs in their reported form."""
+        return [
+            {"xy": [x, y]} if frame == NO_FRAME else {"xy": [x, y], "t": frame}
+            for x, y, frame in zip(self.x, self.y, self.frame)
+        ]
+
+
+@dataclass
+class MapData:
+    """The mapData of a robot vacuum, with the crumbs decoded."""
+
+    crumbs: CrumbTrail = field(default_factory=CrumbTrail)
+    # Frame -> (tx, ty, a) of the local frame of the crumbs
+    transforms: dict[int, tuple[float, float, float]] = field(default_factory=dict)
+    session_id: str | None = None
+    timestamp: str | None = None
+    delta: bool = False  # crumbCollectionDelta: only the crumbs since the last
+    charger_poses: list[dict] = field(default_factory=list)
+    robot_pose: dict | None = None
+
+    @classmethod
+    def from_reported(cls, map_data: dict) -> "MapData":
+        """Decode the reported mapData."""
+        return cls(
+            crumbs=CrumbTrail.from_crumbs(map_data.get("crumbs") or []),
+            transforms={
+                transform["t"]: tuple(transform["xya"])
+                for transform in map_data.get("transforms") or []
+                if len(transform.get("xya", [])) == 3
+            },
+            session_id=map_data.get("sessionId"),
+            timestamp=map_data.get("timestamp"),
+            delta=bool(map_data.get("crumbCollectionDelta")),
+            charger_poses=map_data.get("chargerPoses") or [],
+            robot_pose=map_data.get("robotPose"),
+        )
+
+    def as_dict(self) -> dict:
+        """The reported form, for storage and JSON."""
+        data: dict = {
+            "crumbs": self.crumbs.as_list(),
+            "transforms": [
+                {"t": frame, "xya": list(xya)} for frame, xya in self.transforms.items()
+            ],
+        }
+        if self.session_id is not None:
+            data["sessionId"] = self.session_id
+        if self.timestamp is not None:
+            data["timestamp"] = self.timestamp
+        if self.delta:
+            data["crumbCollectionDelta"] = True
+        if self.charger_poses:
+            data["chargerPoses"] = self.charger_poses
+        if self.robot_pose is not None:
+            data["robotPose"] = self.robot_pose
+        return data
@@ -6,6 +6,9 @@ pose, the charger pose and per-chunk coordinate transforms. This module turns
 that data into a PNG image plus calibration points, without any additional API
 calls.
 
+The data is used as decoded by map_data.MapData, which the appliance state
+holds once WellbeingApiClient has seen it.
+
 Coordinates: crumbs are recorded in per-chunk local frames; each crumb's ``t``
 selects a transform ``(tx, ty, a)`` and ``global = R(-a) @ (p - (tx, ty))``.
 Frame 0's origin maps exactly onto the reported charger pose, which is how
@@ -13,6 +16,11 @@ this convention was verified (on a PUREi9.2). The charger pose and the robot
 pose are already in the global (persistent map) frame; the robot pose
 coincides with the last reported crumb.
 
+Maps are drawn at SCALE, unless the image would then exceed its pixel budget
+(or MAX_DIMENSION_PX on a side): the scale is lowered to fit instead, so the
+whole map is shown, in its aspect ratio, and the memory and time a render
+takes are bounded whatever the size of the home.
+
 The calibration points map the global (metres) frame to image pixels in the
 format used by mqtt_vacuum_camera, so lovelace cards such as
 xiaomi-vacuum-map-card can consume them via ``calibration_source: camera``.
@@ -23,16 +31,26 @@ executor.
 
 import io
 import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
 from dataclasses import dataclass, field
+from typing import Any
 
-from PIL import Image, ImageDraw
+from .const import CONF_MAP_PIXEL_BUDGET, DEFAULT_MAP_PIXEL_BUDGET
+from .map_data import MapData
+from .timing import CacheStats
 
-SCALE = 120  # px per metre (before supersampling)
+SCALE = 120  # px per metre (before supersampling), at most
 SUPERSAMPLE = 2
 PADDING_M = 0.7
 ROBOT_WIDTH_M = 0.33  # PUREi9 footprint -> width of the coverage swath
 MAX_SEGMENT_M = 0.6  # crumb gaps larger than this are lifts/jumps, not moves
-MAX_DIMENSION_PX = 1600  # safety cap for degenerate map data
+MAX_PIXELS = round(DEFAULT_MAP_PIXEL_BUDGET * 1_000_000)  # pixel budget of an image
+MAX_DIMENSION_PX = 8192  # safety cap for degenerate map data
+GEOMETRY_CACHE_SIZE = 2  # maps, per camera
 
 ROBOT_MARKER_NONE = "none"
 ROBOT_MARKER_POSE = "pose"
@@ -54,6 +72,9 @@ class MapImage:
     width: int
     height: int
     calibration_points: list[dict] = field(default_factory=list)
+    # Time spent drawing and encoding the image, in seconds
+    render_seconds: float = 0.0
+    encode_seconds: float = 0.0
 
 
 def _rotate(point, radians):
@@ -69,131 +90,136 @@ def _to_global(point, transform):
     return _rotate((point[0] - tx, point[1] - ty), -a)
 
 
+@dataclass
+class MapLayers:
+    """A map drawn without the robot, to composite the robot marker onto.
+
+    Where the robot is drawn changes with its state rather than with the map
+    data, e.g. when it docks; composite_map draws just the marker onto a
+    copy of the base layer, instead of drawing the whole trail again.
+    """
+
+    base: Any  # PIL RGB image: the swath, the path and the charger
+    # The view frame (rotated metres) at the top left of the image
+    xmin: float
+    ymax: float
+    scale: float  # px per metre of the image
+    # View frame position and heading of the charger and the robot pose
+    charger: tuple[tuple[float, float], float] | None
+    robot: tuple[tuple[float, float], float] | None
+    calibration_points: list[dict]
+    render_seconds: float
+
+
+def fit_scale(width_m: float, height_m: float, max_pixels: int = MAX_PIXELS) -> float:
+    """The px per metre for an extent: SCALE, or less to fit the pixel budget."""
+    return min(
+        SCALE,
+        math.sqrt(max_pixels / (width_m * height_m)),
+        MAX_DIMENSION_PX / max(width_m, height_m),
+    )
+
+
+def map_pixel_budget(options: Mapping) -> int:
+    """The pixel budget of map images, by the options of the config entry."""
+    return round(
+        options.get(CONF_MAP_PIXEL_BUDGET, DEFAULT_MAP_PIXEL_BUDGET) * 1_000_000
+    )
+
+
 def render_map(
-    reported: dict, rotation_deg: float = 0.0, robot_marker: str = ROBOT_MARKER_NONE
+    reported: dict,
+    rotation_deg: float = 0.0,
+    robot_marker: str = ROBOT_MARKER_NONE,
+    max_pixels: int = MAX_PIXELS,
+    geometry_cache: "GeometryCache | None" = None,
 ) -> MapImage | None:
     """Render the vacuum map from the reported appliance state.
 
-    robot_marker selects where the robot is drawn: at its reported pose (only
+    The mapData of the state is a MapData; the reported dict form is decoded
+    first. robot_marker selects where the robot is drawn: at its reported pose (only
     meaningful while the robot is moving), on the charger (when docked), or
     not at all. Returns None when the state carries no usable map data.
+
+    Renders the layers and composites them at once; callers that redraw the
+    marker more often than the map keep the layers of render_layers instead.
     """
     map_data = reported.get("mapData")
-    if not map_data or not map_data.get("crumbs"):
+    if isinstance(map_data, dict):
+        map_data = MapData.from_reported(map_data)
+    if map_data is None:
         return None
+    layers = render_layers(map_data, rotation_deg, max_pixels, geometry_cache)
+    if layers is None:
+        return None
+    map_image = composite_map(layers, robot_marker)
+    map_image.render_seconds += layers.render_seconds
+    return map_image
+
+
+def render_layers(
+    map_data: MapData,
+    rotation_deg: float = 0.0,
+    max_pixels: int = MAX_PIXELS,
+    geometry_cache: "GeometryCache | None" = None,
+) -> MapLayers | None:
+    """Draw the base layer of the map, everything but the robot marker.
+
+    The image covers the charger and the robot pose as well as the crumbs,
+    so its extent does not depend on where the robot is drawn. The geometry
+    in the map frame comes from geometry_cache, if given; the view rotation
+    and the scale are applied to it as one affine transform.
+    """
+    if not map_data.crumbs:
+        return None
+    start = time.perf_counter()
+    geometry = map_geometry(map_data, geometry_cache)
 
     view_rotation = math.radians(rotation_deg)
+    cos_r, sin_r = math.cos(view_rotation), math.sin(view_rotation)
 
     def view(point):
-        return _rotate(point, view_rotation)
-
-    transforms = {
-        t["t"]: t["xya"]
-        for t in map_data.get("transforms", [])
-        if len(t.get("xya", [])) == 3
-    }
-    identity = [0.0, 0.0, 0.0]
-
-    # Crumb chunks, each in its own frame; keep chunks separate so the pen
-    # lifts between them instead of drawing a stroke across the room.
-    chunks: list[tuple[int, list]] = []
-    for crumb in map_data["crumbs"]:
-        if "xy" not in crumb:
-            continue
-        pos = view(_to_global(crumb["xy"], transforms.get(crumb.get("t"), identity)))
-        if chunks and chunks[-1][0] == crumb.get("t"):
-            chunks[-1][1].append(pos)
-        else:
-            chunks.append((crumb.get("t"), [pos]))
-    if not chunks:
-        return None
+        return (
+            cos_r * point[0] - sin_r * point[1],
+            sin_r * point[0] + cos_r * point[1],
+        )
 
-    # The charger is the origin of local frame 0: the robot zeroes its
-    # odometry on the dock at session start (verified: transform 0 is always
-    # exactly the inverse of the charger pose). The reported chargerPoses is
-    # not reliable - it flip-flops between global coordinates and the local
-    # frame-0 origin (0, 0, 0) across sessions - so it is only a fallback.
-    charger = charger_heading = None
-    if 0 in transforms:
-        charger = view(_to_global((0.0, 0.0), transforms[0]))
-        charger_heading = -transforms[0][2] + view_rotation
-    else:
-        charger_poses = map_data.get("chargerPoses")
-        if charger_poses and len(charger_poses[0].get("xya", [])) >= 2:
-            xya = charger_poses[0]["xya"]
-            charger = view(xya[:2])
-            charger_heading = (xya[2] if len(xya) == 3 else 0.0) + view_rotation
-
-    # The robot pose is reported directly in the global frame (verified: it
-    # coincides with the last reported crumb; the identity transform tagged
-    # t=1000 is its frame marker). It is only current while the robot is
-    # moving - when docked the pose is a stale mid-session snapshot, so the
-    # robot is drawn on the charger instead.
-    robot = robot_heading = None
-    robot_pose = map_data.get("robotPose")
-    if (
-        robot_marker == ROBOT_MARKER_POSE
-        and robot_pose
-        and len(robot_pose.get("xya", [])) == 3
-    ):
-        robot = view(robot_pose["xya"][:2])
-        robot_heading = robot_pose["xya"][2] + view_rotation
-    elif robot_marker == ROBOT_MARKER_CHARGER and charger:
-        robot = charger
-        robot_heading = charger_heading
-
-    points = [p for _, chunk in chunks for p in chunk]
-    if charger:
-        points.append(charger)
-    if robot:
-        points.append(robot)
+    charger = robot = None
+    if geometry.charger:
+        charger = (view(geometry.charger[0]), geometry.charger[1] + view_rotation)
+    if geometry.robot:
+        robot = (view(geometry.robot[0]), geometry.robot[1] + view_rotation)
 
-    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    # The hull holds the extremes of the crumbs, charger and robot pose in
+    # every direction
+    hull = [view(point) for point in geometry.hull]
+    xs, ys = [p[0] for p in hull], [p[1] for p in hull]
     xmin, xmax = min(xs) - PADDING_M, max(xs) + PADDING_M
     ymin, ymax = min(ys) - PADDING_M, max(ys) + PADDING_M
 
-    scale = SCALE * SUPERSAMPLE
-    width = min(int((xmax - xmin) * scale), MAX_DIMENSION_PX * SUPERSAMPLE)
-    height = min(int((ymax - ymin) * scale), MAX_DIMENSION_PX * SUPERSAMPLE)
-    if width < 1 or height < 1:
+    scale = fit_scale(xmax - xmin, ymax - ymin, max_pixels) * SUPERSAMPLE
+    width = int((xmax - xmin) * scale)
+    height = int((ymax - ymin) * scale)
+    if width < SUPERSAMPLE or height < SUPERSAMPLE:
         return None
 
     def px(point):
         # y axis flipped: world y up, image y down
         return ((point[0] - xmin) * scale, (ymax - point[1]) * scale)
 
-    img = Image.new("RGBA", (width, height), BACKGROUND)
-    draw = ImageDraw.Draw(img)
-
-    # Coverage swath: a stroke as wide as the robot along the crumb path
-    swath_width = int(ROBOT_WIDTH_M * scale)
-    for _, chunk in chunks:
-        for run in _split_runs(chunk):
-            pts = [px(p) for p in run]
-            if len(pts) > 1:
-                draw.line(pts, fill=SWATH, width=swath_width, joint="curve")
-            for p in (pts[0], pts[-1]):
-                radius = swath_width / 2
-                draw.ellipse(
-                    [p[0] - radius, p[1] - radius, p[0] + radius, p[1] + radius],
-                    fill=SWATH,
-                )
+    # Pillow is only loaded once a map is actually rendered
+    from PIL import Image, ImageDraw
 
-    # Centre path line on top of the swath
-    for _, chunk in chunks:
-        for run in _split_runs(chunk):
-            pts = [px(p) for p in run]
-            if len(pts) > 1:
-                draw.line(pts, fill=PATH, width=max(2, scale // 40), joint="curve")
+    img = Image.new("RGB", (width, height), BACKGROUND[:3])
+    draw = ImageDraw.Draw(img)
 
-    if charger:
-        _draw_charger(draw, px(charger), scale)
-    if robot:
-        _draw_robot(draw, px, robot, robot_heading, scale)
+    pixel_runs = geometry.pixel_runs(
+        (cos_r * scale, -sin_r * scale, -xmin * scale),
+        (-sin_r * scale, -cos_r * scale, ymax * scale),
+    )
+    draw_base(draw, pixel_runs, px(charger[0]) if charger else None, scale)
 
     img = img.resize((width // SUPERSAMPLE, height // SUPERSAMPLE), Image.LANCZOS)
-    buffer = io.BytesIO()
-    img.convert("RGB").save(buffer, "PNG")
 
     # Three reference points mapping the vacuum (global metres) frame to
     # image pixels, in the attribute format established by
@@ -206,21 +232,255 @@ def render_map(
             "map": {"x": px_x, "y": px_y},
         }
 
-    out_width, out_height = img.width, img.height
-    calibration_points = [
-        calibration_point(0, 0),
-        calibration_point(out_width, 0),
-        calibration_point(0, out_height),
-    ]
+    return MapLayers(
+        base=img,
+        xmin=xmin,
+        ymax=ymax,
+        scale=scale / SUPERSAMPLE,
+        charger=charger,
+        robot=robot,
+        calibration_points=[
+            calibration_point(0, 0),
+            calibration_point(img.width, 0),
+            calibration_point(0, img.height),
+        ],
+        render_seconds=time.perf_counter() - start,
+    )
+
 
+def composite_map(layers: MapLayers, robot_marker: str) -> MapImage:
+    """Draw the robot marker onto the base layer and encode the PNG.
+
+    The render_seconds of the result are those of the marker only.
+    """
+    start = time.perf_counter()
+    img = layers.base
+    robot = None
+    if robot_marker == ROBOT_MARKER_POSE:
+        robot = layers.robot
+    elif robot_marker == ROBOT_MARKER_CHARGER:
+        robot = layers.charger
+    if robot is not None:
+        img = img.copy()
+        _paste_robot(img, layers, *robot)
+    encode_start = time.perf_counter()
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    encode_end = time.perf_counter()
     return MapImage(
         image=buffer.getvalue(),
-        width=out_width,
-        height=out_height,
-        calibration_points=calibration_points,
+        width=img.width,
+        height=img.height,
+        calibration_points=layers.calibration_points,
+        render_seconds=encode_start - start,
+        encode_seconds=encode_end - encode_start,
     )
 
 
+def _paste_robot(img, layers: MapLayers, robot, heading) -> None:
+    """Draw the robot supersampled on a patch of its own and paste it."""
+    from PIL import Image, ImageDraw
+
+    scale = layers.scale * SUPERSAMPLE
+    reach = ROBOT_WIDTH_M / 2 * scale + 2 * SUPERSAMPLE  # with the outline
+    center_x = (robot[0] - layers.xmin) * scale
+    center_y = (layers.ymax - robot[1]) * scale
+    left = math.floor((center_x - reach) / SUPERSAMPLE)
+    top = math.floor((center_y - reach) / SUPERSAMPLE)
+    size = math.ceil(2 * reach / SUPERSAMPLE) + 1
+
+    def px(point):
+        return (
+            (point[0] - layers.xmin) * scale - left * SUPERSAMPLE,
+            (layers.ymax - point[1]) * scale - top * SUPERSAMPLE,
+        )
+
+    patch = Image.new("RGBA", (size * SUPERSAMPLE, size * SUPERSAMPLE), (0, 0, 0, 0))
+    _draw_robot(ImageDraw.Draw(patch), px, robot, heading, scale)
+    patch = patch.resize((size, size), Image.LANCZOS)
+    img.paste(patch, (left, top), patch)
+
+
+@dataclass
+class MapGeometry:
+    """The map data in the persistent map frame, for any view rotation."""
+
+    # The crumbs of all runs, one run after another
+    xs: array
+    ys: array
+    run_ends: list[int]
+    # Position and heading of the charger and the robot pose
+    charger: tuple[tuple[float, float], float] | None
+    robot: tuple[tuple[float, float], float] | None
+    # Convex hull of the crumbs, the charger and the robot pose
+    hull: list[tuple[float, float]]
+
+    @classmethod
+    def from_map_data(cls, map_data: MapData) -> "MapGeometry":
+        transforms = map_data.transforms
+        # The charger is the origin of local frame 0: the robot zeroes its
+        # odometry on the dock at session start (verified: transform 0 is
+        # always exactly the inverse of the charger pose). The reported
+        # chargerPoses is not reliable - it flip-flops between global
+        # coordinates and the local frame-0 origin (0, 0, 0) across
+        # sessions - so it is only a fallback.
+        charger = None
+        if 0 in transforms:
+            charger = (_to_global((0.0, 0.0), transforms[0]), -transforms[0][2])
+        else:
+            charger_poses = map_data.charger_poses
+            if charger_poses and len(charger_poses[0].get("xya", [])) >= 2:
+                xya = charger_poses[0]["xya"]
+                charger = (tuple(xya[:2]), xya[2] if len(xya) == 3 else 0.0)
+
+        # The robot pose is reported directly in the global frame (verified:
+        # it coincides with the last reported crumb; the identity transform
+        # tagged t=1000 is its frame marker). It is only current while the
+        # robot is moving - when docked the pose is a stale mid-session
+        # snapshot, so the robot is drawn on the charger instead.
+        robot = None
+        robot_pose = map_data.robot_pose
+        if robot_pose and len(robot_pose.get("xya", [])) == 3:
+            robot = (tuple(robot_pose["xya"][:2]), robot_pose["xya"][2])
+
+        xs, ys, run_ends = array("d"), array("d"), []
+        for run in crumb_runs(map_data):
+            for x, y in run:
+                xs.append(x)
+                ys.append(y)
+            run_ends.append(len(xs))
+        points = list(zip(xs, ys))
+        points.extend(pose[0] for pose in (charger, robot) if pose)
+        return cls(xs, ys, run_ends, charger, robot, _convex_hull(points))
+
+    def pixel_runs(self, row_x: tuple, row_y: tuple) -> list[list]:
+        """The runs in pixels, by the affine transform of the two rows."""
+        a, b, c = row_x
+        d, e, f = row_y
+        runs, begin = [], 0
+        for end in self.run_ends:
+            runs.append(
+                [
+                    (a * x + b * y + c, d * x + e * y + f)
+                    for x, y in zip(self.xs[begin:end], self.ys[begin:end])
+                ]
+            )
+            begin = end
+        return runs
+
+
+class GeometryCache:
+    """The MapGeometry of the last few maps of one robot.
+
+    Maps are told apart by their session, upload timestamp and crumb count:
+    the camera renders the trail accumulated over delta uploads, which keeps
+    the timestamp of the last. Those can be the same for the maps of
+    different robots, so each map camera has a cache of its own. It is used
+    from the executor, so it is locked.
+    """
+
+    def __init__(
+        self, size: int = GEOMETRY_CACHE_SIZE, stats: CacheStats | None = None
+    ) -> None:
+        self.size = size
+        self.stats = stats or CacheStats()
+        self._geometries: OrderedDict[tuple, MapGeometry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, map_data: MapData) -> MapGeometry:
+        key = (map_data.session_id, map_data.timestamp, len(map_data.crumbs))
+        with self._lock:
+            if (geometry := self._geometries.get(key)) is not None:
+                self._geometries.move_to_end(key)
+                self.stats.record(True)
+                return geometry
+            self.stats.record(False)
+        geometry = MapGeometry.from_map_data(map_data)
+        with self._lock:
+            self._geometries[key] = geometry
+            while len(self._geometries) > self.size:
+                self._geometries.popitem(last=False)
+        return geometry
+
+
+def map_geometry(
+    map_data: MapData, geometry_cache: GeometryCache | None = None
+) -> MapGeometry:
+    """The geometry of the map data, from the cache if one is given."""
+    if geometry_cache is None:
+        return MapGeometry.from_map_data(map_data)
+    return geometry_cache.get(map_data)
+
+
+def _convex_hull(points: list) -> list:
+    """Convex hull of the points (Andrew's monotone chain)."""
+    points = sorted(set(points))
+    if len(points) <= 2:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower: list = []
+    upper: list = []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+
+def crumb_runs(map_data: MapData) -> list[list]:
+    """The crumbs in the persistent map frame, as runs the robot moved along.
+
+    Crumb chunks are each in their own frame; runs are split between chunks
+    and where consecutive crumbs are implausibly far apart, so the pen lifts
+    instead of drawing a stroke across the room.
+    """
+    transforms = map_data.transforms
+    identity = (0.0, 0.0, 0.0)
+    chunks: list[tuple[int, list]] = []
+    crumbs = map_data.crumbs
+    for x, y, frame in zip(crumbs.x, crumbs.y, crumbs.frame):
+        pos = _to_global((x, y), transforms.get(frame, identity))
+        if chunks and chunks[-1][0] == frame:
+            chunks[-1][1].append(pos)
+        else:
+            chunks.append((frame, [pos]))
+    return [run for _, chunk in chunks for run in _split_runs(chunk)]
+
+
+def draw_base(draw, pixel_runs: list[list], charger, scale: float) -> None:
+    """Draw the swath, the path and the charger (in pixels) at scale px/m."""
+    # Coverage swath: a stroke as wide as the robot along the crumb path
+    swath_width = max(1, int(ROBOT_WIDTH_M * scale))
+    for pts in pixel_runs:
+        draw_swath(draw, pts, swath_width, SWATH)
+
+    # Centre path line on top of the swath
+    for pts in pixel_runs:
+        if len(pts) > 1:
+            draw.line(pts, fill=PATH, width=max(2, int(scale / 40)), joint="curve")
+
+    if charger:
+        _draw_charger(draw, charger, scale)
+
+
+def draw_swath(draw, pts: list, width: float, fill) -> None:
+    """Draw the coverage swath of a run of pixel points, with round ends."""
+    if len(pts) > 1:
+        draw.line(pts, fill=fill, width=int(width), joint="curve")
+    radius = width / 2
+    for p in (pts[0], pts[-1]):
+        draw.ellipse(
+            [p[0] - radius, p[1] - radius, p[0] + radius, p[1] + radius], fill=fill
+        )
+
+
 def _split_runs(chunk):
     """Split a crumb chunk where consecutive points are implausibly far apart."""
     runs, run = [], [chunk[0]]
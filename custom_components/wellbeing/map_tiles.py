@@ -0,0 +1,361 @@
+"""Tile pyramids of the vacuum maps, for cards that zoom into a map.
+
+Rather than one image of the whole map, a pyramid serves it as square tiles
+of TILE_PX pixels at ZOOM_LEVELS scales, each twice the one before, up to
+the SCALE of the map camera. The tiles of a zoom level are laid out on a
+grid anchored at the origin of the view frame (the persistent map frame,
+rotated by the map rotation option), so a tile keeps covering the same area
+however the map grows: tile (x, y) is the square of TILE_PX pixels at
+x * TILE_PX to the right of and y * TILE_PX down from the origin.
+
+Tiles are drawn on request and kept until what they show changes. MapTiles
+only drops the tiles touched by the crumbs added to the trail (and by the
+swath around them), and all of them when the next session starts or the
+frames of the map moved; CoverageTiles drops them all when a session was
+added to the grid. Each tile comes with a key of the state it was drawn
+from, for its ETag.
+
+The robot is not drawn: it moves more often than the tiles change, and its
+pose is pushed over the websocket API (see websocket_api).
+
+All methods are synchronous and CPU-bound; call them from an executor.
+"""
+
+import io
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from .coverage import CELL_M, GRID_CELLS, CoverageGrid
+from .map_data import MapData
+from .map_renderer import (
+    BACKGROUND,
+    PADDING_M,
+    ROBOT_WIDTH_M,
+    SCALE,
+    SUPERSAMPLE,
+    GeometryCache,
+    _rotate,
+    draw_base,
+    map_geometry,
+)
+from .timing import CacheStats
+
+TILE_PX = 256
+ZOOM_LEVELS = 4
+# Around a crumb, what is drawn for it: the swath, its smoothing and the
+# charger, in metres
+MARGIN_M = ROBOT_WIDTH_M
+PIECE_CRUMBS = 64  # the runs are drawn in pieces of up to this many crumbs
+
+Tile = tuple[int, int, int]  # zoom, x, y
+Bounds = tuple[float, float, float, float]  # xmin, ymin, xmax, ymax
+
+
+def zoom_scale(zoom: int) -> float:
+    """The px per metre of a zoom level; the last one is at SCALE."""
+    return SCALE / 2 ** (ZOOM_LEVELS - 1 - zoom)
+
+
+def tile_range(bounds: Bounds, zoom: int) -> tuple[int, int, int, int]:
+    """The first and last x and y of the tiles covering the view frame bounds."""
+    xmin, ymin, xmax, ymax = bounds
+    size = TILE_PX / zoom_scale(zoom)
+    return (
+        math.floor(xmin / size),
+        math.ceil(xmax / size) - 1,
+        math.floor(-ymax / size),
+        math.ceil(-ymin / size) - 1,
+    )
+
+
+class TilePyramid(ABC):
+    """The tiles of a map drawn so far, by zoom level and position."""
+
+    def __init__(self, stats: CacheStats | None = None) -> None:
+        self.rotation = 0.0  # degrees
+        # The view frame extent of the map, in metres
+        self.bounds: Bounds | None = None
+        self.stats = stats or CacheStats()
+        self._lock = threading.Lock()
+        # What the tiles are drawn from, replaced (not changed) by updates
+        self._scene: Any = None
+        self._tiles: dict[Tile, bytes] = {}
+        # The state the tiles were drawn from: that of the last reset, or
+        # that of the last change to the tile
+        self._reset_key: Hashable = None
+        self._tile_keys: dict[Tile, Hashable] = {}
+
+    def tile(self, zoom: int, x: int, y: int) -> tuple[bytes, Hashable] | None:
+        """The PNG of a tile and the key of its state, None outside the map."""
+        tile = (zoom, x, y)
+        with self._lock:
+            if self.bounds is None or not 0 <= zoom < ZOOM_LEVELS:
+                return None
+            x0, x1, y0, y1 = tile_range(self.bounds, zoom)
+            if not (x0 <= x <= x1 and y0 <= y <= y1):
+                return None
+            data = self._tiles.get(tile)
+            self.stats.record(data is not None)
+            key = self._tile_keys.get(tile, self._reset_key)
+            if data is not None:
+                return data, key
+            scene = self._scene
+        # Drawn without the lock, so requests for other tiles need not wait
+        buffer = io.BytesIO()
+        self._draw(scene, zoom, x, y).save(buffer, "PNG")
+        data = buffer.getvalue()
+        with self._lock:
+            # Unless the map changed meanwhile
+            if self._scene is scene:
+                self._tiles[tile] = data
+        return data, key
+
+    def metadata(self) -> dict | None:
+        """The tile grid of each zoom level, with its calibration points."""
+        with self._lock:
+            if self.bounds is None:
+                return None
+            zooms = []
+            for zoom in range(ZOOM_LEVELS):
+                x0, x1, y0, y1 = tile_range(self.bounds, zoom)
+                scale = zoom_scale(zoom)
+                zooms.append(
+                    {
+                        "zoom": zoom,
+                        "scale": scale,
+                        "x": [x0, x1],
+                        "y": [y0, y1],
+                        "calibration_points": [
+                            self._calibration_point(scale, px_x, px_y)
+                            for px_x, px_y in ((0, 0), (TILE_PX, 0), (0, TILE_PX))
+                        ],
+                    }
+                )
+            return {"tile_size": TILE_PX, "zooms": zooms}
+
+    def _calibration_point(self, scale: float, px_x: int, px_y: int) -> dict:
+        # Pixels of the zoom level, from the origin of the view frame
+        world = _rotate((px_x / scale, -px_y / scale), -math.radians(self.rotation))
+        return {
+            "vacuum": {"x": round(world[0], 3), "y": round(world[1], 3)},
+            "map": {"x": px_x, "y": px_y},
+        }
+
+    def _reset(self, key: Hashable) -> None:
+        """Drop all tiles; called with the lock held."""
+        self._tiles.clear()
+        self._tile_keys.clear()
+        self._reset_key = key
+
+    def _invalidate(self, bounds: Bounds, key: Hashable) -> None:
+        """Drop the tiles within view frame bounds; called with the lock held."""
+        for zoom in range(ZOOM_LEVELS):
+            x0, x1, y0, y1 = tile_range(bounds, zoom)
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    self._tiles.pop((zoom, x, y), None)
+                    self._tile_keys[(zoom, x, y)] = key
+
+    @abstractmethod
+    def _draw(self, scene: Any, zoom: int, x: int, y: int):
+        """Draw a tile of the scene as a PIL image."""
+
+
+@dataclass(frozen=True)
+class _MapScene:
+    # The crumbs in the view frame, one run after another, and pieces of
+    # the runs as their bounds with their first and last index
+    xs: list[float]
+    ys: list[float]
+    runs: list[tuple[Bounds, int, int]]
+    charger: tuple[float, float] | None
+
+
+class MapTiles(TilePyramid):
+    """The tiles of the map of the cleaning session, as the map camera draws it."""
+
+    def __init__(
+        self,
+        stats: CacheStats | None = None,
+        geometry_cache: GeometryCache | None = None,
+    ) -> None:
+        super().__init__(stats)
+        self._geometry_cache = geometry_cache  # shared with the map camera
+        self._state = None  # the session, rotation and frames of the tiles
+        self._crumbs = 0
+
+    def update(self, map_data: MapData, rotation_deg: float = 0.0) -> None:
+        """Follow the map data, dropping the tiles its changes touch."""
+        crumbs = len(map_data.crumbs)
+        state = (map_data.session_id, rotation_deg, map_data.transforms)
+        with self._lock:
+            if state == self._state and crumbs == self._crumbs:
+                return
+            extended = state == self._state and crumbs > self._crumbs
+            previous = self._crumbs
+            self._state, self._crumbs = state, crumbs
+            self.rotation = rotation_deg
+            key = (map_data.session_id, rotation_deg, crumbs)
+            if not crumbs:
+                self._reset(key)
+                self._scene = self.bounds = None
+                return
+
+            geometry = map_geometry(map_data, self._geometry_cache)
+            rotation = math.radians(rotation_deg)
+            cos_r, sin_r = math.cos(rotation), math.sin(rotation)
+            xs, ys, runs, begin = [], [], [], 0
+            for run in geometry.pixel_runs((cos_r, -sin_r, 0.0), (sin_r, cos_r, 0.0)):
+                for vx, vy in run:
+                    xs.append(vx)
+                    ys.append(vy)
+                end = begin + len(run)
+                # Pieces of the run, each sharing its first crumb with the
+                # last of the one before, so a tile draws only those near it
+                for start in range(begin, max(begin + 1, end - 1), PIECE_CRUMBS):
+                    stop = min(start + PIECE_CRUMBS + 1, end)
+                    runs.append((_bounds(xs[start:stop], ys[start:stop]), start, stop))
+                begin = end
+            self._scene = _MapScene(
+                xs,
+                ys,
+                runs,
+                _rotate(geometry.charger[0], rotation) if geometry.charger else None,
+            )
+            hull = [_rotate(point, rotation) for point in geometry.hull]
+            xmin, ymin, xmax, ymax = _bounds([p[0] for p in hull], [p[1] for p in hull])
+            self.bounds = (
+                xmin - PADDING_M,
+                ymin - PADDING_M,
+                xmax + PADDING_M,
+                ymax + PADDING_M,
+            )
+
+            if not extended:
+                self._reset(key)
+                return
+            # The crumbs added, with the one before to which they connect
+            xmin, ymin, xmax, ymax = _bounds(
+                xs[previous - 1 :] if previous else xs,
+                ys[previous - 1 :] if previous else ys,
+            )
+            self._invalidate(
+                (xmin - MARGIN_M, ymin - MARGIN_M, xmax + MARGIN_M, ymax + MARGIN_M),
+                key,
+            )
+
+    def _draw(self, scene: _MapScene, zoom: int, x: int, y: int):
+        from PIL import Image, ImageDraw
+
+        scale = zoom_scale(zoom) * SUPERSAMPLE
+        size = TILE_PX / zoom_scale(zoom)  # metres
+        left, top = x * size, -y * size  # the view frame at the top left
+        area = (
+            left - MARGIN_M,
+            top - size - MARGIN_M,
+            left + size + MARGIN_M,
+            top + MARGIN_M,
+        )
+        xs, ys = scene.xs, scene.ys
+        pixel_runs = [
+            [
+                ((vx - left) * scale, (top - vy) * scale)
+                for vx, vy in zip(xs[begin:end], ys[begin:end])
+            ]
+            for bounds, begin, end in scene.runs
+            if _intersect(bounds, area)
+        ]
+        charger = None
+        if scene.charger:
+            charger = (
+                (scene.charger[0] - left) * scale,
+                (top - scene.charger[1]) * scale,
+            )
+        img = Image.new(
+            "RGB", (TILE_PX * SUPERSAMPLE, TILE_PX * SUPERSAMPLE), BACKGROUND[:3]
+        )
+        draw_base(ImageDraw.Draw(img), pixel_runs, charger, scale)
+        return img.resize((TILE_PX, TILE_PX), Image.LANCZOS)
+
+
+class CoverageTiles(TilePyramid):
+    """The tiles of the coverage heatmap of a robot."""
+
+    def __init__(self, stats: CacheStats | None = None) -> None:
+        super().__init__(stats)
+        self._state = None  # the sessions of the grid and the rotation
+
+    def update(self, grid: CoverageGrid, rotation_deg: float = 0.0) -> None:
+        """Follow the grid, dropping all tiles when a session was added."""
+        state = (grid.sessions, rotation_deg)
+        with self._lock:
+            if state == self._state:
+                return
+            self._state = state
+            self.rotation = rotation_deg
+            self._reset(state)
+            heatmap = grid.heatmap()
+            # The heatmap with the rotation it is drawn at
+            self._scene = (heatmap, rotation_deg)
+            bbox = heatmap.getbbox()
+            if bbox is None:
+                self.bounds = None
+                return
+            left, top, right, bottom = bbox
+            rotation = math.radians(rotation_deg)
+            corners = [
+                _rotate(
+                    ((col - GRID_CELLS / 2) * CELL_M, (GRID_CELLS / 2 - row) * CELL_M),
+                    rotation,
+                )
+                for col in (left, right)
+                for row in (top, bottom)
+            ]
+            xmin, ymin, xmax, ymax = _bounds(
+                [p[0] for p in corners], [p[1] for p in corners]
+            )
+            self.bounds = (
+                xmin - PADDING_M,
+                ymin - PADDING_M,
+                xmax + PADDING_M,
+                ymax + PADDING_M,
+            )
+
+    def _draw(self, scene: tuple, zoom: int, x: int, y: int):
+        from PIL import Image
+
+        heatmap, rotation_deg = scene
+        scale = zoom_scale(zoom)
+        size = TILE_PX / scale
+        left, top = x * size, -y * size
+        # Tile pixel -> view frame -> map frame -> grid cell, as one affine
+        # transform
+        rotation = math.radians(rotation_deg)
+        cos_r, sin_r = math.cos(rotation), math.sin(rotation)
+        per_px = 1 / (scale * CELL_M)
+        return heatmap.transform(
+            (TILE_PX, TILE_PX),
+            Image.AFFINE,
+            (
+                cos_r * per_px,
+                -sin_r * per_px,
+                (cos_r * left + sin_r * top) / CELL_M + GRID_CELLS / 2,
+                sin_r * per_px,
+                cos_r * per_px,
+                GRID_CELLS / 2 - (cos_r * top - sin_r * left) / CELL_M,
+            ),
+            Image.NEAREST,
+            fillcolor=0,
+        )
+
+
+def _bounds(xs, ys) -> Bounds:
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _intersect(a: Bounds, b: Bounds) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
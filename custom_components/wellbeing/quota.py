@@ -0,0 +1,174 @@
+"""Accounting of the requests made to the Electrolux API.
+
+Electrolux enforces a daily quota of API requests per account. All requests
+of the hub (appliance polls, commands, map and livestream configuration
+lookups, token refreshes) go through its Auth.request, which is wrapped to
+count them by kind. From the rate of the last hour the spend of the day is
+projected, and with a daily budget configured the accounting tells how many
+state polls per hour still fit in it, so that polling can be slowed down
+before the quota runs out. The quota day is assumed to follow UTC. The
+counts of the day are stored, so that a restart does not forget the
+requests already made.
+"""
+
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+from enum import StrEnum
+
+from homeassistant.util import dt as dt_util
+
+RATE_WINDOW = timedelta(hours=1)
+MIN_RATE_WINDOW = timedelta(minutes=10)  # ignore the burst of the first refresh
+
+
+class RequestKind(StrEnum):
+    APPLIANCES = "appliances"
+    INFO = "info"
+    STATE = "state"
+    COMMAND = "command"
+    MAP = "map"
+    LIVESTREAM = "livestream"
+    TOKEN = "token"
+    OTHER = "other"
+
+
+_APPLIANCE_PATH_KINDS = {
+    "info": RequestKind.INFO,
+    "state": RequestKind.STATE,
+    "command": RequestKind.COMMAND,
+    "interactiveMap": RequestKind.MAP,
+    "memoryMap": RequestKind.MAP,
+}
+
+
+def classify_request(method: str, path: str) -> RequestKind:
+    """The kind of an API request, from its path."""
+    path = path.strip("/").split("?", 1)[0]
+    if path == "appliances":
+        return RequestKind.APPLIANCES
+    if path.startswith("appliances/"):
+        return _APPLIANCE_PATH_KINDS.get(path.rsplit("/", 1)[-1], RequestKind.OTHER)
+    if path.startswith("configurations/livestream"):
+        return RequestKind.LIVESTREAM
+    if path.startswith("token"):
+        return RequestKind.TOKEN
+    return RequestKind.OTHER
+
+
+class RequestAccounting:
+    """Counts the API requests of an account and keeps them within a budget."""
+
+    def __init__(self, daily_budget: int | None = None) -> None:
+        self.daily_budget = daily_budget  # requests per day, None = unlimited
+        self.polls = 0  # state polls since start, never reset
+        self._counts: Counter[RequestKind] = Counter()
+        self._day: date | None = None
+        self._recent: deque[tuple[datetime, RequestKind]] = deque()
+        self._first_request: datetime | None = None
+
+    def attach(self, auth) -> None:
+        """Count every request made through the Auth of the hub."""
+        request = auth.request
+
+        async def counted_request(method: str, path: str, **kwargs):
+            self.record(classify_request(method, path))
+            return await request(method, path, **kwargs)
+
+        auth.request = counted_request
+
+    def record(self, kind: RequestKind, now: datetime | None = None) -> None:
+        """Record one request."""
+        now = now or dt_util.utcnow()
+        self._roll(now)
+        if self._first_request is None:
+            self._first_request = now
+        self._counts[kind] += 1
+        self._recent.append((now, kind))
+        if kind == RequestKind.STATE:
+            self.polls += 1
+
+    def as_dict(self, now: datetime | None = None) -> dict:
+        """The counts of the day, as stored."""
+        self._roll(now or dt_util.utcnow())
+        return {"day": self._day.isoformat(), "counts": dict(self._counts)}
+
+    def restore(self, data: dict, now: datetime | None = None) -> None:
+        """Add the stored counts, when they are of the current day."""
+        now = now or dt_util.utcnow()
+        self._roll(now)
+        if date.fromisoformat(data["day"]) != self._day:
+            return
+        for kind, count in data["counts"].items():
+            if kind in RequestKind:
+                self._counts[RequestKind(kind)] += count
+
+    def requests_today(
+        self, kind: RequestKind | None = None, now: datetime | None = None
+    ) -> int:
+        """Requests made today, in total or of one kind."""
+        self._roll(now or dt_util.utcnow())
+        if kind is None:
+            return self._counts.total()
+        return self._counts[kind]
+
+    def projected_today(self, now: datetime | None = None) -> int:
+        """Requests expected by the end of the day at the rate of the last hour."""
+        now = now or dt_util.utcnow()
+        rate = self._rate(now, lambda kind: True)
+        return round(self.requests_today(now=now) + rate * self.seconds_left(now))
+
+    def poll_allowance(self, now: datetime | None = None) -> float | None:
+        """State polls per hour that still fit in the daily budget.
+
+        The other requests (commands, map lookups, ...) are projected at
+        their rate of the last hour and take precedence over polling.
+        None when no budget is configured.
+        """
+        if not self.daily_budget:
+            return None
+        now = now or dt_util.utcnow()
+        seconds_left = self.seconds_left(now)
+        other_rate = self._rate(now, lambda kind: kind != RequestKind.STATE)
+        remaining = (
+            self.daily_budget - self.requests_today(now=now) - other_rate * seconds_left
+        )
+        return max(0.0, remaining / seconds_left * 3600)
+
+    def min_poll_interval(
+        self, polls: int, now: datetime | None = None
+    ) -> timedelta | None:
+        """The wait after a refresh of that many state polls to stay in budget."""
+        allowance = self.poll_allowance(now)
+        if allowance is None or not polls:
+            return None
+        seconds_left = self.seconds_left(now or dt_util.utcnow())
+        if allowance * seconds_left < polls * 3600:
+            # Not even one more refresh fits: wait for the quota to reset
+            return timedelta(seconds=seconds_left)
+        return timedelta(hours=polls / allowance)
+
+    @staticmethod
+    def seconds_left(now: datetime) -> float:
+        """Seconds until the quota resets at midnight UTC."""
+        now = dt_util.as_utc(now)
+        midnight = (now + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return max(1.0, (midnight - now).total_seconds())
+
+    def _rate(self, now: datetime, include) -> float:
+        """Requests per second over the last hour."""
+        self._roll(now)
+        if self._first_request is None:
+            return 0.0
+        window = min(RATE_WINDOW, max(MIN_RATE_WINDOW, now - self._first_request))
+        count = sum(1 for _, kind in self._recent if include(kind))
+        return count / window.total_seconds()
+
+    def _roll(self, now: datetime) -> None:
+        day = dt_util.as_utc(now).date()
+        if day != self._day:
+            self._day = day
+            self._counts.clear()
+        while self._recent and self._recent[0][0] <= now - RATE_WINDOW:
+            self._recent.popleft()
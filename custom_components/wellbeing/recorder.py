@@ -0,0 +1,105 @@
+"""Recording of the raw live stream traffic.
+
+With the "record_stream" option enabled, every event received from
+watch_appliances() is appended with its arrival time to a gzipped JSON lines
+file in the Home Assistant configuration directory, so stream-heavy
+slowdowns can be reproduced offline (see benchmarks/replay.py). The first
+line of a recording lists the appliances and their models, so a fake hub can
+serve the same account. Events are buffered and written in the executor.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+FLUSH_INTERVAL = timedelta(seconds=30)
+FLUSH_EVENTS = 500  # flush early when this many events are buffered
+MAX_RECORDING_BYTES = 50 * 1024 * 1024
+
+
+class StreamRecorder:
+    """Appends the live stream events of an account to a recording."""
+
+    def __init__(
+        self, hass: HomeAssistant, path: str, appliances: dict[str, str]
+    ) -> None:
+        self.hass = hass
+        self.path = path
+        self.recording = True
+        self._buffer: list[str] = []
+        self._lock = asyncio.Lock()
+        self._append({"appliances": appliances})
+        self._unsub_flush = async_track_time_interval(
+            hass, self._async_flush, FLUSH_INTERVAL
+        )
+
+    @callback
+    def record(self, event: dict) -> None:
+        """Record one stream event, as received."""
+        if not self.recording:
+            return
+        self._append({"event": event})
+        if len(self._buffer) >= FLUSH_EVENTS and not self._lock.locked():
+            self.hass.async_create_task(self._async_flush())
+
+    async def async_stop(self) -> None:
+        """Write what is buffered and stop recording."""
+        self._unsub_flush()
+        await self._async_flush()
+        self.recording = False
+
+    def _append(self, line: dict) -> None:
+        line["t"] = round(dt_util.utcnow().timestamp(), 3)
+        self._buffer.append(json.dumps(line, separators=(",", ":")))
+
+    async def _async_flush(self, now=None) -> None:
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            try:
+                size = await self.hass.async_add_executor_job(self._write, lines)
+            except OSError as exception:
+                _LOGGER.warning("Stopped recording the live stream: %s", exception)
+                self.recording = False
+                return
+            if size >= MAX_RECORDING_BYTES:
+                _LOGGER.warning(
+                    "Stopped recording the live stream, %s is full", self.path
+                )
+                self.recording = False
+
+    def _write(self, lines: list[str]) -> int:
+        # Every flush appends a gzip member; gzip.open reads them as one file
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        return os.path.getsize(self.path)
+
+
+def read_recording(path: str) -> tuple[dict[str, str], list[tuple[float, dict]]]:
+    """The appliances and the timed events of a recording.
+
+    A recording can span several runs (each appending a header line); the
+    appliances of all of them are merged.
+    """
+    appliances: dict[str, str] = {}
+    events = []
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if "appliances" in data:
+                appliances.update(data["appliances"])
+            elif "event" in data:
+                events.append((data["t"], data["event"]))
+    return appliances, events
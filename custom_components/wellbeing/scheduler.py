@@ -0,0 +1,130 @@
+"""Adaptive polling schedule for the appliances of an account.
+
+The scheduler learns, per appliance, how often a poll actually returns a
+changed reported state (an exponentially weighted change rate), and derives
+a poll interval from it: appliances whose state keeps changing (e.g. a
+purifier in Auto mode with a moving PM2.5 reading) are polled more often than
+the base interval, stable ones and appliances that are switched off less
+often. An optional request budget caps the polls per hour of the account by
+stretching all intervals evenly.
+
+Properties the live stream sends are left out: their changes arrive without
+polling, and the stream updates the polled state in place between polls.
+"""
+
+import copy
+from collections.abc import Collection
+from dataclasses import dataclass, field
+
+CHANGE_RATE_SMOOTHING = 0.2  # weight of the latest poll in the change rate
+MIN_FACTOR = 0.5  # volatile appliances: twice as often as the base interval
+MAX_FACTOR = 4.0  # stable or switched off appliances
+MIN_UPDATE_INTERVAL = 10  # seconds, lower bound of the coordinator timer
+DUE_SLACK = 2  # seconds; the coordinator timer fires with sub-second jitter
+
+
+@dataclass
+class _ApplianceSchedule:
+    change_rate: float = 1 / 3  # unknown appliances start at the base interval
+    last_poll: float | None = None
+    last_state: dict = field(default_factory=dict)
+    active: bool = False
+    off: bool = False
+
+
+class AdaptiveScheduler:
+    """Decides which appliances are due for a poll."""
+
+    def __init__(
+        self,
+        base_interval: float,
+        active_interval: float,
+        request_budget: int | None = None,
+    ) -> None:
+        self.base_interval = base_interval
+        self.active_interval = active_interval
+        self.request_budget = request_budget  # polls per hour, None = unlimited
+        self._appliances: dict[str, _ApplianceSchedule] = {}
+
+    def observe(
+        self,
+        appliance_id: str,
+        state: dict,
+        now: float,
+        *,
+        streamed: Collection[str] = (),
+        active: bool = False,
+        off: bool = False,
+    ) -> None:
+        """Record the reported state returned by a poll of the appliance.
+
+        streamed are the properties the live stream sends, which are not
+        compared. active pins the appliance to the active interval (e.g. a
+        vacuum on a cleaning session), off stretches it to the longest
+        interval.
+        """
+        schedule = self._appliances.setdefault(appliance_id, _ApplianceSchedule())
+        # A copy, as the state is updated in place (nested values included)
+        polled_state = copy.deepcopy(
+            {name: value for name, value in state.items() if name not in streamed}
+        )
+        if schedule.last_poll is not None:
+            changed = float(polled_state != schedule.last_state)
+            schedule.change_rate += CHANGE_RATE_SMOOTHING * (
+                changed - schedule.change_rate
+            )
+        schedule.last_poll = now
+        schedule.last_state = polled_state
+        schedule.active = active
+        schedule.off = off
+
+    def defer(self, appliance_id: str, now: float) -> None:
+        """Restart the interval of an appliance whose poll failed.
+
+        Nothing is learnt from a failed poll, but the appliance must not keep
+        the coordinator timer at its minimum while it is retried elsewhere.
+        """
+        if (schedule := self._appliances.get(appliance_id)) is not None:
+            schedule.last_poll = now
+
+    def interval(self, appliance_id: str) -> float:
+        """The poll interval of the appliance in seconds, within the budget."""
+        return self._interval(self._appliances.get(appliance_id)) * self._budget_scale()
+
+    def is_due(self, appliance_id: str, now: float) -> bool:
+        """Whether the appliance should be polled now."""
+        schedule = self._appliances.get(appliance_id)
+        if schedule is None or schedule.last_poll is None:
+            return True
+        return now + DUE_SLACK >= schedule.last_poll + self.interval(appliance_id)
+
+    def next_update_in(self, now: float) -> float:
+        """Seconds until the next appliance is due for a poll."""
+        scale = self._budget_scale()
+        due_in = [
+            schedule.last_poll + self._interval(schedule) * scale - now
+            for schedule in self._appliances.values()
+            if schedule.last_poll is not None
+        ]
+        if not due_in:
+            return self.base_interval
+        return max(MIN_UPDATE_INTERVAL, min(due_in))
+
+    def _interval(self, schedule: _ApplianceSchedule | None) -> float:
+        if schedule is None:
+            return self.base_interval
+        if schedule.active:
+            return self.active_interval
+        if schedule.off:
+            return self.base_interval * MAX_FACTOR
+        # change rate 0 -> MAX_FACTOR, 1/3 -> base interval, >= 1/2 -> MIN_FACTOR
+        factor = 2 ** (2 - 6 * schedule.change_rate)
+        return self.base_interval * min(MAX_FACTOR, max(MIN_FACTOR, factor))
+
+    def _budget_scale(self) -> float:
+        if not self.request_budget or not self._appliances:
+            return 1.0
+        polls_per_hour = sum(
+            3600 / self._interval(schedule) for schedule in self._appliances.values()
+        )
+        return max(1.0, polls_per_hour / self.request_budget)
@@ -1,18 +1,109 @@
 """Sensor platform for Wellbeing."""
 
-from typing import cast
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, cast
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.const import Platform
+from homeassistant.const import EntityCategory, Platform, UnitOfTime
 from homeassistant.util.percentage import ranged_value_to_percentage
 
+from . import WellbeingDataUpdateCoordinator
 from .api import ApplianceSensor
 from .const import DOMAIN
-from .entity import WellbeingEntity
+from .entity import WellbeingAccountEntity, WellbeingEntity
+from .quota import RequestKind
+from .timing import Stage
+
+
+@dataclass(frozen=True, kw_only=True)
+class WellbeingAccountSensorDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor of the account."""
+
+    value_fn: Callable[[WellbeingDataUpdateCoordinator], Any]
+
+
+STREAM_SENSORS = (
+    WellbeingAccountSensorDescription(
+        key="stream_last_event",
+        name="Live stream last event",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.stream_health.last_event,
+    ),
+    WellbeingAccountSensorDescription(
+        key="stream_reconnects",
+        name="Live stream reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.stream_health.reconnects,
+    ),
+)
+
+QUOTA_SENSORS = (
+    WellbeingAccountSensorDescription(
+        key="api_requests_today",
+        name="API requests today",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.accounting.requests_today(),
+    ),
+    WellbeingAccountSensorDescription(
+        key="api_requests_projected",
+        name="API requests projected today",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda coordinator: coordinator.accounting.projected_today(),
+    ),
+    *(
+        WellbeingAccountSensorDescription(
+            key=f"api_requests_{kind}",
+            name=f"API requests today ({kind})",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            value_fn=lambda coordinator, kind=kind: (
+                coordinator.accounting.requests_today(kind)
+            ),
+        )
+        for kind in (
+            RequestKind.STATE,
+            RequestKind.COMMAND,
+            RequestKind.MAP,
+            RequestKind.LIVESTREAM,
+        )
+    ),
+)
+
+TIMING_SENSORS = tuple(
+    WellbeingAccountSensorDescription(
+        key=f"timing_{stage}",
+        name=f"{name} time (p95)",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator, stage=stage: coordinator.api.timings.percentile(
+            stage
+        ),
+    )
+    for stage, name in (
+        (Stage.REFRESH, "Refresh"),
+        (Stage.LOAD, "Appliance list"),
+        (Stage.POLL, "Poll"),
+        (Stage.SETUP, "Appliance setup"),
+        (Stage.STREAM_UPDATE, "Live stream update"),
+        (Stage.FAN_OUT, "Entity update"),
+        (Stage.RENDER_MAP, "Map render"),
+        (Stage.ENCODE_MAP, "Map encoding"),
+        (Stage.COMMAND, "Command"),
+    )
+)
 
 
 async def async_setup_entry(hass, entry, async_add_devices):
@@ -32,6 +123,21 @@ async def async_setup_entry(hass, entry, async_add_devices):
                 ]
             )
 
+    async_add_devices(
+        [
+            WellbeingAccountSensor(coordinator, entry, description)
+            for description in (*QUOTA_SENSORS, *TIMING_SENSORS)
+        ]
+    )
+
+    if coordinator.api.use_stream:
+        async_add_devices(
+            [
+                WellbeingAccountSensor(coordinator, entry, description)
+                for description in STREAM_SENSORS
+            ]
+        )
+
 
 class WellbeingSensor(WellbeingEntity, SensorEntity):
     """wellbeing Sensor class."""
@@ -53,3 +159,14 @@ class WellbeingSensor(WellbeingEntity, SensorEntity):
     @property
     def state_class(self) -> SensorStateClass | str | None:
         return self.get_entity.state_class
+
+
+class WellbeingAccountSensor(WellbeingAccountEntity, SensorEntity):
+    """Diagnostic sensor of the account."""
+
+    entity_description: WellbeingAccountSensorDescription
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator)
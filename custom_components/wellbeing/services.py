@@ -0,0 +1,257 @@
+"""Services of the Wellbeing integration."""
+
+import cProfile
+import pstats
+import time
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION, DOMAIN
+from .map_data import MapData
+from .map_renderer import ROBOT_MARKER_NONE, map_pixel_budget, render_map
+
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+SERVICE_LIST_SESSIONS = "list_sessions"
+SERVICE_RENDER_SESSION = "render_session"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_REFRESHES = "refreshes"
+ATTR_MAP_RENDERS = "map_renders"
+ATTR_SESSION_ID = "session_id"
+ATTR_APPLIANCE = "appliance"
+TOP_FUNCTIONS = 40  # in the written summary
+TOP_FUNCTIONS_RESPONSE = 10
+
+PROFILE_REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_REFRESHES, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=20)
+        ),
+        vol.Optional(ATTR_MAP_RENDERS, default=0): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=20)
+        ),
+    }
+)
+LIST_SESSIONS_SCHEMA = vol.Schema({vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string})
+RENDER_SESSION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_SESSION_ID): cv.string,
+        vol.Optional(ATTR_APPLIANCE): cv.string,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_REFRESH,
+        _async_profile_refresh,
+        schema=PROFILE_REFRESH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_LIST_SESSIONS,
+        _async_list_sessions,
+        schema=LIST_SESSIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RENDER_SESSION,
+        _async_render_session,
+        schema=RENDER_SESSION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _loaded_coordinator(call: ServiceCall):
+    """The coordinator of the config entry the service is called for."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    entry = call.hass.config_entries.async_get_entry(entry_id)
+    if (
+        entry is None
+        or entry.domain != DOMAIN
+        or entry.state is not ConfigEntryState.LOADED
+    ):
+        raise ServiceValidationError(f"Config entry {entry_id} is not loaded")
+    return call.hass.data[DOMAIN][entry_id]
+
+
+async def _async_profile_refresh(call: ServiceCall) -> ServiceResponse:
+    """Run coordinator refreshes and map renders under cProfile.
+
+    The refreshes are profiled on the event loop, so anything else running
+    on the loop meanwhile shows up too; time waiting for the network shows
+    as the event loop polling for events. The map renders are profiled in
+    the executor, where the camera runs them.
+    """
+    hass = call.hass
+    coordinator = _loaded_coordinator(call)
+
+    refresh_profile = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        refresh_profile.enable()
+    except ValueError as exception:
+        raise HomeAssistantError(f"Cannot profile: {exception}") from exception
+    try:
+        for _ in range(call.data[ATTR_REFRESHES]):
+            await coordinator.async_refresh()
+    finally:
+        refresh_profile.disable()
+    refresh_seconds = time.perf_counter() - start
+
+    profiles = [refresh_profile]
+    map_renders = 0
+    if call.data[ATTR_MAP_RENDERS]:
+        maps = [
+            appliance.reported_state["mapData"]
+            for appliance in coordinator.data["appliances"].appliances.values()
+            if isinstance(
+                getattr(appliance, "reported_state", {}).get("mapData"), MapData
+            )
+        ]
+        rotation = coordinator.config_entry.options.get(
+            CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
+        )
+        max_pixels = map_pixel_budget(coordinator.config_entry.options)
+        for map_data in maps:
+            for _ in range(call.data[ATTR_MAP_RENDERS]):
+                profiles.append(
+                    await hass.async_add_executor_job(
+                        _profile_render, map_data, float(rotation), max_pixels
+                    )
+                )
+                map_renders += 1
+
+    path = hass.config.path(
+        f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    header = (
+        f"{call.data[ATTR_REFRESHES]} refreshes in {refresh_seconds:.3f} s,"
+        f" {map_renders} map renders"
+    )
+    top_functions = await hass.async_add_executor_job(
+        _write_profile, path, header, profiles
+    )
+    return {
+        "profile": f"{path}.prof",
+        "summary": f"{path}.txt",
+        "refresh_seconds": round(refresh_seconds, 3),
+        "map_renders": map_renders,
+        "top_functions": top_functions,
+    }
+
+
+async def _async_list_sessions(call: ServiceCall) -> ServiceResponse:
+    """List the archived cleaning sessions of an account, newest first."""
+    archive = _loaded_coordinator(call).session_archive
+    sessions = archive.sessions if archive is not None else []
+    return {
+        "sessions": [
+            {key: value for key, value in session.items() if key != "file"}
+            for session in reversed(sessions)
+        ]
+    }
+
+
+async def _async_render_session(call: ServiceCall) -> ServiceResponse:
+    """Render the map of an archived cleaning session to a PNG file."""
+    hass = call.hass
+    coordinator = _loaded_coordinator(call)
+    archive = coordinator.session_archive
+    session_id = call.data[ATTR_SESSION_ID]
+    session = (
+        archive.find(session_id, call.data.get(ATTR_APPLIANCE))
+        if archive is not None
+        else None
+    )
+    if session is None:
+        raise ServiceValidationError(f"No archived cleaning session {session_id}")
+    try:
+        map_data = await archive.async_load_session(session)
+    except (OSError, ValueError) as exception:
+        raise HomeAssistantError(
+            f"Cannot read cleaning session {session_id}: {exception}"
+        ) from exception
+    rotation = coordinator.config_entry.options.get(
+        CONF_MAP_ROTATION, DEFAULT_MAP_ROTATION
+    )
+    map_image = await hass.async_add_executor_job(
+        render_map,
+        {"mapData": map_data},
+        float(rotation),
+        ROBOT_MARKER_NONE,
+        map_pixel_budget(coordinator.config_entry.options),
+    )
+    if map_image is None:
+        raise HomeAssistantError(f"Cleaning session {session_id} has no map")
+    path = hass.config.path(f"{DOMAIN}_session_{slugify(session_id)}.png")
+    await hass.async_add_executor_job(_write_file, path, map_image.image)
+    return {
+        "image": path,
+        "calibration_points": map_image.calibration_points,
+    }
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def _profile_render(
+    map_data: MapData, rotation: float, max_pixels: int
+) -> cProfile.Profile:
+    # Without a geometry cache, every render is profiled as a whole
+    profile = cProfile.Profile()
+    profile.runcall(
+        render_map, {"mapData": map_data}, rotation, ROBOT_MARKER_NONE, max_pixels
+    )
+    return profile
+
+
+def _write_profile(
+    path: str, header: str, profiles: list[cProfile.Profile]
+) -> list[dict[str, Any]]:
+    """Write the profile (for pstats or snakeviz) and a text summary.
+
+    Returns the functions with the most time spent in them.
+    """
+    stats = pstats.Stats(*profiles)
+    stats.dump_stats(f"{path}.prof")
+    with open(f"{path}.txt", "w", encoding="utf-8") as file:
+        file.write(f"{header}\n\n")
+        stats.stream = file
+        file.write("Top functions by cumulative time\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        file.write("Top functions by own time\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS)
+
+    by_own_time = sorted(
+        stats.stats.items(), key=lambda item: item[1][2], reverse=True
+    )[:TOP_FUNCTIONS_RESPONSE]
+    return [
+        {
+            "function": pstats.func_std_string(function),
+            "calls": calls,
+            "own_seconds": round(own_time, 4),
+            "cumulative_seconds": round(cumulative_time, 4),
+        }
+        for function, (_, calls, own_time, cumulative_time, _) in by_own_time
+    ]
@@ -0,0 +1,277 @@
+"""Local archive of the cleaning sessions of robot vacuums.
+
+The camera only keeps the crumb trail of the cleaning session it shows. When
+the next session starts, it hands the finished one (crumbs, transforms,
+charger poses and the last reported cleaningSession statistics) to the
+SessionArchive of the account and drops it. Each session is written to a
+file of its own: the crumbs as columns of deltas in millimetres (a pixel of
+the map is about 8 mm), compressed with zlib, which takes a session of tens
+of thousands of crumbs to tens of kilobytes. The index of the sessions is a
+Store; only the newest sessions of each appliance are kept.
+
+Every finished session is also added to the CoverageGrid of its appliance,
+next to the sessions, whether or not the session itself is kept. Closing
+the archive waits for the sessions being archived; after that, the archive
+takes no more sessions and opens no more grids.
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import shutil
+import struct
+import sys
+import zlib
+from array import array
+from functools import partial
+from itertools import accumulate
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DEFAULT_SESSION_ARCHIVE, DOMAIN
+from .coverage import CoverageGrid
+from .map_data import CrumbTrail, MapData
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+STORAGE_VERSION = 1
+FORMAT_VERSION = 1
+QUANTUM = 0.001  # metres per stored unit
+_PREFIX = struct.Struct("<BI")  # format version, length of the JSON header
+
+
+def encode_session(map_data: MapData) -> bytes:
+    """The compressed form of the map data of a finished session."""
+    crumbs = map_data.crumbs
+    header = dataclasses.replace(
+        map_data, crumbs=CrumbTrail(), delta=False, robot_pose=None
+    ).as_dict()
+    header["crumbCount"] = len(crumbs)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    columns = (
+        _deltas(round(x / QUANTUM) for x in crumbs.x),
+        _deltas(round(y / QUANTUM) for y in crumbs.y),
+        _deltas(crumbs.frame),
+    )
+    return zlib.compress(
+        _PREFIX.pack(FORMAT_VERSION, len(header_bytes))
+        + header_bytes
+        + b"".join(_little_endian(column).tobytes() for column in columns),
+        level=9,
+    )
+
+
+def decode_session(data: bytes) -> MapData:
+    """The map data of an archived session, positions rounded to millimetres."""
+    raw = zlib.decompress(data)
+    version, header_length = _PREFIX.unpack_from(raw)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported session format {version}")
+    offset = _PREFIX.size
+    header = json.loads(raw[offset : offset + header_length])
+    offset += header_length
+    columns = []
+    for _ in range(3):
+        column = array("i")
+        end = offset + header["crumbCount"] * column.itemsize
+        column.frombytes(raw[offset:end])
+        offset = end
+        columns.append(array("i", accumulate(_little_endian(column))))
+    xs, ys, frames = columns
+    return dataclasses.replace(
+        MapData.from_reported(header),
+        crumbs=CrumbTrail(
+            array("d", (x * QUANTUM for x in xs)),
+            array("d", (y * QUANTUM for y in ys)),
+            frames,
+        ),
+    )
+
+
+def _deltas(values) -> array:
+    column = array("i")
+    previous = 0
+    for value in values:
+        column.append(value - previous)
+        previous = value
+    return column
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+class SessionArchive:
+    """The archived cleaning sessions of the robot vacuums of an account."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        max_sessions: int = DEFAULT_SESSION_ARCHIVE,
+    ) -> None:
+        self.hass = hass
+        self.max_sessions = max_sessions  # per appliance
+        self.path = hass.config.path(STORAGE_DIR, f"{DOMAIN}_sessions", entry_id)
+        self.sessions: list[dict] = []  # oldest first
+        self._coverage: dict[str, CoverageGrid] = {}
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.sessions.{entry_id}")
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._adding: set[asyncio.Future] = set()  # the async_add in progress
+
+    async def async_load(self) -> None:
+        """Load the index of the archived sessions."""
+        if data := await self._store.async_load():
+            self.sessions = data["sessions"]
+
+    async def async_add(
+        self, pnc_id: str, map_data: MapData, stats: dict | None
+    ) -> None:
+        """Archive a finished session, removing the oldest beyond the limit."""
+        if not map_data.crumbs:
+            return
+        if self._closed:
+            _LOGGER.debug(
+                "Not archiving cleaning session %s, the archive is closed",
+                map_data.session_id,
+            )
+            return
+        done = self.hass.loop.create_future()
+        self._adding.add(done)
+        try:
+            await self._async_add(pnc_id, map_data, stats)
+        finally:
+            self._adding.discard(done)
+            done.set_result(None)
+
+    async def _async_add(
+        self, pnc_id: str, map_data: MapData, stats: dict | None
+    ) -> None:
+        grid = await self._async_open_coverage(pnc_id)
+        try:
+            await self.hass.async_add_executor_job(grid.add, map_data)
+        except OSError as exception:
+            _LOGGER.warning(
+                "Could not update the coverage of %s: %s", pnc_id, exception
+            )
+        if not self.max_sessions:
+            return
+        file_name = f"{slugify(f'{pnc_id}_{map_data.session_id}')}.bin"
+        async with self._lock:
+            try:
+                size = await self.hass.async_add_executor_job(
+                    self._write, file_name, map_data
+                )
+            except OSError as exception:
+                _LOGGER.warning(
+                    "Could not archive cleaning session %s: %s",
+                    map_data.session_id,
+                    exception,
+                )
+                return
+            sessions = [
+                session for session in self.sessions if session["file"] != file_name
+            ]
+            sessions.append(
+                {
+                    "appliance": pnc_id,
+                    "session_id": map_data.session_id,
+                    "timestamp": map_data.timestamp,
+                    "archived": dt_util.utcnow().isoformat(),
+                    "crumbs": len(map_data.crumbs),
+                    "bytes": size,
+                    "file": file_name,
+                    "stats": stats,
+                }
+            )
+            own = [session for session in sessions if session["appliance"] == pnc_id]
+            expired = own[: -self.max_sessions]
+            self.sessions = [session for session in sessions if session not in expired]
+            if expired:
+                await self.hass.async_add_executor_job(
+                    self._delete, [session["file"] for session in expired]
+                )
+            await self._store.async_save({"sessions": self.sessions})
+        _LOGGER.debug(
+            "Archived cleaning session %s of %s: %s crumbs in %s bytes",
+            map_data.session_id,
+            pnc_id,
+            len(map_data.crumbs),
+            size,
+        )
+
+    def find(self, session_id: str, pnc_id: str | None = None) -> dict | None:
+        """The newest archived session with the id, of the appliance if given."""
+        return next(
+            (
+                session
+                for session in reversed(self.sessions)
+                if session["session_id"] == session_id
+                and pnc_id in (None, session["appliance"])
+            ),
+            None,
+        )
+
+    async def async_load_session(self, session: dict) -> MapData:
+        """Read the map data of an archived session (see find)."""
+        return await self.hass.async_add_executor_job(self._read, session["file"])
+
+    async def async_coverage(self, pnc_id: str) -> CoverageGrid:
+        """The coverage grid of an appliance, opened on first use."""
+        if self._closed:
+            raise HomeAssistantError("The session archive is closed")
+        return await self._async_open_coverage(pnc_id)
+
+    async def _async_open_coverage(self, pnc_id: str) -> CoverageGrid:
+        if (grid := self._coverage.get(pnc_id)) is None:
+            grid = await self.hass.async_add_executor_job(
+                CoverageGrid, os.path.join(self.path, f"{slugify(pnc_id)}.coverage")
+            )
+            if pnc_id in self._coverage:  # opened meanwhile
+                await self.hass.async_add_executor_job(grid.close)
+            grid = self._coverage.setdefault(pnc_id, grid)
+        return grid
+
+    async def async_close(self) -> None:
+        """Close the coverage grids, when the config entry is unloaded."""
+        self._closed = True
+        if self._adding:
+            await asyncio.wait(self._adding)
+        grids = list(self._coverage.values())
+        self._coverage.clear()
+        for grid in grids:
+            await self.hass.async_add_executor_job(grid.close)
+
+    async def async_remove(self) -> None:
+        """Remove the archive, with its config entry."""
+        await self.async_close()
+        await self._store.async_remove()
+        await self.hass.async_add_executor_job(
+            partial(shutil.rmtree, self.path, ignore_errors=True)
+        )
+
+    def _write(self, file_name: str, map_data: MapData) -> int:
+        data = encode_session(map_data)
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, file_name), "wb") as file:
+            file.write(data)
+        return len(data)
+
+    def _read(self, file_name: str) -> MapData:
+        with open(os.path.join(self.path, file_name), "rb") as file:
+            return decode_session(file.read())
+
+    def _delete(self, file_names: list[str]) -> None:
+        for file_name in file_names:
+            try:
+                os.remove(os.path.join(self.path, file_name))
+            except FileNotFoundError:
+                pass
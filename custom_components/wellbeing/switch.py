@@ -2,7 +2,7 @@
 
 from homeassistant.components.switch import SwitchEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, SWITCH_CAPABILITIES
 from .entity import WellbeingEntity
 
 
@@ -10,7 +10,6 @@ async def async_setup_entry(hass, entry, async_add_devices):
     """Setup switch platform."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
     appliances = coordinator.data.get("appliances", None)
-    capabilities = ["Ionizer", "UILight", "SafetyLock"]
 
     if appliances is not None:
         for pnc_id, appliance in appliances.appliances.items():
@@ -18,7 +17,7 @@ async def async_setup_entry(hass, entry, async_add_devices):
             async_add_devices(
                 [
                     WellbeingSwitch(coordinator, entry, pnc_id, capability)
-                    for capability in capabilities
+                    for capability in SWITCH_CAPABILITIES
                     if appliance.has_capability(capability)
                 ]
             )
@@ -0,0 +1,122 @@
+"""Timing of the hot paths of the integration.
+
+The stages below are timed for every call, per appliance where they concern
+one, over a rolling window of the last calls. The percentiles are available
+in the diagnostics download and, for all appliances together, as disabled
+diagnostic sensors of the account. The caches on these paths count their
+hits for the diagnostics as well.
+"""
+
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import StrEnum
+from math import ceil
+
+WINDOW = 200  # calls per stage and appliance
+
+
+class Stage(StrEnum):
+    REFRESH = "refresh"  # a coordinator refresh, all of the below included
+    LOAD = "load"  # fetching the appliance list (_ensure_loaded)
+    POLL = "poll"  # polling the state of an appliance
+    SETUP = "setup"  # Appliance.setup, from a poll or a stream event
+    STREAM_UPDATE = "stream_update"  # applying a live stream event
+    FAN_OUT = "fan_out"  # notifying the entities of new data
+    RENDER_MAP = "render_map"  # drawing the vacuum map
+    ENCODE_MAP = "encode_map"  # encoding the map as PNG
+    COMMAND = "command"  # sending a command
+
+
+class StageTimings:
+    """Rolling timings per stage and appliance."""
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self._window = window
+        self._samples: dict[Stage, dict[str | None, deque[float]]] = {}
+
+    @contextmanager
+    def measure(self, stage: Stage, appliance_id: str | None = None) -> Iterator[None]:
+        """Time the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, appliance_id)
+
+    def add(
+        self, stage: Stage, seconds: float, appliance_id: str | None = None
+    ) -> None:
+        """Record the duration of one call."""
+        per_appliance = self._samples.setdefault(stage, {})
+        if (samples := per_appliance.get(appliance_id)) is None:
+            samples = per_appliance[appliance_id] = deque(maxlen=self._window)
+        samples.append(seconds)
+
+    def percentile(self, stage: Stage, point: int = 95) -> float | None:
+        """Percentile of a stage over all appliances, in milliseconds."""
+        samples = [
+            sample
+            for per_appliance in self._samples.get(stage, {}).values()
+            for sample in per_appliance
+        ]
+        if not samples:
+            return None
+        return _percentiles(samples, point)[f"p{point}"]
+
+    def latest(self, stage: Stage) -> float | None:
+        """Duration of the last call of a stage not tied to an appliance, in ms."""
+        samples = self._samples.get(stage, {}).get(None)
+        if not samples:
+            return None
+        return round(samples[-1] * 1000, 2)
+
+    def as_dict(self) -> dict:
+        """The percentiles of every stage, per appliance, in milliseconds."""
+        return {
+            stage: {
+                appliance_id or "all": {
+                    "calls": len(samples),
+                    **_percentiles(samples, 50, 95, 99),
+                }
+                for appliance_id, samples in per_appliance.items()
+            }
+            for stage, per_appliance in self._samples.items()
+        }
+
+
+@dataclass
+class CacheStats:
+    """Hits and misses of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+def _percentiles(samples, *points: int) -> dict[str, float]:
+    """Nearest-rank percentiles and maximum of durations, in milliseconds."""
+    ordered = sorted(samples)
+    result = {
+        f"p{point}": round(
+            ordered[max(1, ceil(point / 100 * len(ordered))) - 1] * 1000, 2
+        )
+        for point in points
+    }
+    result["max"] = round(ordered[-1] * 1000, 2)
+    return result
@@ -0,0 +1,162 @@
+"""HTTP views of the Wellbeing integration, serving the vacuum map cameras.
+
+The camera proxy of Home Assistant sends the whole image on every request.
+MapImageView serves the same image, with the same authentication (including
+the ``token`` of the camera), but with an ETag derived from what the image
+was rendered from: a client that sends it back in ``If-None-Match`` gets a
+304 Not Modified as long as the map has not changed, e.g. while the robot is
+docked, and neither the image nor its rendering is repeated.
+
+async_stream_map serves the MJPEG-style stream of a map camera (as
+multipart/x-mixed-replace, with PNG frames): rather than fetching an image
+at a fixed interval, it sends a frame when the camera has rendered a new
+one, at most at the configured frame rate, and repeats the last frame
+every STREAM_KEEPALIVE seconds so the connection is not dropped as idle.
+
+MapTilesView serves the tile pyramids of the cameras (see map_tiles), for
+cards that zoom into the map, each tile with an ETag of its own.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections.abc import Hashable
+from http import HTTPStatus
+
+from aiohttp import hdrs, web
+from homeassistant.components.camera import Camera, CameraView
+from homeassistant.components.camera.const import DATA_COMPONENT
+from homeassistant.const import CONTENT_TYPE_MULTIPART
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.http import KEY_HASS
+
+from .const import DATA_VIEWS, DOMAIN
+
+STREAM_KEEPALIVE = 30  # seconds between frames of an unchanged map
+
+
+@callback
+def async_register_views(hass: HomeAssistant) -> None:
+    """Register the views, once the camera platform is set up."""
+    if hass.http is None or hass.data[DOMAIN].get(DATA_VIEWS):
+        return
+    hass.data[DOMAIN][DATA_VIEWS] = True
+    hass.http.register_view(MapImageView(hass.data[DATA_COMPONENT]))
+    hass.http.register_view(MapTilesView(hass.data[DATA_COMPONENT]))
+
+
+def render_etag(render_key: Hashable, content_type: str) -> str:
+    """The ETag of an image rendered from render_key, stable across restarts."""
+    digest = hashlib.blake2b(
+        repr((render_key, content_type)).encode(), digest_size=12
+    ).hexdigest()
+    return f"{DOMAIN}-{digest}"
+
+
+class MapImageView(CameraView):
+    """The image of a vacuum map camera, with conditional requests."""
+
+    url = f"/api/{DOMAIN}/map/{{entity_id}}"
+    name = f"api:{DOMAIN}:map"
+
+    async def handle(self, request: web.Request, camera: Camera) -> web.Response:
+        """Serve the map image, or 304 if the client has it already."""
+        if not hasattr(camera, "async_map_image"):
+            raise web.HTTPNotFound
+        map_image, render_key = await camera.async_map_image()
+        if map_image is None:
+            raise web.HTTPNotFound
+        return _conditional_response(
+            request,
+            map_image.image,
+            camera.content_type,
+            render_etag(render_key, camera.content_type),
+        )
+
+
+class MapTilesView(CameraView):
+    """The tiles of a vacuum map camera (see map_tiles), or their layout.
+
+    Without a ``zoom`` query parameter, the layout of the tiles is returned
+    as JSON: the tile size and, per zoom level, its scale, the range of the
+    x and y of its tiles and its calibration points. With ``zoom``, ``x``
+    and ``y``, the PNG of that tile, with an ETag as MapImageView.
+    """
+
+    url = f"/api/{DOMAIN}/map_tiles/{{entity_id}}"
+    name = f"api:{DOMAIN}:map_tiles"
+
+    async def handle(self, request: web.Request, camera: Camera) -> web.Response:
+        """Serve the layout of the tiles, or a tile."""
+        if not hasattr(camera, "async_map_tiles"):
+            raise web.HTTPNotFound
+        tiles = await camera.async_map_tiles()
+        if tiles is None:
+            raise web.HTTPNotFound
+        # The tiles are drawn in the executor
+        hass = request.app[KEY_HASS]
+        if "zoom" not in request.query:
+            metadata = await hass.async_add_executor_job(tiles.metadata)
+            if metadata is None:
+                raise web.HTTPNotFound
+            return self.json(metadata, headers={hdrs.CACHE_CONTROL: "no-cache"})
+        try:
+            zoom, x, y = (int(request.query[name]) for name in ("zoom", "x", "y"))
+        except (KeyError, ValueError) as exception:
+            raise web.HTTPBadRequest from exception
+        if (tile := await hass.async_add_executor_job(tiles.tile, zoom, x, y)) is None:
+            raise web.HTTPNotFound
+        data, tile_key = tile
+        return _conditional_response(
+            request, data, "image/png", render_etag((tile_key, zoom, x, y), "image/png")
+        )
+
+
+def _conditional_response(
+    request: web.Request, body: bytes, content_type: str, etag: str
+) -> web.Response:
+    """The body with its ETag, or 304 if the client has it already."""
+    # Clients may keep the body, but have to revalidate it every time
+    headers = {hdrs.CACHE_CONTROL: "no-cache"}
+    if any(tag.value in (etag, "*") for tag in request.if_none_match or ()):
+        response = web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+    else:
+        response = web.Response(body=body, content_type=content_type, headers=headers)
+    response.etag = etag
+    return response
+
+
+async def async_stream_map(
+    request: web.Request, camera: Camera, max_fps: float
+) -> web.StreamResponse:
+    """Stream the map of a camera, a frame per new render (see the module)."""
+    response = web.StreamResponse()
+    response.content_type = CONTENT_TYPE_MULTIPART.format("--frameboundary")
+    await response.prepare(request)
+    last_key = None
+    while True:
+        last_frame = time.monotonic()
+        map_image, render_key = await camera.async_map_image()
+        rendered = camera.next_render  # before writing, not to miss one
+        if map_image is not None:
+            frame = (
+                (
+                    "--frameboundary\r\n"
+                    f"Content-Type: {camera.content_type}\r\n"
+                    f"Content-Length: {len(map_image.image)}\r\n\r\n"
+                ).encode()
+                + map_image.image
+                + b"\r\n"
+            )
+            await response.write(frame)
+            if render_key != last_key:
+                # Browsers show a frame once the next one has arrived
+                await response.write(frame)
+                last_key = render_key
+        try:
+            async with asyncio.timeout(STREAM_KEEPALIVE):
+                await rendered.wait()
+        except TimeoutError:
+            pass
+        if (delay := last_frame + 1 / max_fps - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
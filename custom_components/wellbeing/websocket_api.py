@@ -0,0 +1,137 @@
+"""Websocket API of the Wellbeing integration: live vacuum map updates.
+
+``wellbeing/map/subscribe`` subscribes to the map of a WellbeingCamera.
+Rather than downloading the rendered PNG again on every change, a card gets
+the geometry of the cleaning session once and then only what changed:
+
+- ``session``: the whole trail of the session, as runs of ``[x0, y0, x1, y1,
+  ...]`` in the persistent map frame (metres), the charger and robot poses
+  (``[x, y, heading]``), the robot marker and the calibration points of the
+  camera image. Sent on subscribing and whenever the trail is not an
+  extension of what was sent, e.g. for a new session.
+- ``crumbs``: the runs of the crumbs added to the trail; ``continues`` tells
+  whether the first of them continues the last run sent.
+- ``pose``: the robot pose and marker, when they changed.
+- ``calibration``: the calibration points, when the image extent changed.
+"""
+
+import dataclasses
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN
+from .map_data import CrumbTrail, MapData
+from .map_renderer import GeometryCache, crumb_runs, map_geometry
+
+PRECISION = 3  # decimals of the coordinates, millimetres
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the websocket commands of the integration."""
+    websocket_api.async_register_command(hass, ws_subscribe_map)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/map/subscribe",
+        vol.Required("entity_id"): cv.entity_id,
+    }
+)
+@callback
+def ws_subscribe_map(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Subscribe to the live map of a vacuum map camera."""
+    # Only loaded with the camera platform, for accounts with a robot
+    from homeassistant.components.camera.const import DATA_COMPONENT
+
+    component = hass.data.get(DATA_COMPONENT)
+    camera = component.get_entity(msg["entity_id"]) if component else None
+    if not hasattr(camera, "async_subscribe_map"):
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            f"{msg['entity_id']} is not a Wellbeing vacuum map",
+        )
+        return
+
+    @callback
+    def forward(message: dict) -> None:
+        connection.send_message(websocket_api.event_message(msg["id"], message))
+
+    connection.send_result(msg["id"])
+    connection.subscriptions[msg["id"]] = camera.async_subscribe_map(forward)
+
+
+def session_message(
+    map_data: MapData,
+    robot_marker: str,
+    calibration_points: list[dict],
+    geometry_cache: GeometryCache | None = None,
+) -> dict:
+    """The whole trail of the map data; CPU-bound for long trails."""
+    geometry = map_geometry(map_data, geometry_cache)
+    runs, begin = [], 0
+    for end in geometry.run_ends:
+        runs.append(_flat(zip(geometry.xs[begin:end], geometry.ys[begin:end])))
+        begin = end
+    return {
+        "type": "session",
+        "session_id": map_data.session_id,
+        "timestamp": map_data.timestamp,
+        "runs": runs,
+        "charger": _pose(geometry.charger),
+        "robot": _pose(geometry.robot),
+        "robot_marker": robot_marker,
+        "calibration_points": calibration_points,
+    }
+
+
+def crumbs_message(map_data: MapData, start: int) -> dict:
+    """The crumbs of the trail from start on (start > 0).
+
+    The runs are split with the crumb before start, so a run continuing
+    across the update is told apart from a new one.
+    """
+    crumbs = map_data.crumbs
+    tail = CrumbTrail(
+        crumbs.x[start - 1 :], crumbs.y[start - 1 :], crumbs.frame[start - 1 :]
+    )
+    runs = crumb_runs(dataclasses.replace(map_data, crumbs=tail))
+    continued = runs[0][1:]
+    if continued:
+        runs[0] = continued
+    else:
+        runs = runs[1:]
+    return {
+        "type": "crumbs",
+        "timestamp": map_data.timestamp,
+        "runs": [_flat(run) for run in runs],
+        "continues": bool(continued),
+    }
+
+
+def pose_message(map_data: MapData, robot_marker: str) -> dict:
+    """The robot pose (persistent map frame) and where the robot is drawn."""
+    robot_pose = map_data.robot_pose or {}
+    xya = robot_pose.get("xya", [])
+    return {
+        "type": "pose",
+        "robot": [round(v, PRECISION) for v in xya] if len(xya) == 3 else None,
+        "robot_marker": robot_marker,
+    }
+
+
+def _flat(points) -> list[float]:
+    return [round(v, PRECISION) for point in points for v in point]
+
+
+def _pose(pose: tuple | None) -> list[float] | None:
+    if pose is None:
+        return None
+    (x, y), heading = pose
+    return [round(x, PRECISION), round(y, PRECISION), round(heading, PRECISION)]
@@ -7,6 +7,7 @@ from aiohttp import ClientResponseError
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from homeassistant.const import Platform
+from pyelectroluxgroup.appliance import Appliance as ApiAppliance
 
 from custom_components.wellbeing.api import (
     Appliance,
@@ -161,6 +162,28 @@ def test_appliance_setup_muju():
     assert appliance.speed_range == (1, 3)
 
 
+def test_appliance_readwrite_capabilities():
+    """Test the readwrite capability list is only rebuilt when capabilities change."""
+    appliance = Appliance("AirPurifier", "pnc_muju", "Muju")
+    appliance.device = "AIR_PURIFIER"
+    capabilities = {
+        "UILight": {"access": "readwrite"},
+        "PM2_5": {"access": "read"},
+        "Workmode": {"access": "readwrite"},
+    }
+    appliance.setup({"Workmode": "Manual"}, capabilities)
+    readwrite = appliance.readwrite_capabilities
+    assert readwrite == ["UILight", "Workmode"]
+    assert appliance.has_capability("UILight")
+    assert not appliance.has_capability("PM2_5")
+
+    appliance.setup({"Workmode": "Auto"}, capabilities)
+    assert appliance.readwrite_capabilities is readwrite
+
+    appliance.setup({"Workmode": "Auto"}, {"SafetyLock": {"access": "readwrite"}})
+    assert appliance.readwrite_capabilities == ["SafetyLock"]
+
+
 def test_appliances_collection():
     """Test Appliances collection wrapper."""
     app1 = Appliance("A", "1", "PUREi9")
@@ -215,6 +238,79 @@ async def test_api_client_livestream():
     ha_appliance.setup.assert_called()
 
 
+@pytest.mark.asyncio
+async def test_api_client_snapshot_restore():
+    """Test appliances are restored from a snapshot and reconciled later."""
+    api_appliance = ApiAppliance(
+        {
+            "applianceId": "pnc_1",
+            "applianceName": "Purifier",
+            "applianceType": "Muju",
+        },
+        MagicMock(),
+    )
+    api_appliance.info_data = {
+        "brand": "AEG",
+        "serialNumber": "sn_1",
+        "deviceType": "AIR_PURIFIER",
+    }
+    api_appliance.capabilities_data = {"UILight": {"access": "readwrite"}}
+    api_appliance.state_data = {
+        "status": "enabled",
+        "connectionState": "Connected",
+        "properties": {"reported": {"Workmode": "Manual", "PM2_5": 3}},
+    }
+    mock_hub = AsyncMock()
+    mock_hub.async_get_appliances.return_value = [api_appliance]
+    client = WellbeingApiClient(mock_hub, use_stream=False)
+    await client._ensure_loaded()
+    snapshot = client.snapshot()
+
+    restored_client = WellbeingApiClient(mock_hub, use_stream=False)
+    appliances = restored_client.restore(snapshot)
+    appliance = appliances.get_appliance("pnc_1")
+    assert appliance.brand == "AEG"
+    assert appliance.has_capability("UILight")
+    assert appliance.get_entity(Platform.SENSOR, "PM2_5").state == 3
+    mock_hub.async_get_appliances.assert_awaited_once()
+
+    # The next update fetches the appliance list again, without losing the
+    # restored info of appliances that are not polled right away
+    listed = ApiAppliance(api_appliance.initial_data, MagicMock())
+    mock_hub.async_get_appliances.return_value = [listed]
+    appliances = await restored_client.async_get_appliances(lambda _: False)
+    assert mock_hub.async_get_appliances.await_count == 2
+    assert appliances.get_appliance("pnc_1").serialNumber == "sn_1"
+
+
+@pytest.mark.asyncio
+async def test_api_client_snapshot_without_map():
+    """Test the snapshot keeps the presence of the map, but not the map."""
+    api_appliance = ApiAppliance(
+        {"applianceId": "pnc_1", "applianceName": "Robot", "applianceType": "PUREi9"},
+        MagicMock(),
+    )
+    api_appliance.info_data = {"brand": "AEG", "deviceType": "ROBOTIC_VACUUM_CLEANER"}
+    api_appliance.capabilities_data = {}
+    map_data = {
+        "sessionId": "session_1",
+        "crumbs": [{"xy": [0.1, 0.2], "t": 0}] * 1000,
+    }
+    api_appliance.state_data = {
+        "properties": {"reported": {"batteryStatus": 5, "mapData": map_data}}
+    }
+    mock_hub = AsyncMock()
+    mock_hub.async_get_appliances.return_value = [api_appliance]
+    client = WellbeingApiClient(mock_hub, use_stream=False)
+    await client._ensure_loaded()
+
+    reported = client.snapshot()["appliances"][0]["state_data"]["properties"][
+        "reported"
+    ]
+    assert reported == {"batteryStatus": 5, "mapData": {}}
+    assert api_appliance.state_data["properties"]["reported"]["mapData"] == map_data
+
+
 @pytest.mark.asyncio
 async def test_api_client_update_error():
     """Test handling of client update errors."""
@@ -227,3 +323,85 @@ async def test_api_client_update_error():
     client = WellbeingApiClient(mock_hub, use_stream=False)
     with pytest.raises(ClientResponseError):
         await client._ensure_loaded()
+
+
+def _purifier(pnc_id: str) -> ApiAppliance:
+    appliance = ApiAppliance(
+        {"applianceId": pnc_id, "applianceName": pnc_id, "applianceType": "Muju"},
+        MagicMock(),
+    )
+    appliance.info_data = {
+        "brand": "AEG",
+        "serialNumber": pnc_id,
+        "deviceType": "AIR_PURIFIER",
+    }
+    appliance.capabilities_data = {}
+    appliance.state_data = {"properties": {"reported": {"PM2_5": 3}}}
+    return appliance
+
+
+@pytest.mark.asyncio
+async def test_api_client_poll_failure_isolated(monkeypatch):
+    """Test a failed poll only makes its own appliance stale."""
+    healthy, failing = _purifier("pnc_1"), _purifier("pnc_2")
+    mock_hub = AsyncMock()
+    mock_hub.async_get_appliances.return_value = [healthy, failing]
+    client = WellbeingApiClient(mock_hub, use_stream=False)
+
+    async def update_healthy():
+        healthy.state_data = {"properties": {"reported": {"PM2_5": 7}}}
+
+    healthy.async_update = AsyncMock(side_effect=update_healthy)
+    failing.async_update = AsyncMock(
+        side_effect=ClientResponseError(
+            request_info=MagicMock(), history=(), status=500, message="Error"
+        )
+    )
+    now = 1000.0
+    monkeypatch.setattr("custom_components.wellbeing.api.time.monotonic", lambda: now)
+
+    appliances = await client.async_get_appliances()
+    assert (
+        appliances.get_appliance("pnc_1").get_entity(Platform.SENSOR, "PM2_5").state
+        == 7
+    )
+    stale = appliances.get_appliance("pnc_2")
+    assert stale.stale
+    assert stale.get_entity(Platform.SENSOR, "PM2_5").state == 3
+    assert client.poll_failures["pnc_2"].error == "HTTP 500"
+    assert client.poll_retry_in(now) == 30
+
+    # Not retried before its backoff expired, then with a doubled backoff
+    await client.async_get_appliances()
+    assert failing.async_update.await_count == 1
+    assert healthy.async_update.await_count == 2
+    now += 30
+    await client.async_get_appliances(lambda _: False)
+    assert failing.async_update.await_count == 2
+    assert healthy.async_update.await_count == 2
+    assert client.poll_retry_in(now) == 60
+
+    # Recovers on the next retry
+    failing.async_update = AsyncMock()
+    now += 60
+    appliances = await client.async_get_appliances(lambda _: False)
+    assert not appliances.get_appliance("pnc_2").stale
+    assert client.poll_retry_in(now) is None
+
+
+@pytest.mark.asyncio
+async def test_api_client_poll_auth_error():
+    """Test authentication errors of a poll fail the whole update."""
+    appliance = _purifier("pnc_1")
+    appliance.async_update = AsyncMock(
+        side_effect=ClientResponseError(
+            request_info=MagicMock(), history=(), status=401, message="Unauthorized"
+        )
+    )
+    mock_hub = AsyncMock()
+    mock_hub.async_get_appliances.return_value = [appliance]
+    client = WellbeingApiClient(mock_hub, use_stream=False)
+
+    with pytest.raises(ClientResponseError):
+        await client.async_get_appliances()
+    assert not client.poll_failures
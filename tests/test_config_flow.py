@@ -151,4 +151,11 @@ async def test_options_flow(hass):
         "scan_interval": 30,
         "stream": True,
         "map_rotation": 90,
+        "adaptive_polling": False,
+        "request_budget": 0,
+        "daily_request_budget": 0,
+        "record_stream": False,
+        "session_archive": 20,
+        "map_stream_fps": 1.0,
+        "map_pixel_budget": 2.0,
     }
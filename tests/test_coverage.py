@@ -0,0 +1,89 @@
+"""Tests for coverage.py."""
+
+from custom_components.wellbeing.coverage import (
+    CELL_M,
+    GRID_CELLS,
+    SESSIONS,
+    CoverageGrid,
+)
+from custom_components.wellbeing.map_data import MapData
+
+
+def _session(session_id: str, x: float) -> MapData:
+    """A straight run along y at x, 1 m long."""
+    return MapData.from_reported(
+        {
+            "sessionId": session_id,
+            "crumbs": [{"xy": [x, y / 10], "t": 0} for y in range(11)],
+            "transforms": [{"t": 0, "xya": [0.0, 0.0, 0.0]}],
+        }
+    )
+
+
+def _count(grid: CoverageGrid, x: float, y: float) -> int:
+    col = int(x / CELL_M + GRID_CELLS / 2)
+    row = int(GRID_CELLS / 2 - y / CELL_M)
+    return grid._counts[row * GRID_CELLS + col]
+
+
+def test_coverage_grid(tmp_path):
+    """Test sessions are counted per cell, over the last SESSIONS only."""
+    path = str(tmp_path / "grid" / "pnc.coverage")
+    grid = CoverageGrid(path)
+    assert grid.render() is None
+
+    assert grid.add(_session("session_0", 0.0))
+    assert not grid.add(_session("session_0", 0.0))  # already added
+    for index in range(1, SESSIONS):
+        grid.add(_session(f"session_{index}", 5.0))
+    assert _count(grid, 0.0, 0.5) == 1
+    assert _count(grid, 5.0, 0.5) == SESSIONS - 1
+    assert _count(grid, 2.5, 0.5) == 0
+
+    # The next session takes the slot of the first
+    grid.add(_session("session_next", 5.0))
+    assert _count(grid, 0.0, 0.5) == 0
+    assert _count(grid, 5.0, 0.5) == SESSIONS
+
+    image = grid.render(90.0)
+    assert image.image.startswith(b"\x89PNG")
+    assert image.width > image.height  # the run along y, turned by 90°
+    grid.close()
+
+    reopened = CoverageGrid(path)
+    assert reopened.sessions == SESSIONS + 1
+    assert _count(reopened, 5.0, 0.5) == SESSIONS
+    assert not reopened.add(_session("session_next", 5.0))
+    reopened.close()
+
+
+def test_coverage_grid_calibration(tmp_path):
+    """Test the calibration points map the map frame onto the heatmap."""
+    grid = CoverageGrid(str(tmp_path / "pnc.coverage"))
+    grid.add(_session("session_0", 1.0))
+
+    for rotation in (0.0, 90.0):
+        image = grid.render(rotation)
+        origin, right, down = image.calibration_points
+        # 1 m in the map frame is 80 pixels
+        dx = right["vacuum"]["x"] - origin["vacuum"]["x"]
+        dy = right["vacuum"]["y"] - origin["vacuum"]["y"]
+        assert round((dx * dx + dy * dy) ** 0.5 * 80) == image.width
+    grid.close()
+
+
+def test_coverage_grid_pixel_budget(tmp_path):
+    """Test the heatmap is drawn with smaller cells to fit the pixel budget."""
+    grid = CoverageGrid(str(tmp_path / "pnc.coverage"))
+    grid.add(_session("session_0", 1.0))
+
+    full = grid.render()
+    image = grid.render(max_pixels=full.width * full.height // 4)
+    assert image.width * image.height <= full.width * full.height // 4
+    assert (image.width, image.height) == (full.width // 2, full.height // 2)
+    origin, right, _ = image.calibration_points
+    assert right["vacuum"]["x"] - origin["vacuum"]["x"] == (
+        full.calibration_points[1]["vacuum"]["x"]
+        - full.calibration_points[0]["vacuum"]["x"]
+    )
+    grid.close()
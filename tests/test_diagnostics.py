@@ -0,0 +1,110 @@
+"""Tests for diagnostics.py."""
+
+from unittest.mock import MagicMock, patch
+
+from pyelectroluxgroup.appliance import Appliance as ApiAppliance
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.wellbeing.api import PollFailure, WellbeingApiClient
+from custom_components.wellbeing.const import DOMAIN
+from custom_components.wellbeing.diagnostics import (
+    _appliance_diagnostics,
+    async_get_config_entry_diagnostics,
+)
+
+
+async def test_diagnostics(hass, hass_storage):
+    """Diagnostics report sizes and counters, without secrets or state."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "test_access_token",
+            "refresh_token": "test_refresh_token",
+        },
+        options={"stream": False},
+        entry_id="test_entry_id",
+    )
+    entry.add_to_hass(hass)
+    reported = {
+        "batteryStatus": 6,
+        "robotStatus": 9,
+        "powerMode": 3,
+        "mapData": {
+            "sessionId": "session_1",
+            "crumbs": [{"xy": [0.0, 0.0], "t": 0}, {"xy": [0.2, 0.0], "t": 0}],
+        },
+    }
+    hass_storage["wellbeing.test_entry_id"] = {
+        "version": 1,
+        "key": "wellbeing.test_entry_id",
+        "data": {
+            "appliances": [
+                {
+                    "initial_data": {
+                        "applianceId": "pnc_sn_secret",
+                        "applianceName": "Vacuum",
+                        "applianceType": "PUREi9",
+                    },
+                    "info_data": {
+                        "brand": "Electrolux",
+                        "serialNumber": "sn_secret",
+                        "deviceType": "ROBOTIC_VACUUM_CLEANER",
+                    },
+                    "capabilities_data": {},
+                    "state_data": {
+                        "status": "enabled",
+                        "connectionState": "Connected",
+                        "properties": {"reported": reported},
+                    },
+                }
+            ]
+        },
+    }
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI"),
+        patch.object(
+            WellbeingApiClient,
+            "async_get_appliances",
+            autospec=True,
+            side_effect=lambda client, *args: client._build_appliances(),
+        ),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+    assert "test_access_token" not in str(diagnostics)
+    assert "sn_secret" not in str(diagnostics)
+    assert diagnostics["entry"]["data"]["api_key"] == "**REDACTED**"
+    assert diagnostics["appliances"]["appliance_1"]["crumbs"] == 2
+    assert diagnostics["appliances"]["appliance_1"]["reported_state_bytes"] > 0
+    assert diagnostics["coordinator"]["update_interval"] == 60
+    assert diagnostics["coordinator"]["last_refresh_ms"] is not None
+    assert diagnostics["entities"]["enabled"]["vacuum"] == 1
+    assert diagnostics["cache"]["entity_state"]["hits"] > 0
+    assert "appliance_1" in diagnostics["timings"]["setup"]
+
+
+def test_appliance_diagnostics_never_polled():
+    """An appliance whose first poll failed has no info or state yet."""
+    appliance = ApiAppliance(
+        {
+            "applianceId": "pnc_sn_secret",
+            "applianceName": "Vacuum",
+            "applianceType": "PUREi9",
+        },
+        MagicMock(),
+    )
+
+    diagnostics = _appliance_diagnostics(appliance, [], PollFailure(2, 0.0, "HTTP 503"))
+
+    assert diagnostics["device_type"] is None
+    assert diagnostics["connection_state"] is None
+    assert diagnostics["reported_properties"] == 0
+    assert diagnostics["failed_polls"] == 2
+    assert diagnostics["last_poll_error"] == "HTTP 503"
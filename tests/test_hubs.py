@@ -0,0 +1,139 @@
+"""Tests for hubs.py."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.wellbeing import WellbeingDataUpdateCoordinator
+from custom_components.wellbeing.api import Appliances
+from custom_components.wellbeing.const import DOMAIN
+from custom_components.wellbeing.hubs import HubRegistry
+from custom_components.wellbeing.scheduler import AdaptiveScheduler
+
+
+def _hub(request):
+    hub = MagicMock()
+    hub.auth.request = request
+    hub.auth.async_get_access_token = AsyncMock(return_value="token")
+    return hub
+
+
+@pytest.mark.asyncio
+async def test_registry_limits_concurrent_requests():
+    """Test the requests of all accounts share the concurrency limit."""
+    registry = HubRegistry(max_concurrent_requests=2)
+    in_flight = peak = 0
+
+    async def request(method, path, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return path
+
+    hubs = [_hub(request), _hub(request)]
+    for index, hub in enumerate(hubs):
+        registry.register(f"entry_{index}", hub)
+
+    results = await asyncio.gather(
+        *(hub.auth.request("get", f"appliances/{n}") for hub in hubs for n in range(3))
+    )
+    assert len(results) == 6
+    assert peak == 2
+    # The token is fetched before taking a slot, a refresh is not
+    assert hubs[0].auth.async_get_access_token.await_count == 3
+    await hubs[0].auth.request("post", "token/refresh", skip_auth_headers=True)
+    assert hubs[0].auth.async_get_access_token.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_registry_token_refresh_with_full_slots():
+    """Test a token expiring after the pre-check does not deadlock the slots."""
+    registry = HubRegistry(max_concurrent_requests=2)
+    hub = MagicMock()
+    checked = set()
+    refreshed = None
+
+    async def get_access_token():
+        nonlocal refreshed
+        # Valid for the pre-check, expired once the headers are built
+        task = asyncio.current_task()
+        if task.get_name().startswith("slot") and task in checked:
+            if refreshed is None:
+                refreshed = asyncio.ensure_future(
+                    hub.auth.request("post", "token/refresh", skip_auth_headers=True)
+                )
+            await refreshed
+        checked.add(task)
+        return "token"
+
+    async def request(method, path, **kwargs):
+        if not kwargs.get("skip_auth_headers"):
+            await hub.auth.async_get_access_token()
+        await asyncio.sleep(0.01)
+        return path
+
+    hub.auth.request = request
+    hub.auth.async_get_access_token = get_access_token
+    registry.register("entry_0", hub)
+
+    tasks = [
+        asyncio.create_task(hub.auth.request("get", f"appliances/{n}"), name=f"slot{n}")
+        for n in range(2)
+    ]
+    async with asyncio.timeout(1):
+        assert await asyncio.gather(*tasks) == ["appliances/0", "appliances/1"]
+
+
+def test_registry_staggers_refreshes():
+    """Test the accounts refresh on evenly spaced phases of the interval."""
+    registry = HubRegistry()
+    unregister = registry.register("entry_0", _hub(AsyncMock()))
+    interval = timedelta(seconds=60)
+    assert registry.staggered("entry_0", interval) == interval
+
+    registry.register("entry_1", _hub(AsyncMock()))
+    registry.register("entry_2", _hub(AsyncMock()))
+    with patch("custom_components.wellbeing.hubs.time.monotonic", return_value=1000):
+        delays = [
+            registry.staggered(f"entry_{index}", interval).total_seconds()
+            for index in range(3)
+        ]
+    assert all(30 <= delay < 90 for delay in delays)
+    assert sorted((1000 + delay) % 60 for delay in delays) == [0, 20, 40]
+
+    unregister()
+    assert list(registry.hubs) == ["entry_1", "entry_2"]
+
+
+@pytest.mark.asyncio
+async def test_adaptive_refreshes_staggered(hass):
+    """Test the adaptive polling interval is put on the account's phase too."""
+    registry = HubRegistry()
+    registry.register("entry_0", _hub(AsyncMock()))
+    registry.register("entry_1", _hub(AsyncMock()))
+    entry = MockConfigEntry(domain=DOMAIN, entry_id="entry_1")
+    entry.add_to_hass(hass)
+    client = MagicMock(poll_failures={})
+    client.async_get_appliances = AsyncMock(return_value=Appliances({}))
+    client.poll_retry_in.return_value = None
+    coordinator = WellbeingDataUpdateCoordinator(
+        hass,
+        client=client,
+        update_interval=timedelta(seconds=60),
+        config_entry=entry,
+        scheduler=AdaptiveScheduler(base_interval=60, active_interval=60),
+        hubs=registry,
+    )
+    coordinator.data = {"appliances": Appliances({})}
+
+    with patch("custom_components.wellbeing.hubs.time.monotonic", return_value=1000):
+        await coordinator._async_update_data()
+        staggered = registry.staggered("entry_1", timedelta(seconds=60))
+
+    assert staggered != timedelta(seconds=60)
+    assert coordinator.update_interval == staggered
@@ -1,13 +1,35 @@
 """Test Wellbeing setup process."""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+import time
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import jwt
 import pytest
 from homeassistant.config_entries import ConfigEntryState
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.const import Platform
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.wellbeing.api import Appliances
+from custom_components.wellbeing import (
+    STREAM_CONNECT_GRACE,
+    TOKEN_SAVE_DELAY,
+    WellbeingDataUpdateCoordinator,
+    WellBeingTokenManager,
+    _required_platforms,
+)
+from custom_components.wellbeing.api import (
+    Appliance,
+    Appliances,
+    PollFailure,
+    WellbeingApiClient,
+)
 from custom_components.wellbeing.const import DOMAIN
+from custom_components.wellbeing.quota import RequestKind
 
 
 @pytest.mark.asyncio
@@ -55,3 +77,359 @@ async def test_setup_unload_entry(hass):
 
         assert entry.entry_id not in hass.data[DOMAIN]
         assert entry.state is ConfigEntryState.NOT_LOADED
+
+
+@pytest.mark.asyncio
+async def test_setup_from_snapshot(hass, hass_storage):
+    """Test setup does not wait for the cloud when a snapshot is stored."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "test_access_token",
+            "refresh_token": "test_refresh_token",
+        },
+        options={"stream": False},
+        entry_id="test_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass_storage["wellbeing.test_entry_id"] = {
+        "version": 1,
+        "key": "wellbeing.test_entry_id",
+        "data": {"appliances": []},
+    }
+
+    fetched = asyncio.Event()
+
+    async def get_appliances(*args):
+        await fetched.wait()
+        return Appliances({})
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI"),
+        patch(
+            "custom_components.wellbeing.WellbeingApiClient.async_get_appliances",
+            side_effect=get_appliances,
+        ),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        assert entry.state is ConfigEntryState.LOADED
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert coordinator.data["restored"]
+
+        fetched.set()
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert "restored" not in coordinator.data
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_setup_restores_request_counts(hass, hass_storage):
+    """Test the requests of the day are counted across a reload."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "test_access_token",
+            "refresh_token": "test_refresh_token",
+        },
+        options={"stream": False},
+        entry_id="test_entry_id",
+    )
+    entry.add_to_hass(hass)
+    hass_storage["wellbeing.requests.test_entry_id"] = {
+        "version": 1,
+        "key": "wellbeing.requests.test_entry_id",
+        "data": {"day": dt_util.utcnow().date().isoformat(), "counts": {"state": 7}},
+    }
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI"),
+        patch(
+            "custom_components.wellbeing.WellbeingApiClient.async_get_appliances",
+            return_value=Appliances({}),
+        ),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert coordinator.accounting.requests_today() == 7
+        coordinator.accounting.record(RequestKind.COMMAND)
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert hass_storage["wellbeing.requests.test_entry_id"]["data"]["counts"] == {
+        "state": 7,
+        "command": 1,
+    }
+
+
+def _purifier(pnc_id: str) -> Appliance:
+    purifier = Appliance("AirPurifier", pnc_id, "Muju")
+    purifier.device = "AIR_PURIFIER"
+    purifier.setup({"Workmode": "Manual", "Fanspeed": 2}, {})
+    return purifier
+
+
+@pytest.mark.asyncio
+async def test_setup_after_failed_first_polls(hass):
+    """Test appliances whose first poll failed get entities once polled."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "test_access_token",
+            "refresh_token": "test_refresh_token",
+        },
+        options={"stream": False},
+        entry_id="test_entry_id",
+    )
+    entry.add_to_hass(hass)
+    failing = {"pnc_1", "pnc_2"}
+
+    async def get_appliances(client, *args):
+        client.poll_failures = {
+            pnc_id: PollFailure(1, 0.0, "HTTP 503") for pnc_id in failing
+        }
+        return Appliances(
+            {pnc_id: _purifier(pnc_id) for pnc_id in {"pnc_1", "pnc_2"} - failing}
+        )
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI"),
+        patch.object(
+            WellbeingApiClient,
+            "async_get_appliances",
+            autospec=True,
+            side_effect=get_appliances,
+        ),
+    ):
+        # Without any appliance to set up, the setup is retried
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+        assert entry.state is ConfigEntryState.SETUP_RETRY
+
+        failing.discard("pnc_1")
+        assert await hass.config_entries.async_reload(entry.entry_id)
+        assert entry.state is ConfigEntryState.LOADED
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert set(coordinator.data["appliances"].appliances) == {"pnc_1"}
+
+        # The appliance that failed at setup needs a reload for its entities
+        failing.clear()
+        with patch.object(
+            hass.config_entries, "async_schedule_reload"
+        ) as schedule_reload:
+            await coordinator.async_refresh()
+            await coordinator.async_refresh()
+        schedule_reload.assert_called_once_with(entry.entry_id)
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+def test_required_platforms():
+    """Test only the platforms the appliances need are loaded."""
+    purifier = Appliance("AirPurifier", "pnc_1", "Muju")
+    purifier.device = "AIR_PURIFIER"
+    purifier.setup(
+        {"Workmode": "Manual", "Fanspeed": 2}, {"UILight": {"access": "readwrite"}}
+    )
+    coordinator = MagicMock()
+    coordinator.api.use_stream = False
+    coordinator.accounting.daily_budget = None
+    coordinator.data = {"appliances": Appliances({"pnc_1": purifier})}
+
+    platforms = _required_platforms(coordinator)
+    assert Platform.SWITCH in platforms
+    assert Platform.FAN in platforms
+    assert Platform.CAMERA not in platforms
+    assert Platform.VACUUM not in platforms
+    assert Platform.CLIMATE not in platforms
+
+    coordinator.data = {"appliances": Appliances({})}
+    assert _required_platforms(coordinator) == [Platform.SENSOR]
+
+
+@pytest.mark.asyncio
+async def test_stream_supervisor_reconnects(hass):
+    """Test the live stream is reconnected and resynced after it fails."""
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"stream": True})
+    entry.add_to_hass(hass)
+
+    connected = asyncio.Event()
+    attempts = 0
+
+    async def watch_appliances():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionError("stream lost")
+        yield {"applianceId": "pnc_1", "property": "PM2_5", "value": 5}
+        connected.set()
+        await asyncio.Event().wait()
+
+    hub = MagicMock()
+    hub.watch_appliances = watch_appliances
+    client = WellbeingApiClient(hub, use_stream=True)
+    client.update_appliance_state = MagicMock(return_value=True)
+    coordinator = WellbeingDataUpdateCoordinator(
+        hass,
+        client=client,
+        update_interval=timedelta(seconds=300),
+        config_entry=entry,
+        active_update_interval=timedelta(seconds=60),
+    )
+    coordinator.data = {"appliances": Appliances({})}
+    coordinator.async_request_refresh = AsyncMock()
+
+    with patch("custom_components.wellbeing.random.uniform", return_value=0):
+        task = asyncio.create_task(coordinator._listen_for_changes())
+        await asyncio.wait_for(connected.wait(), 5)
+        await hass.async_block_till_done()
+
+    assert coordinator.stream_health.connected
+    assert coordinator.stream_health.reconnects == 1
+    assert coordinator.stream_health.last_event is not None
+    client.update_appliance_state.assert_called_once()
+    coordinator.async_request_refresh.assert_awaited_once()
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_stream_connected_without_events(hass):
+    """Test a quiet stream is connected, and reconnects of the library count."""
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"stream": True})
+    entry.add_to_hass(hass)
+    drops = asyncio.Queue()
+
+    async def watch_appliances():
+        # Like the library: reconnect without ending, no events meanwhile
+        while True:
+            await hub.async_get_livestream_configurations()
+            await drops.get()
+        yield
+
+    hub = MagicMock()
+    hub.async_get_livestream_configurations = AsyncMock(return_value={})
+    hub.watch_appliances = watch_appliances
+    coordinator = WellbeingDataUpdateCoordinator(
+        hass,
+        client=WellbeingApiClient(hub, use_stream=True),
+        update_interval=timedelta(seconds=300),
+        config_entry=entry,
+    )
+    coordinator.data = {"appliances": Appliances({})}
+    coordinator.async_request_refresh = AsyncMock()
+
+    async def wait_grace():
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=STREAM_CONNECT_GRACE + 1)
+        )
+        await hass.async_block_till_done()
+
+    task = asyncio.create_task(coordinator._listen_for_changes())
+    await hass.async_block_till_done()
+    assert not coordinator.stream_health.connected
+    await wait_grace()
+    assert coordinator.stream_health.connected
+    coordinator.async_request_refresh.assert_not_awaited()
+
+    # The library lost the connection and tries again
+    drops.put_nowait(None)
+    await hass.async_block_till_done()
+    assert not coordinator.stream_health.connected
+    assert coordinator.stream_health.reconnects == 1
+    assert coordinator.async_request_refresh.await_count == 1
+    await wait_grace()
+    assert coordinator.stream_health.connected
+    assert coordinator.async_request_refresh.await_count == 2  # resynced
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert hub.async_get_livestream_configurations.await_count == 2
+
+
+def _token_entry(hass) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "access_0",
+            "refresh_token": "refresh_0",
+        },
+        entry_id="test_entry_id",
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.mark.asyncio
+async def test_token_manager_saves_debounced(hass):
+    """Test refreshed tokens are written to the entry once, after a delay."""
+    entry = _token_entry(hass)
+    token_manager = WellBeingTokenManager(hass, entry)
+
+    token_manager.update("access_1", "refresh_1")
+    token_manager.update("access_2", "refresh_2")
+    assert entry.data["access_token"] == "access_0"
+
+    with patch.object(
+        hass.config_entries,
+        "async_update_entry",
+        wraps=hass.config_entries.async_update_entry,
+    ) as update_entry:
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=TOKEN_SAVE_DELAY + 1)
+        )
+        await hass.async_block_till_done()
+    update_entry.assert_called_once()
+    assert entry.data["access_token"] == "access_2"
+    assert entry.data["refresh_token"] == "refresh_2"
+
+    # Saving on unload does not overwrite tokens of a reauthentication
+    token_manager.update("access_3", "refresh_3")
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, "refresh_token": "reauth"}
+    )
+    token_manager.async_save()
+    assert entry.data["refresh_token"] == "reauth"
+
+
+@pytest.mark.asyncio
+async def test_token_manager_shares_refresh(hass):
+    """Test concurrent requests wait for the same token refresh."""
+    token_manager = WellBeingTokenManager(hass, _token_entry(hass))
+    refreshed = asyncio.Event()
+
+    async def refresh():
+        await refreshed.wait()
+        return "access_1"
+
+    auth = MagicMock()
+    auth.async_get_access_token = AsyncMock(side_effect=refresh)
+    original = auth.async_get_access_token
+    token_manager.attach(auth)
+
+    requests = [hass.async_create_task(auth.async_get_access_token()) for _ in range(3)]
+    await asyncio.sleep(0)
+    refreshed.set()
+    assert await asyncio.gather(*requests) == ["access_1"] * 3
+    assert original.await_count == 1
+
+    await auth.async_get_access_token()
+    assert original.await_count == 2
+
+    # A valid token is returned without a task, or asking the hub
+    token_manager._access_token = jwt.encode(
+        {"exp": int(time.time()) + 3600}, "secret", algorithm="HS256"
+    )
+    with patch.object(hass, "async_create_task") as create_task:
+        assert await auth.async_get_access_token() == token_manager.access_token
+    create_task.assert_not_called()
+    assert original.await_count == 2
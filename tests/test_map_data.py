@@ -0,0 +1,68 @@
+"""Tests for map_data.py."""
+
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.wellbeing.api import reported_form
+from custom_components.wellbeing.map_data import NO_FRAME, CrumbTrail, MapData
+
+REPORTED = {
+    "sessionId": "session_1",
+    "timestamp": "2025-01-01T10:00:00Z",
+    "crumbCollectionDelta": True,
+    "crumbs": [
+        {"xy": [0.0, 0.0], "t": 0},
+        {"t": 0},  # no position
+        {"xy": [0.25, 0.5], "t": 1},
+        {"xy": [0.5, 0.5]},  # no frame
+    ],
+    "transforms": [
+        {"t": 0, "xya": [0.1, 0.2, 0.3]},
+        {"t": 1, "xya": [0.0, 0.0]},  # incomplete
+    ],
+    "chargerPoses": [{"xya": [1.0, 2.0, 0.0]}],
+    "robotPose": {"xya": [0.5, 0.5, 1.0], "t": 1000},
+}
+
+
+def test_map_data_decode():
+    """Test the reported mapData is decoded into columns."""
+    map_data = MapData.from_reported(REPORTED)
+
+    assert len(map_data.crumbs) == 3
+    assert list(map_data.crumbs.x) == [0.0, 0.25, 0.5]
+    assert list(map_data.crumbs.y) == [0.0, 0.5, 0.5]
+    assert list(map_data.crumbs.frame) == [0, 1, NO_FRAME]
+    assert map_data.transforms == {0: (0.1, 0.2, 0.3)}
+    assert map_data.session_id == "session_1"
+    assert map_data.delta
+    assert map_data.robot_pose == {"xya": [0.5, 0.5, 1.0], "t": 1000}
+
+    # The reported form round trips, without the unusable crumbs and frames
+    assert MapData.from_reported(map_data.as_dict()) == map_data
+    assert map_data.as_dict()["crumbs"][2] == {"xy": [0.5, 0.5]}
+
+
+def test_crumb_trail():
+    """Test accumulating trails and their memory use."""
+    first = CrumbTrail.from_crumbs([{"xy": [0.0, 0.0], "t": 0}])
+    delta = CrumbTrail.from_crumbs([{"xy": [0.1, 0.0], "t": 0}])
+    trail = first + delta
+
+    assert len(trail) == 2
+    assert len(first) == 1  # not modified
+    assert trail.nbytes == 2 * (8 + 8 + 4)
+    assert not CrumbTrail()
+
+
+def test_reported_form():
+    """Test the state with decoded map data can be stored as JSON."""
+    state_data = {
+        "status": "enabled",
+        "properties": {"reported": {"mapData": MapData.from_reported(REPORTED)}},
+    }
+
+    encodable = reported_form(state_data)
+    assert isinstance(encodable["properties"]["reported"]["mapData"], dict)
+    assert json_bytes(encodable)
+    assert isinstance(state_data["properties"]["reported"]["mapData"], MapData)
+    assert reported_form({"status": "enabled"}) == {"status": "enabled"}
@@ -2,13 +2,19 @@
 
 import math
 
+from custom_components.wellbeing.map_data import MapData
 from custom_components.wellbeing.map_renderer import (
+    PADDING_M,
     ROBOT_MARKER_CHARGER,
     ROBOT_MARKER_NONE,
     ROBOT_MARKER_POSE,
+    SCALE,
+    GeometryCache,
     _rotate,
     _split_runs,
     _to_global,
+    composite_map,
+    render_layers,
     render_map,
 )
 
@@ -79,6 +85,8 @@ def test_render_map_valid_no_marker():
     assert result.width > 0
     assert result.height > 0
     assert len(result.calibration_points) == 3
+    assert result.render_seconds > 0
+    assert result.encode_seconds > 0
 
 
 def test_render_map_with_markers():
@@ -120,3 +128,96 @@ def test_render_map_charger_fallback():
     }
     result = render_map(reported, rotation_deg=0.0, robot_marker=ROBOT_MARKER_CHARGER)
     assert result is not None
+
+
+def test_render_layers_composite():
+    """Test markers are composited onto the base layer, leaving it as it was."""
+    map_data = MapData.from_reported(
+        {
+            "crumbs": [{"xy": [x / 10, 0.0], "t": 0} for x in range(20)],
+            "transforms": [{"t": 0, "xya": [0.0, 0.0, 0.0]}],
+            "robotPose": {"xya": [1.9, 0.0, 0.0]},
+        }
+    )
+    layers = render_layers(map_data, 30.0)
+    base = layers.base.tobytes()
+
+    images = {
+        marker: composite_map(layers, marker)
+        for marker in (ROBOT_MARKER_NONE, ROBOT_MARKER_POSE, ROBOT_MARKER_CHARGER)
+    }
+    assert layers.base.tobytes() == base
+    assert len({image.image for image in images.values()}) == 3
+    for image in images.values():
+        assert (image.width, image.height) == layers.base.size
+        assert image.calibration_points == layers.calibration_points
+    # The extent of the map does not depend on the marker
+    assert render_map({"mapData": map_data}, 30.0, ROBOT_MARKER_POSE).image == (
+        images[ROBOT_MARKER_POSE].image
+    )
+
+
+def test_geometry_cache():
+    """Test the geometry is reused by renders at other rotations."""
+    map_data = MapData.from_reported(
+        {
+            "sessionId": "session_1",
+            "timestamp": "2025-01-01T10:00:00Z",
+            "crumbs": [{"xy": [x / 10, (x % 3) / 10], "t": 0} for x in range(20)],
+            "transforms": [{"t": 0, "xya": [1.0, 0.0, 0.5]}],
+        }
+    )
+    cache = GeometryCache(size=1)
+    geometry = cache.get(map_data)
+    assert cache.get(map_data) is geometry
+    assert cache.stats.as_dict()["hits"] == 1
+
+    # The hull has the extremes of all points, the charger included
+    points = list(zip(geometry.xs, geometry.ys)) + [geometry.charger[0]]
+    for angle in (0.0, 1.0, 2.5):
+
+        def project(point):
+            return math.cos(angle) * point[0] + math.sin(angle) * point[1]
+
+        assert math.isclose(max(map(project, geometry.hull)), max(map(project, points)))
+    # The affine transform of the runs is that of the points
+    (run,) = geometry.pixel_runs((2.0, 0.0, 1.0), (0.0, -2.0, 3.0))
+    assert run[1] == (2.0 * geometry.xs[1] + 1.0, -2.0 * geometry.ys[1] + 3.0)
+
+    # Another upload of the session is another map
+    later = MapData.from_reported({"sessionId": "session_1", "timestamp": "later"})
+    assert cache.get(later) is not geometry
+    assert cache.get(map_data) is not geometry  # evicted
+
+
+def test_render_layers_pixel_budget():
+    """Test large maps are scaled down to the pixel budget, not cropped."""
+    map_data = MapData.from_reported(
+        {
+            "sessionId": "budget_session",
+            "timestamp": "2025-01-01T10:00:00Z",
+            # 30 m by 10 m, corner to corner
+            "crumbs": [{"xy": [x / 2, x / 6], "t": 0} for x in range(61)],
+            "transforms": [{"t": 0, "xya": [0.0, 0.0, 0.0]}],
+        }
+    )
+    width_m, height_m = 30 + 2 * PADDING_M, 10 + 2 * PADDING_M
+
+    layers = render_layers(map_data, max_pixels=200_000)
+    width, height = layers.base.size
+    assert width * height <= 200_000
+    assert math.isclose(width / height, width_m / height_m, rel_tol=0.01)
+    assert layers.scale < SCALE
+    # The calibration points span the whole extent at the reduced scale
+    origin, right, down = layers.calibration_points
+    assert math.isclose(
+        right["vacuum"]["x"] - origin["vacuum"]["x"], width_m, rel_tol=0.01
+    )
+    assert math.isclose(
+        origin["vacuum"]["y"] - down["vacuum"]["y"], height_m, rel_tol=0.01
+    )
+
+    # Within the budget, maps are drawn at the full scale
+    layers = render_layers(map_data, max_pixels=10_000_000)
+    assert layers.scale == SCALE
+    assert layers.base.width == int(width_m * SCALE * 2) // 2
@@ -0,0 +1,143 @@
+"""Tests for map_tiles.py."""
+
+import io
+import math
+import threading
+
+import pytest
+from PIL import Image
+
+from custom_components.wellbeing.coverage import CoverageGrid
+from custom_components.wellbeing.map_data import MapData
+from custom_components.wellbeing.map_renderer import BACKGROUND
+from custom_components.wellbeing.map_tiles import (
+    TILE_PX,
+    ZOOM_LEVELS,
+    CoverageTiles,
+    MapTiles,
+    TilePyramid,
+    zoom_scale,
+)
+
+TOP = ZOOM_LEVELS - 1  # the zoom level at the scale of the map camera
+
+
+def _map_data(session_id: str, points: list[tuple[float, float]]) -> MapData:
+    return MapData.from_reported(
+        {
+            "sessionId": session_id,
+            "timestamp": f"2025-01-01T10:00:{len(points):02}Z",
+            "crumbs": [{"xy": [x, y], "t": 0} for x, y in points],
+            "transforms": [{"t": 0, "xya": [0.0, 0.0, 0.0]}],
+        }
+    )
+
+
+def _pixel(data: bytes, x: int, y: int) -> tuple:
+    return Image.open(io.BytesIO(data)).convert("RGB").getpixel((x, y))
+
+
+def test_map_tiles():
+    """Test tiles are drawn once, and dropped where new crumbs touch them."""
+    # Along the x axis, from the charger to 5 m
+    points = [(x / 10, 0.0) for x in range(51)]
+    tiles = MapTiles()
+    tiles.update(_map_data("tiles_session", points))
+
+    size = TILE_PX / zoom_scale(TOP)  # 2.13 m
+    layout = tiles.metadata()
+    assert layout["tile_size"] == TILE_PX
+    top = layout["zooms"][TOP]
+    assert top["scale"] == zoom_scale(TOP)
+    assert top["x"] == [-1, math.ceil((5 + 0.7) / size) - 1]
+    assert top["y"] == [-1, 0]
+    origin, right, down = top["calibration_points"]
+    assert origin["vacuum"] == {"x": 0.0, "y": 0.0}
+    assert right["vacuum"] == {"x": round(size, 3), "y": 0.0}
+    assert down["vacuum"] == {"x": 0.0, "y": round(-size, 3)}
+    assert len(layout["zooms"]) == ZOOM_LEVELS
+
+    # The trail runs along the top of the tiles of row 0
+    near, near_key = tiles.tile(TOP, 0, 0)
+    assert _pixel(near, 128, 0) != BACKGROUND[:3]
+    assert _pixel(near, 128, 128) == BACKGROUND[:3]
+    far, far_key = tiles.tile(TOP, 2, 0)
+    assert tiles.tile(TOP, 0, 0) == (near, near_key)
+    assert tiles.stats.hits == 1
+    assert tiles.tile(TOP, 0, 5) is None  # outside the map
+
+    # Going on beyond 5 m only changes the tiles there
+    tiles.update(_map_data("tiles_session", points + [(5.5, 0.0)]))
+    assert tiles.tile(TOP, 0, 0) == (near, near_key)
+    redrawn, redrawn_key = tiles.tile(TOP, 2, 0)
+    assert redrawn != far
+    assert redrawn_key != far_key
+
+    # The next session starts over
+    tiles.update(_map_data("next_session", points[:2]))
+    data, key = tiles.tile(TOP, 0, 0)
+    assert data != near
+    assert key != near_key
+
+
+def test_map_tiles_drawn_without_lock():
+    """Test tiles are drawn outside the lock, and not kept if the map changed."""
+    points = [(x / 10, 0.0) for x in range(51)]
+    tiles = MapTiles()
+    tiles.update(_map_data("unlocked_session", points))
+    draw = tiles._draw
+    other_tile = threading.Event()
+
+    def draw_during_update(scene, zoom, x, y):
+        # Another tile and an update while this one is drawn
+        if not other_tile.is_set():
+            other_tile.set()
+            assert tiles.tile(TOP, 2, 0) is not None
+            tiles.update(_map_data("unlocked_session", points + [(0.5, 0.1)]))
+        return draw(scene, zoom, x, y)
+
+    tiles._draw = draw_during_update
+    _, key = tiles.tile(TOP, 0, 0)
+    tiles._draw = draw
+    _, redrawn_key = tiles.tile(TOP, 0, 0)
+    assert redrawn_key != key
+    assert tiles.stats.misses == 3  # the tile drawn during the update is dropped
+
+    with pytest.raises(TypeError):
+        TilePyramid()
+
+
+def test_map_tiles_rotation():
+    """Test the tiles follow the view rotation."""
+    points = [(x / 10, 0.0) for x in range(21)]
+    tiles = MapTiles()
+    tiles.update(_map_data("rotated_session", points), 90.0)
+
+    # Rotated counter-clockwise, the trail goes up from the charger
+    top = tiles.metadata()["zooms"][TOP]
+    assert top["y"] == [-2, 0]
+    data, _ = tiles.tile(TOP, 0, -1)
+    assert _pixel(data, 0, 250) != BACKGROUND[:3]
+    origin, right, _ = top["calibration_points"]
+    assert math.isclose(right["vacuum"]["y"] - origin["vacuum"]["y"], -2.133)
+
+
+def test_coverage_tiles(tmp_path):
+    """Test the heatmap tiles show the covered cells."""
+    grid = CoverageGrid(str(tmp_path / "pnc.coverage"))
+    tiles = CoverageTiles()
+    tiles.update(grid)
+    assert tiles.metadata() is None
+
+    grid.add(_map_data("session_1", [(1.0, y / 10) for y in range(11)]))
+    tiles.update(grid)
+    scale = zoom_scale(TOP)
+    data, key = tiles.tile(TOP, 0, -1)
+    # 1 m right of the origin, 0.5 m up
+    assert _pixel(data, round(scale), TILE_PX - round(scale / 2)) != BACKGROUND[:3]
+    assert _pixel(data, 10, TILE_PX - 10) == BACKGROUND[:3]
+
+    grid.add(_map_data("session_2", [(1.0, y / 10) for y in range(11)]))
+    tiles.update(grid)
+    assert tiles.tile(TOP, 0, -1)[1] != key
+    grid.close()
@@ -3,6 +3,7 @@
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from homeassistant.helpers.entity import Entity
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.wellbeing.api import Appliance, Appliances
@@ -203,6 +204,9 @@ async def test_platforms(hass):
             "pnc_pur1": mock_api_pur,
             "pnc_ac1": mock_api_ac,
         }
+        for mock_api_appliance in client._api_appliances.values():
+            # Not loaded from the API, so left out of the stored snapshot
+            mock_api_appliance.info_data = {}
 
         # Verify entity setups in HASS state
         vacuum_entity_id = "vacuum.wellbeing_vacuum_cleaner_robotstatus"
@@ -417,3 +421,77 @@ async def test_platforms(hass):
         # Clean unload
         assert await hass.config_entries.async_unload(entry.entry_id)
         await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_coordinator_update_skips_unchanged_entities(hass):
+    """Test entities only write their state when it changed."""
+    purifier_app = Appliance("Air Purifier", "pnc_pur1", "Muju")
+    purifier_app.brand = "AEG"
+    purifier_app.serialNumber = "sn_pur1"
+    purifier_app.device = "AIR_PURIFIER"
+    purifier_data = {
+        "Workmode": "Manual",
+        "FrmVer_NIU": "v2.0",
+        "connectionState": "Connected",
+        "status": "unknown",
+        "PM2_5": 3,
+        "Fanspeed": 2,
+    }
+    capabilities = {"UILight": {"access": "readwrite"}}
+    purifier_app.setup(purifier_data, capabilities)
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "test_access_token",
+            "refresh_token": "test_refresh_token",
+        },
+        options={
+            "stream": False,
+        },
+        entry_id="test_entry_id",
+    )
+    entry.add_to_hass(hass)
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI") as mock_hub_class,
+        patch(
+            "custom_components.wellbeing.WellbeingApiClient.async_get_appliances"
+        ) as mock_get_appliances,
+    ):
+        mock_hub_class.return_value = AsyncMock()
+        mock_get_appliances.return_value = Appliances({"pnc_pur1": purifier_app})
+
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        pm25_entity_id = "sensor.wellbeing_air_purifier_pm2_5"
+        assert hass.states.get(pm25_entity_id).state == "3"
+
+        with patch.object(
+            Entity,
+            "async_write_ha_state",
+            autospec=True,
+            side_effect=Entity.async_write_ha_state,
+        ) as mock_write:
+            # Nothing changed: no entity writes its state
+            coordinator.async_update_listeners()
+            await hass.async_block_till_done()
+            assert mock_write.call_count == 0
+
+            # Only the PM2.5 sensor changed
+            purifier_app.setup({**purifier_data, "PM2_5": 7}, capabilities)
+            coordinator.async_update_listeners()
+            await hass.async_block_till_done()
+            assert [call.args[0].entity_id for call in mock_write.call_args_list] == [
+                pm25_entity_id
+            ]
+
+        assert hass.states.get(pm25_entity_id).state == "7"
+        assert hass.states.get(pm25_entity_id).attributes["capabilities"] == ["UILight"]
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
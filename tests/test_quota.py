@@ -0,0 +1,111 @@
+"""Tests for quota.py."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.wellbeing.quota import (
+    RequestAccounting,
+    RequestKind,
+    classify_request,
+)
+
+
+def test_classify_request():
+    """Requests are classified by their path."""
+    assert classify_request("get", "appliances") == RequestKind.APPLIANCES
+    assert classify_request("get", "appliances/123/state") == RequestKind.STATE
+    assert classify_request("get", "appliances/123/info") == RequestKind.INFO
+    assert classify_request("put", "appliances/123/command") == RequestKind.COMMAND
+    assert classify_request("get", "appliances/123/memoryMap") == RequestKind.MAP
+    assert classify_request("get", "appliances/123/interactiveMap") == RequestKind.MAP
+    assert (
+        classify_request("get", "configurations/livestream") == RequestKind.LIVESTREAM
+    )
+    assert classify_request("post", "token/refresh") == RequestKind.TOKEN
+    assert classify_request("get", "unknown") == RequestKind.OTHER
+
+
+async def test_attach_counts_requests():
+    """Requests made through the wrapped auth are counted."""
+    auth = MagicMock()
+    auth.request = AsyncMock(return_value="response")
+    accounting = RequestAccounting()
+    accounting.attach(auth)
+
+    assert await auth.request("get", "appliances/123/state") == "response"
+    await auth.request("put", "appliances/123/command", json={})
+
+    assert accounting.requests_today() == 2
+    assert accounting.requests_today(RequestKind.STATE) == 1
+    assert accounting.polls == 1
+
+
+def test_projection_and_day_rollover():
+    """The daily spend is projected from the last hour and resets at midnight."""
+    accounting = RequestAccounting()
+    noon = datetime(2025, 1, 1, 12, tzinfo=UTC)
+    for minute in range(120):
+        accounting.record(
+            RequestKind.STATE, noon + timedelta(minutes=minute, seconds=30)
+        )
+
+    # 60 requests in the last hour, 120 so far and 10 hours left
+    assert accounting.projected_today(noon + timedelta(hours=2)) == 120 + 10 * 60
+
+    accounting.record(RequestKind.COMMAND, noon + timedelta(hours=12))
+    assert accounting.requests_today(now=noon + timedelta(hours=12)) == 1
+    assert accounting.polls == 120
+
+
+def test_poll_allowance():
+    """Polling is throttled to what is left of the daily budget."""
+    accounting = RequestAccounting()
+    noon = datetime(2025, 1, 1, 12, tzinfo=UTC)
+    assert accounting.poll_allowance(noon) is None
+    assert accounting.min_poll_interval(5, noon) is None
+
+    accounting.daily_budget = 1300
+    accounting.record(RequestKind.APPLIANCES, noon - timedelta(hours=1))
+    for minute in range(60):
+        now = noon + timedelta(minutes=minute, seconds=30)
+        accounting.record(RequestKind.STATE, now)
+        if minute % 6 == 0:
+            accounting.record(RequestKind.COMMAND, now)
+    now = noon + timedelta(hours=1)
+
+    # 1300 - 71 spent - 11 h x 10 other requests = 1119 polls over 11 hours
+    assert accounting.poll_allowance(now) == pytest.approx(1119 / 11)
+    assert accounting.min_poll_interval(2, now).total_seconds() == pytest.approx(
+        2 * 3600 * 11 / 1119
+    )
+
+    accounting.daily_budget = 100
+    assert accounting.poll_allowance(now) == 0
+    assert accounting.min_poll_interval(2, now) == timedelta(hours=11)
+
+
+def test_restore_counts_of_the_day():
+    """Stored counts are restored on the same day only."""
+    noon = datetime(2025, 1, 1, 12, tzinfo=UTC)
+    accounting = RequestAccounting()
+    accounting.record(RequestKind.STATE, noon)
+    accounting.record(RequestKind.COMMAND, noon)
+    stored = accounting.as_dict(noon)
+    assert stored == {"day": "2025-01-01", "counts": {"state": 1, "command": 1}}
+
+    restarted = RequestAccounting()
+    restarted.record(RequestKind.APPLIANCES, noon)
+    restarted.restore(
+        {**stored, "counts": {**stored["counts"], "removed": 5}},
+        noon + timedelta(hours=1),
+    )
+    assert restarted.requests_today(now=noon + timedelta(hours=1)) == 3
+    assert restarted.requests_today(RequestKind.STATE, noon) == 1
+    # Only the requests of this run are polls of it
+    assert restarted.polls == 0
+
+    next_day = RequestAccounting()
+    next_day.restore(stored, noon + timedelta(days=1))
+    assert next_day.requests_today(now=noon + timedelta(days=1)) == 0
@@ -0,0 +1,45 @@
+"""Tests for recorder.py."""
+
+from unittest.mock import patch
+
+from custom_components.wellbeing.recorder import StreamRecorder, read_recording
+
+
+async def test_record_and_read(hass, tmp_path):
+    """Recorded events are read back with the appliances, across runs."""
+    path = str(tmp_path / "stream.jsonl.gz")
+    event = {"applianceId": "pnc_1", "property": "PM2_5", "value": 3}
+
+    recorder = StreamRecorder(hass, path, {"pnc_1": "Muju"})
+    recorder.record(event)
+    await recorder.async_stop()
+    recorder.record({**event, "value": 4})  # stopped: not recorded
+
+    recorder = StreamRecorder(hass, path, {"pnc_2": "PUREi9"})
+    recorder.record({**event, "value": 5})
+    await recorder.async_stop()
+
+    appliances, events = await hass.async_add_executor_job(read_recording, path)
+    assert appliances == {"pnc_1": "Muju", "pnc_2": "PUREi9"}
+    assert [e["value"] for _, e in events] == [3, 5]
+    assert events[0][0] <= events[1][0]
+
+
+async def test_recording_size_limit(hass, tmp_path):
+    """Recording stops once the file reaches its maximum size."""
+    path = str(tmp_path / "stream.jsonl.gz")
+    event = {"applianceId": "pnc_1", "property": "PM1", "value": 1}
+    with (
+        patch("custom_components.wellbeing.recorder.FLUSH_EVENTS", 2),
+        patch("custom_components.wellbeing.recorder.MAX_RECORDING_BYTES", 1),
+    ):
+        recorder = StreamRecorder(hass, path, {})
+        recorder.record(event)  # flushed with the header line
+        await hass.async_block_till_done()
+        assert not recorder.recording
+
+        recorder.record(event)
+        await recorder.async_stop()
+
+    _, events = await hass.async_add_executor_job(read_recording, path)
+    assert len(events) == 1
@@ -0,0 +1,65 @@
+"""Tests for scheduler.py."""
+
+from custom_components.wellbeing.scheduler import AdaptiveScheduler
+
+
+def test_scheduler_adapts_to_change_rate():
+    """Volatile appliances are polled more often than stable ones."""
+    scheduler = AdaptiveScheduler(base_interval=60, active_interval=10)
+    assert scheduler.is_due("stable", 0)
+
+    for step in range(20):
+        scheduler.observe("stable", {"pm25": 1}, step * 60)
+        scheduler.observe("volatile", {"pm25": step}, step * 60)
+
+    assert scheduler.interval("stable") > 60
+    assert scheduler.interval("volatile") < 60
+    assert scheduler.is_due("volatile", 20 * 60)
+    assert not scheduler.is_due("stable", 20 * 60)
+    assert scheduler.next_update_in(19 * 60) == scheduler.interval("volatile")
+
+    scheduler.observe("stable", {"pm25": 1}, 20 * 60, active=True)
+    assert scheduler.interval("stable") == 10
+    scheduler.observe("stable", {"pm25": 1}, 21 * 60, off=True)
+    assert scheduler.interval("stable") == 240
+
+
+def test_scheduler_request_budget():
+    """A request budget stretches all intervals evenly."""
+    scheduler = AdaptiveScheduler(base_interval=60, active_interval=10)
+    for appliance_id in ("a", "b", "c"):
+        scheduler.observe(appliance_id, {}, 0)
+    assert scheduler.interval("a") == 60
+
+    scheduler.request_budget = 90  # 3 appliances x 60 polls per hour = 180
+    assert scheduler.interval("a") == 120
+    assert scheduler.next_update_in(0) == 120
+
+
+def test_scheduler_defer():
+    """A failed poll restarts the interval without learning anything."""
+    scheduler = AdaptiveScheduler(base_interval=60, active_interval=10)
+    scheduler.defer("unknown", 0)
+    assert scheduler.is_due("unknown", 0)
+
+    scheduler.observe("a", {"pm25": 1}, 0)
+    interval = scheduler.interval("a")
+    scheduler.defer("a", 100)
+    assert scheduler.interval("a") == interval
+    assert scheduler.next_update_in(100) == 60
+
+
+def test_scheduler_compares_polled_properties():
+    """Streamed properties are not compared, nested changes are."""
+    scheduler = AdaptiveScheduler(base_interval=60, active_interval=10)
+    state = {"pm25": 1, "session": {"area": 1}}
+    for step in range(20):
+        # The stream updates the state between polls
+        state["pm25"] = step
+        scheduler.observe("streaming", state, step * 60, streamed=["pm25"])
+    assert scheduler.interval("streaming") > 60
+
+    for step in range(20):
+        state["session"]["area"] = step
+        scheduler.observe("nested", state, step * 60, streamed=["pm25"])
+    assert scheduler.interval("nested") < 60
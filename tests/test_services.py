@@ -0,0 +1,167 @@
+"""Tests for services.py."""
+
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.wellbeing.api import Appliances
+from custom_components.wellbeing.const import DOMAIN
+from custom_components.wellbeing.map_data import MapData
+from custom_components.wellbeing.map_renderer import MapGeometry, render_map
+from custom_components.wellbeing.services import (
+    SERVICE_LIST_SESSIONS,
+    SERVICE_PROFILE_REFRESH,
+    SERVICE_RENDER_SESSION,
+    async_setup_services,
+)
+from custom_components.wellbeing.session_archive import SessionArchive
+
+MAP_DATA = {
+    "crumbs": [
+        {"xy": [0.0, 0.0], "t": 0},
+        {"xy": [0.2, 0.2], "t": 0},
+    ],
+    "transforms": [{"t": 0, "xya": [0.0, 0.0, 0.0]}],
+}
+
+
+def _entry() -> MockConfigEntry:
+    return MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_api_key",
+            "access_token": "test_access_token",
+            "refresh_token": "test_refresh_token",
+        },
+        options={"stream": False},
+        entry_id="test_entry_id",
+    )
+
+
+@pytest.mark.asyncio
+async def test_profile_refresh(hass, tmp_path):
+    """Test the profile is written and summarised in the response."""
+    hass.config.config_dir = str(tmp_path)
+    entry = _entry()
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, "map_pixel_budget": 0.5}
+    )
+    vacuum = MagicMock(
+        reported_state={"mapData": MapData.from_reported(MAP_DATA)}, entities=[]
+    )
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI", return_value=AsyncMock()),
+        patch(
+            "custom_components.wellbeing.WellbeingApiClient.async_get_appliances",
+            return_value=Appliances(appliances={}),
+        ) as mock_get_appliances,
+        patch(
+            "custom_components.wellbeing.services.render_map", wraps=render_map
+        ) as mock_render_map,
+        patch(
+            "custom_components.wellbeing.map_renderer.MapGeometry.from_map_data",
+            wraps=MapGeometry.from_map_data,
+        ) as mock_geometry,
+        # The vacuum appearing after setup would reload the entry
+        patch.object(hass.config_entries, "async_schedule_reload"),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        mock_get_appliances.return_value = Appliances(appliances={"pnc": vacuum})
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_PROFILE_REFRESH,
+            {"config_entry_id": entry.entry_id, "refreshes": 2, "map_renders": 3},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert mock_get_appliances.call_count == 3
+    assert response["map_renders"] == 3
+    # Rendered at the configured size, the geometry included every time
+    assert mock_render_map.call_args.args[3] == 500_000
+    assert mock_geometry.call_count == 3
+    assert response["refresh_seconds"] >= 0
+    assert os.path.isfile(response["profile"])
+    assert os.path.isfile(response["summary"])
+    with open(response["summary"], encoding="utf-8") as file:
+        assert file.readline().startswith("2 refreshes in")
+    assert response["top_functions"]
+    assert {"function", "calls", "own_seconds", "cumulative_seconds"} <= set(
+        response["top_functions"][0]
+    )
+
+
+@pytest.mark.asyncio
+async def test_profile_refresh_unknown_entry(hass):
+    """Test profiling an account that is not loaded is rejected."""
+    async_setup_services(hass)
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_PROFILE_REFRESH,
+            {"config_entry_id": "missing"},
+            blocking=True,
+            return_response=True,
+        )
+
+
+@pytest.mark.asyncio
+async def test_archived_sessions(hass, tmp_path):
+    """Test archived cleaning sessions are listed and rendered."""
+    hass.config.config_dir = str(tmp_path)
+    entry = _entry()
+    entry.add_to_hass(hass)
+
+    with (
+        patch("custom_components.wellbeing.ElectroluxHubAPI", return_value=AsyncMock()),
+        patch(
+            "custom_components.wellbeing.WellbeingApiClient.async_get_appliances",
+            return_value=Appliances(appliances={}),
+        ),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        archive = SessionArchive(hass, entry.entry_id)
+        hass.data[DOMAIN][entry.entry_id].session_archive = archive
+        map_data = MapData.from_reported({**MAP_DATA, "sessionId": "session/1"})
+        await archive.async_add("pnc", map_data, {"cleanedArea": 1.5})
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_LIST_SESSIONS,
+            {"config_entry_id": entry.entry_id},
+            blocking=True,
+            return_response=True,
+        )
+        assert [session["session_id"] for session in response["sessions"]] == [
+            "session/1"
+        ]
+        assert response["sessions"][0]["stats"] == {"cleanedArea": 1.5}
+        assert "file" not in response["sessions"][0]
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_RENDER_SESSION,
+            {"config_entry_id": entry.entry_id, "session_id": "session/1"},
+            blocking=True,
+            return_response=True,
+        )
+        with open(response["image"], "rb") as file:
+            assert file.read(8) == b"\x89PNG\r\n\x1a\n"
+        assert response["calibration_points"]
+
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_RENDER_SESSION,
+                {"config_entry_id": entry.entry_id, "session_id": "missing"},
+                blocking=True,
+                return_response=True,
+            )
@@ -0,0 +1,173 @@
+"""Tests for session_archive.py."""
+
+import asyncio
+import dataclasses
+import os
+import random
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.const import Platform
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.wellbeing.camera import WellbeingCamera
+from custom_components.wellbeing.map_data import MapData
+from custom_components.wellbeing.session_archive import (
+    SessionArchive,
+    decode_session,
+    encode_session,
+)
+
+
+def _session(session_id: str, crumbs: int = 1000) -> MapData:
+    rng = random.Random(session_id)
+    x = y = 0.0
+    reported = []
+    for index in range(crumbs):
+        x += rng.uniform(-0.05, 0.05)
+        y += rng.uniform(-0.05, 0.05)
+        reported.append({"xy": [x, y], "t": index // 100})
+    return MapData.from_reported(
+        {
+            "sessionId": session_id,
+            "timestamp": "2025-01-01T10:00:00Z",
+            "crumbs": reported + [{"xy": [0.0, 0.0]}],
+            "transforms": [{"t": 0, "xya": [0.1, 0.2, 0.3]}],
+            "chargerPoses": [{"xya": [0.0, 0.0, 0.0]}],
+            "robotPose": {"xya": [x, y, 0.0]},
+        }
+    )
+
+
+def test_session_encoding():
+    """Test sessions round trip at millimetre precision, compressed."""
+    map_data = _session("session_1")
+    data = encode_session(map_data)
+    decoded = decode_session(data)
+
+    assert len(data) < map_data.crumbs.nbytes / 4
+    assert len(decoded.crumbs) == len(map_data.crumbs)
+    assert decoded.crumbs.x.tolist() == pytest.approx(
+        map_data.crumbs.x.tolist(), abs=0.0005
+    )
+    assert decoded.crumbs.y.tolist() == pytest.approx(
+        map_data.crumbs.y.tolist(), abs=0.0005
+    )
+    assert decoded.crumbs.frame == map_data.crumbs.frame
+    assert decoded.transforms == map_data.transforms
+    assert decoded.charger_poses == map_data.charger_poses
+    assert decoded.session_id == "session_1"
+    assert decoded.robot_pose is None
+
+
+@pytest.mark.asyncio
+async def test_session_archive(hass, tmp_path):
+    """Test sessions are archived, kept within the limit and read back."""
+    hass.config.config_dir = str(tmp_path)
+    archive = SessionArchive(hass, "test_entry_id", max_sessions=2)
+    stats = {"sessionId": "session_2", "cleanedArea": 12.5}
+
+    for index in range(3):
+        await archive.async_add("pnc_1", _session(f"session_{index}"), None)
+    await archive.async_add("pnc_2", _session("session_0"), None)
+    await archive.async_add("pnc_1", _session("session_2"), stats)  # replaced
+
+    assert [(s["appliance"], s["session_id"]) for s in archive.sessions] == [
+        ("pnc_1", "session_1"),
+        ("pnc_2", "session_0"),
+        ("pnc_1", "session_2"),
+    ]
+    assert sorted(
+        name for name in os.listdir(archive.path) if name.endswith(".bin")
+    ) == [
+        "pnc_1_session_1.bin",
+        "pnc_1_session_2.bin",
+        "pnc_2_session_0.bin",
+    ]
+    session = archive.find("session_2")
+    assert session["stats"] == stats
+    assert session["crumbs"] == 1001
+    map_data = await archive.async_load_session(session)
+    assert len(map_data.crumbs) == 1001
+    assert archive.find("session_0", "pnc_1") is None
+
+    reloaded = SessionArchive(hass, "test_entry_id")
+    await reloaded.async_load()
+    assert reloaded.sessions == archive.sessions
+
+    # session_2 was archived twice, but is covered once
+    assert (await archive.async_coverage("pnc_1")).sessions == 3
+
+    await archive.async_remove()
+    assert not os.path.exists(archive.path)
+
+
+@pytest.mark.asyncio
+async def test_session_archive_disabled(hass, tmp_path):
+    """Test only the coverage is kept with a limit of 0 sessions."""
+    hass.config.config_dir = str(tmp_path)
+    archive = SessionArchive(hass, "test_entry_id", max_sessions=0)
+
+    await archive.async_add("pnc_1", _session("session_1"), None)
+    assert archive.sessions == []
+    assert os.listdir(archive.path) == ["pnc_1.coverage"]
+    assert (await archive.async_coverage("pnc_1")).sessions == 1
+    await archive.async_close()
+
+
+@pytest.mark.asyncio
+async def test_session_archive_closed(hass, tmp_path):
+    """Test closing waits for the sessions being archived, and takes no more."""
+    hass.config.config_dir = str(tmp_path)
+    archive = SessionArchive(hass, "test_entry_id")
+
+    adding = hass.async_create_task(archive.async_add("pnc_1", _session("s1"), None))
+    await asyncio.sleep(0)  # opening the grid in the executor
+    await archive.async_close()
+    assert adding.done()
+    assert [session["session_id"] for session in archive.sessions] == ["s1"]
+    assert not archive._coverage  # the grid opened by the session was closed
+
+    await archive.async_add("pnc_2", _session("s2"), None)
+    assert not archive._coverage
+    assert len(archive.sessions) == 1
+    with pytest.raises(HomeAssistantError):
+        await archive.async_coverage("pnc_1")
+
+
+@pytest.mark.asyncio
+async def test_camera_archives_finished_session(hass):
+    """Test the camera archives the trail when the next session starts."""
+    appliance = MagicMock(entities=[])
+    appliance.name = "Robot"
+    appliance.reported_state = {
+        "cleaningSession": {"sessionId": "session_1", "cleanedArea": 3.5}
+    }
+    coordinator = MagicMock()
+    coordinator.data = {"appliances": MagicMock()}
+    coordinator.data["appliances"].get_appliance.return_value = appliance
+    coordinator.session_archive.async_add = AsyncMock()
+    camera = WellbeingCamera(
+        coordinator, MagicMock(), "pnc_1", Platform.CAMERA, "mapData"
+    )
+    camera.hass = hass
+
+    first = _session("session_1", crumbs=10)
+    delta = dataclasses.replace(
+        _session("session_1", crumbs=5), timestamp="2025-01-01T10:05:00Z", delta=True
+    )
+    camera._accumulated_crumbs(first)
+    camera._accumulated_crumbs(delta)
+    coordinator.session_archive.async_add.assert_not_called()
+
+    appliance.reported_state = {"cleaningSession": {"sessionId": "session_2"}}
+    crumbs = camera._accumulated_crumbs(_session("session_2", crumbs=3))
+    await hass.async_block_till_done()
+
+    assert len(crumbs) == 4
+    pnc_id, archived, stats = coordinator.session_archive.async_add.call_args.args
+    assert pnc_id == "pnc_1"
+    assert archived.session_id == "session_1"
+    assert len(archived.crumbs) == 11 + 6
+    assert not archived.delta
+    assert stats == {"sessionId": "session_1", "cleanedArea": 3.5}
@@ -0,0 +1,41 @@
+"""Tests for timing.py."""
+
+import pytest
+
+from custom_components.wellbeing.timing import Stage, StageTimings
+
+
+def test_timings_per_stage_and_appliance():
+    """Durations are kept per stage and appliance, over a rolling window."""
+    timings = StageTimings(window=10)
+    assert timings.percentile(Stage.POLL) is None
+
+    for ms in range(1, 21):
+        timings.add(Stage.POLL, ms / 1000, "pnc_1")
+    timings.add(Stage.POLL, 0.5, "pnc_2")
+    timings.add(Stage.FAN_OUT, 0.002)
+
+    stats = timings.as_dict()
+    # Only the last 10 polls of pnc_1 are kept: 11..20 ms
+    assert stats[Stage.POLL]["pnc_1"] == {
+        "calls": 10,
+        "p50": 15.0,
+        "p95": 20.0,
+        "p99": 20.0,
+        "max": 20.0,
+    }
+    assert stats[Stage.POLL]["pnc_2"]["max"] == 500.0
+    assert stats[Stage.FAN_OUT]["all"]["calls"] == 1
+    assert timings.percentile(Stage.POLL) == 500.0
+    assert timings.percentile(Stage.POLL, 50) == 16.0
+
+
+def test_measure():
+    """measure() records the block, also when it raises."""
+    timings = StageTimings()
+    with timings.measure(Stage.COMMAND, "pnc_1"):
+        pass
+    with pytest.raises(ValueError), timings.measure(Stage.COMMAND, "pnc_1"):
+        raise ValueError
+
+    assert timings.as_dict()[Stage.COMMAND]["pnc_1"]["calls"] == 2
@@ -0,0 +1,201 @@
+"""Tests for views.py."""
+
+import asyncio
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.components.camera import CameraMjpegStream
+from homeassistant.const import Platform
+from homeassistant.setup import async_setup_component
+
+from custom_components.wellbeing.camera import WellbeingCamera
+from custom_components.wellbeing.map_data import MapData
+from custom_components.wellbeing.views import (
+    MapImageView,
+    MapTilesView,
+    render_etag,
+)
+
+
+async def _read_frame(response) -> bytes:
+    headers = {}
+    while line := (await response.content.readline()).strip():
+        if b":" in line:
+            name, value = line.split(b":", 1)
+            headers[name.strip().lower()] = value.strip()
+    assert headers[b"content-type"] == b"image/png"
+    frame = await response.content.readexactly(int(headers[b"content-length"]))
+    await response.content.readexactly(2)
+    return frame
+
+
+def test_render_etag():
+    """Test the ETag only depends on the render key and the format."""
+    key = (("2025-01-01T10:00:00Z", "session_1", 2, 0), "none")
+    assert render_etag(key, "image/png") == render_etag(key, "image/png")
+    assert render_etag(key, "image/png") != render_etag(key, "image/jpeg")
+    assert render_etag(key, "image/png") != render_etag((key[0], "pose"), "image/png")
+
+
+def _map_data(session_id: str, timestamp: str, end: list[float]) -> MapData:
+    return MapData.from_reported(
+        {
+            "sessionId": session_id,
+            "timestamp": timestamp,
+            "crumbs": [{"xy": [0.0, 0.0], "t": 0}, {"xy": end, "t": 0}],
+            "transforms": [{"t": 0, "xya": [0.0, 0.0, 0.0]}],
+        }
+    )
+
+
+def _camera(hass, map_data: MapData, options: dict) -> WellbeingCamera:
+    appliance = MagicMock(entities=[])
+    appliance.name = "Robot"
+    appliance.reported_state = {}
+    appliance.get_entity.return_value.state = map_data
+    coordinator = MagicMock()
+    coordinator.data = {"appliances": MagicMock()}
+    coordinator.data["appliances"].get_appliance.return_value = appliance
+    camera = WellbeingCamera(
+        coordinator, MagicMock(options=options), "pnc_1", Platform.CAMERA, "mapData"
+    )
+    camera.hass = hass
+    return camera
+
+
+async def _client(hass, hass_client, view_class, camera: WellbeingCamera):
+    component = MagicMock()
+    component.get_entity.side_effect = {"camera.robot_map": camera}.get
+    assert await async_setup_component(hass, "http", {})
+    hass.http.register_view(view_class(component))
+    return await hass_client()
+
+
+@pytest.mark.asyncio
+async def test_map_image_view(hass, hass_client):
+    """Test the map is only sent again when it changed."""
+    camera = _camera(
+        hass, _map_data("view_session", "2025-01-01T10:00:00Z", [0.1, 0.1]), {}
+    )
+    appliance = camera.get_appliance
+    client = await _client(hass, hass_client, MapImageView, camera)
+
+    response = await client.get("/api/wellbeing/map/camera.robot_map")
+    assert response.status == HTTPStatus.OK
+    assert response.content_type == "image/png"
+    image = await response.read()
+    assert image.startswith(b"\x89PNG")
+    etag = response.headers["ETag"]
+
+    response = await client.get(
+        "/api/wellbeing/map/camera.robot_map", headers={"If-None-Match": etag}
+    )
+    assert response.status == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not await response.read()
+
+    # A new upload makes the image change
+    appliance.get_entity.return_value.state = _map_data(
+        "view_session", "2025-01-01T10:05:00Z", [0.2, 0.1]
+    )
+    response = await client.get(
+        "/api/wellbeing/map/camera.robot_map", headers={"If-None-Match": etag}
+    )
+    assert response.status == HTTPStatus.OK
+    assert response.headers["ETag"] != etag
+    assert await response.read() != image
+
+    response = await client.get("/api/wellbeing/map/camera.other")
+    assert response.status == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_map_image_concurrent(hass):
+    """Test a request during a render gets the new image with the new key."""
+    camera = _camera(
+        hass, _map_data("concurrent_session", "2025-01-01T10:00:00Z", [0.1, 0.1]), {}
+    )
+    first, first_key = await camera.async_map_image()
+    camera.get_appliance.get_entity.return_value.state = _map_data(
+        "concurrent_session", "2025-01-01T10:05:00Z", [0.2, 0.1]
+    )
+    (image, key), (other, other_key) = await asyncio.gather(
+        camera.async_map_image(), camera.async_map_image()
+    )
+    assert key != first_key
+    assert image is not first
+    assert (other, other_key) == (image, key)
+
+
+@pytest.mark.asyncio
+async def test_map_image_per_robot(hass):
+    """Test robots with the same session ids and timestamps get their own map."""
+    images = []
+    for end in ([0.3, 0.1], [0.1, 0.3]):
+        camera = _camera(
+            hass, _map_data("same_session", "2025-01-01T10:00:00Z", end), {}
+        )
+        map_image, _ = await camera.async_map_image()
+        images.append(map_image.image)
+    assert images[0] != images[1]
+
+
+@pytest.mark.asyncio
+async def test_map_stream(hass, hass_client):
+    """Test the stream sends a frame when the map was rendered again."""
+    camera = _camera(
+        hass,
+        _map_data("stream_session", "2025-01-01T10:00:00Z", [0.1, 0.1]),
+        {"map_stream_fps": 10},
+    )
+    client = await _client(hass, hass_client, CameraMjpegStream, camera)
+
+    response = await client.get("/api/camera_proxy_stream/camera.robot_map")
+    assert response.status == HTTPStatus.OK
+    assert response.content_type == "multipart/x-mixed-replace"
+    first = await _read_frame(response)
+    assert first.startswith(b"\x89PNG")
+    assert await _read_frame(response) == first
+
+    camera.get_appliance.get_entity.return_value.state = _map_data(
+        "stream_session", "2025-01-01T10:05:00Z", [0.2, 0.1]
+    )
+    await camera._async_render_if_changed()
+    second = await _read_frame(response)
+    assert second != first
+    assert await _read_frame(response) == second
+    response.close()
+
+
+@pytest.mark.asyncio
+async def test_map_tiles_view(hass, hass_client):
+    """Test the layout of the tiles and the tiles are served."""
+    camera = _camera(
+        hass, _map_data("tiles_view_session", "2025-01-01T10:00:00Z", [0.3, 0.1]), {}
+    )
+    client = await _client(hass, hass_client, MapTilesView, camera)
+
+    response = await client.get("/api/wellbeing/map_tiles/camera.robot_map")
+    assert response.status == HTTPStatus.OK
+    layout = await response.json()
+    top = layout["zooms"][-1]
+    assert top["scale"] == 120
+    assert top["x"] == [-1, 0]
+
+    url = "/api/wellbeing/map_tiles/camera.robot_map?zoom=3&x=0&y=-1"
+    response = await client.get(url)
+    assert response.status == HTTPStatus.OK
+    assert response.content_type == "image/png"
+    etag = response.headers["ETag"]
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status == HTTPStatus.NOT_MODIFIED
+
+    response = await client.get(
+        "/api/wellbeing/map_tiles/camera.robot_map?zoom=3&x=9&y=9"
+    )
+    assert response.status == HTTPStatus.NOT_FOUND
+    response = await client.get(
+        "/api/wellbeing/map_tiles/camera.robot_map?zoom=3&x=left"
+    )
+    assert response.status == HTTPStatus.BAD_REQUEST
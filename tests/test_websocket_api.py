@@ -0,0 +1,173 @@
+"""Tests for websocket_api.py."""
+
+import asyncio
+import dataclasses
+from unittest.mock import MagicMock, patch
+
+import pytest
+from homeassistant.components.camera.const import DATA_COMPONENT
+from homeassistant.const import Platform
+
+from custom_components.wellbeing.camera import WellbeingCamera
+from custom_components.wellbeing.map_data import MapData
+from custom_components.wellbeing.map_renderer import ROBOT_MARKER_NONE
+from custom_components.wellbeing.websocket_api import (
+    async_setup_websocket_api,
+    crumbs_message,
+    pose_message,
+    session_message,
+)
+
+
+def _map_data(points: list[tuple[float, float, int]], **reported) -> MapData:
+    return MapData.from_reported(
+        {
+            "sessionId": "session_1",
+            "timestamp": "2025-01-01T10:00:00Z",
+            "crumbs": [{"xy": [x, y], "t": frame} for x, y, frame in points],
+            "transforms": [
+                {"t": 0, "xya": [0.0, 0.0, 0.0]},
+                {"t": 1, "xya": [1.0, 0.0, 0.0]},
+            ],
+            "chargerPoses": [{"xya": [0.0, 0.0, 0.0]}],
+            **reported,
+        }
+    )
+
+
+def test_session_message():
+    """Test the whole trail is sent as flat runs, in millimetres."""
+    map_data = _map_data([(0.0, 0.0, 0), (0.10004, 0.2, 0), (0.0, 0.0, 1)])
+    message = session_message(map_data, ROBOT_MARKER_NONE, [{"map": {}}])
+
+    assert message["type"] == "session"
+    assert message["session_id"] == "session_1"
+    assert message["runs"] == [[0.0, 0.0, 0.1, 0.2], [-1.0, 0.0]]
+    assert message["charger"] == [0.0, 0.0, 0.0]
+    assert message["robot"] is None
+    assert message["calibration_points"] == [{"map": {}}]
+
+
+def test_crumbs_message():
+    """Test new crumbs tell whether they continue the last run sent."""
+    points = [(0.0, 0.0, 0), (0.1, 0.0, 0), (0.2, 0.0, 0), (0.0, 0.1, 1)]
+    map_data = _map_data(points)
+
+    continued = crumbs_message(map_data, 2)
+    assert continued["runs"] == [[0.2, 0.0], [-1.0, 0.1]]
+    assert continued["continues"]
+
+    new_run = crumbs_message(map_data, 3)
+    assert new_run["runs"] == [[-1.0, 0.1]]
+    assert not new_run["continues"]
+
+
+def test_pose_message():
+    """Test the pose message has the rounded pose and the marker."""
+    map_data = _map_data([], robotPose={"xya": [0.12345, 1.0, 3.14159]})
+    assert pose_message(map_data, "pose") == {
+        "type": "pose",
+        "robot": [0.123, 1.0, 3.142],
+        "robot_marker": "pose",
+    }
+    assert pose_message(MapData(), "none")["robot"] is None
+
+
+@pytest.mark.asyncio
+def _robot_map(hass) -> tuple[WellbeingCamera, MagicMock]:
+    appliance = MagicMock(entities=[])
+    appliance.name = "Robot"
+    appliance.reported_state = {}
+    coordinator = MagicMock()
+    coordinator.data = {"appliances": MagicMock()}
+    coordinator.data["appliances"].get_appliance.return_value = appliance
+    camera = WellbeingCamera(
+        coordinator, MagicMock(), "pnc_1", Platform.CAMERA, "mapData"
+    )
+    camera.hass = hass
+    camera.entity_id = "camera.robot_map"
+    return camera, appliance
+
+
+async def test_subscribe_map(hass, hass_ws_client):
+    """Test a subscriber gets the session once, then only the new crumbs."""
+    camera, appliance = _robot_map(hass)
+    hass.data[DATA_COMPONENT] = MagicMock()
+    hass.data[DATA_COMPONENT].get_entity.side_effect = {"camera.robot_map": camera}.get
+    async_setup_websocket_api(hass)
+
+    first = _map_data([(0.0, 0.0, 0), (0.1, 0.0, 0)])
+    appliance.get_entity.return_value.state = first
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "wellbeing/map/subscribe", "entity_id": "camera.robot_map"}
+    )
+    assert (await client.receive_json())["success"]
+    session = (await client.receive_json())["event"]
+    assert session["type"] == "session"
+    assert session["runs"] == [[0.0, 0.0, 0.1, 0.0]]
+
+    # The next upload adds a crumb to the trail
+    appliance.get_entity.return_value.state = dataclasses.replace(
+        _map_data([(0.0, 0.0, 0), (0.1, 0.0, 0), (0.2, 0.0, 0)]),
+        timestamp="2025-01-01T10:05:00Z",
+    )
+    await camera._async_render_if_changed()
+    crumbs = (await client.receive_json())["event"]
+    assert crumbs["type"] == "crumbs"
+    assert crumbs["runs"] == [[0.2, 0.0]]
+    assert crumbs["continues"]
+    # The image grew with the trail
+    calibration = (await client.receive_json())["event"]
+    assert calibration["type"] == "calibration"
+    assert calibration["calibration_points"] != session["calibration_points"]
+
+    await client.send_json_auto_id(
+        {"type": "wellbeing/map/subscribe", "entity_id": "camera.other"}
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "not_found"
+
+
+async def test_subscribe_map_during_push(hass):
+    """Test a push while the session is sent reaches the new subscriber."""
+    camera, appliance = _robot_map(hass)
+    appliance.get_entity.return_value.state = _map_data([(0.0, 0.0, 0), (0.1, 0.0, 0)])
+    first, second = [], []
+    camera.async_subscribe_map(first.append)
+    await hass.async_block_till_done()
+
+    # Hold the session message of the second subscriber until a push started
+    add_executor_job = hass.async_add_executor_job
+    building, pushed = asyncio.Event(), asyncio.Event()
+
+    def gated_executor_job(target, *args):
+        future = add_executor_job(target, *args)
+        if target is not session_message or pushed.is_set():
+            return future
+
+        async def gated():
+            building.set()
+            await pushed.wait()
+            return await future
+
+        return gated()
+
+    with patch.object(hass, "async_add_executor_job", side_effect=gated_executor_job):
+        camera.async_subscribe_map(second.append)
+        await building.wait()
+        appliance.get_entity.return_value.state = dataclasses.replace(
+            _map_data([(0.0, 0.0, 0), (0.1, 0.0, 0), (0.2, 0.0, 0)]),
+            timestamp="2025-01-01T10:05:00Z",
+        )
+        render = hass.async_create_task(camera._async_render_if_changed())
+        await asyncio.wait([render], timeout=1)
+        pushed.set()
+        await render
+        await hass.async_block_till_done()
+
+    assert [message["type"] for message in second][:2] == ["session", "crumbs"]
+    assert second[0]["runs"] == [[0.0, 0.0, 0.1, 0.0]]
+    assert second[1]["runs"] == [[0.2, 0.0]]